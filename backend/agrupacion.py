@@ -0,0 +1,154 @@
+"""
+Agrupación de peticiones de lectura idénticas (single-flight)
+
+Al abrir el frontend cada cliente pide a la vez productos, categorías y
+alertas (el ``Promise.all`` de ``frontend/app.js``), y al empezar un turno
+llegan cientos de peticiones idénticas en el mismo instante. Con el
+decorador ``agrupar_peticiones`` la primera petición de cada ruta y query
+string ejecuta la vista; las idénticas que llegan mientras tanto esperan y
+reciben el mismo cuerpo ya serializado, sin tocar la base de datos. Durante
+``AGRUPACION_VENTANA_MS`` después de terminar, una respuesta 200 sirve
+también a las que llegan justo detrás.
+
+Cualquier escritura (POST, PUT, PATCH, DELETE) atendida por el worker
+descarta las respuestas guardadas y las ejecuciones en curso dejan de
+admitir peticiones nuevas, así que después de una escritura el mismo worker
+nunca devuelve una lectura anterior. Las escrituras de otros workers (y de
+las tareas en segundo plano) tardan como mucho la ventana en verse.
+
+Las respuestas en streaming no se comparten: quien esperaba una ejecuta la
+vista por su cuenta.
+
+Variables de entorno:
+- ``AGRUPACION_PETICIONES``: 1 (por defecto) o 0
+- ``AGRUPACION_VENTANA_MS``: milisegundos que se reutiliza una respuesta ya
+  terminada (50; 0 solo agrupa las peticiones simultáneas)
+"""
+
+from collections import defaultdict
+from functools import wraps
+import os
+import threading
+import time
+
+from flask import current_app, request
+
+AGRUPACION_ACTIVA = os.getenv('AGRUPACION_PETICIONES', '1').lower() not in ('0', 'false', 'no')
+VENTANA_AGRUPACION = float(os.getenv('AGRUPACION_VENTANA_MS', 50)) / 1000
+METODOS_LECTURA = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class _Ejecucion:
+    """Ejecución de una vista compartida por las peticiones idénticas"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        # (cuerpo, estado, cabeceras), o None si la respuesta no se puede compartir
+        self.respuesta = None
+        self.error = None
+        self.terminada = None
+
+
+class AgrupadorPeticiones:
+    def __init__(self, ventana=0.05, max_entradas=256):
+        self.ventana = ventana
+        self.max_entradas = max_entradas
+        self._ejecuciones = {}
+        self._lock = threading.Lock()
+        self._ejecutadas = defaultdict(int)
+        self._agrupadas = defaultdict(int)
+
+    def ejecutar(self, ruta, clave, vista):
+        """Respuesta de ``vista()``, ejecutada una sola vez para las peticiones con la misma ``clave``"""
+        with self._lock:
+            ejecucion = self._ejecuciones.get(clave)
+            if ejecucion is not None and self._caducada(ejecucion, time.monotonic()):
+                del self._ejecuciones[clave]
+                ejecucion = None
+
+            propietario = ejecucion is None
+            if propietario:
+                if len(self._ejecuciones) >= self.max_entradas:
+                    self._purgar()
+                ejecucion = self._ejecuciones[clave] = _Ejecucion()
+                self._ejecutadas[ruta] += 1
+
+        if propietario:
+            return self._ejecutar_vista(clave, ejecucion, vista)
+
+        ejecucion.evento.wait()
+        if ejecucion.error is not None:
+            raise ejecucion.error
+        if ejecucion.respuesta is None:
+            return vista()
+
+        with self._lock:
+            self._agrupadas[ruta] += 1
+        cuerpo, estado, cabeceras = ejecucion.respuesta
+        return current_app.response_class(cuerpo, status=estado, headers=cabeceras)
+
+    def _ejecutar_vista(self, clave, ejecucion, vista):
+        try:
+            response = current_app.make_response(vista())
+            if not response.is_streamed:
+                # Copia antes de que el ETag o la compresión modifiquen la respuesta
+                ejecucion.respuesta = (response.get_data(), response.status_code, list(response.headers.items()))
+            return response
+        except Exception as e:
+            ejecucion.error = e
+            raise
+        finally:
+            with self._lock:
+                ejecucion.terminada = time.monotonic()
+                reutilizable = (ejecucion.respuesta is not None and ejecucion.respuesta[1] == 200
+                                and self.ventana > 0)
+                # Una escritura pudo haberla descartado ya
+                if not reutilizable and self._ejecuciones.get(clave) is ejecucion:
+                    del self._ejecuciones[clave]
+            ejecucion.evento.set()
+
+    def _caducada(self, ejecucion, ahora):
+        return ejecucion.terminada is not None and ahora - ejecucion.terminada >= self.ventana
+
+    def _purgar(self):
+        ahora = time.monotonic()
+        for clave in [clave for clave, ejecucion in self._ejecuciones.items() if self._caducada(ejecucion, ahora)]:
+            del self._ejecuciones[clave]
+
+    def invalidar(self):
+        """Olvidar las respuestas terminadas y cerrar las ejecuciones en curso a peticiones nuevas"""
+        with self._lock:
+            self._ejecuciones.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'ventana_ms': round(self.ventana * 1000, 1),
+                'ejecutadas': dict(self._ejecutadas),
+                'agrupadas': dict(self._agrupadas)
+            }
+
+
+def agrupar_peticiones(vista):
+    """Decorador: las peticiones GET idénticas y simultáneas comparten una ejecución de la vista"""
+    if not AGRUPACION_ACTIVA:
+        return vista
+
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        if request.method != 'GET':
+            return vista(*args, **kwargs)
+        clave = (request.path, tuple(sorted(request.args.items(multi=True))))
+        return agrupador_peticiones.ejecutar(request.url_rule.rule, clave, lambda: vista(*args, **kwargs))
+    return envoltura
+
+
+def invalidar_tras_escritura(response):
+    """Hook ``after_request``: una escritura descarta las lecturas agrupadas de este worker"""
+    if request.method not in METODOS_LECTURA:
+        agrupador_peticiones.invalidar()
+    return response
+
+
+# Instancia global del agrupador de peticiones
+agrupador_peticiones = AgrupadorPeticiones(VENTANA_AGRUPACION)
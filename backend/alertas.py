@@ -0,0 +1,80 @@
+"""
+Motor de alertas de stock del Sistema de Inventario
+
+Evalúa los umbrales de stock de todos los productos (o de un subconjunto)
+con una sola sentencia INSERT ... SELECT ... WHERE NOT EXISTS, en lugar de
+una consulta y un INSERT por producto. La pasada periódica sobre todo el
+catálogo la ejecuta ``backend/tareas.py``.
+"""
+
+from database.config import db_config
+
+# Genera las alertas de stock bajo y agotado que falten. Una alerta no se
+# repite si ya existe otra del mismo tipo para el producto en el último día.
+QUERY_GENERAR_ALERTAS = """
+INSERT INTO alertas (producto_id, tipo_alerta, mensaje)
+SELECT candidatas.producto_id, candidatas.tipo_alerta, candidatas.mensaje
+FROM (
+    SELECT p.id AS producto_id, 'stock_bajo' AS tipo_alerta,
+           CONCAT('Stock bajo: ', p.nombre, ' (Código: ', p.codigo, ') - Stock actual: ',
+                  p.stock_actual, ', Mínimo: ', p.stock_minimo) AS mensaje
+    FROM productos p
+    WHERE p.activo = TRUE AND p.stock_actual <= p.stock_minimo {filtro}
+    UNION ALL
+    SELECT p.id, 'stock_agotado',
+           CONCAT('STOCK AGOTADO: ', p.nombre, ' (Código: ', p.codigo,
+                  ') - Reabastecimiento urgente requerido')
+    FROM productos p
+    WHERE p.activo = TRUE AND p.stock_actual = 0 {filtro}
+) candidatas
+WHERE NOT EXISTS (
+    SELECT 1 FROM alertas a
+    WHERE a.producto_id = candidatas.producto_id
+    AND a.tipo_alerta = candidatas.tipo_alerta
+    AND a.fecha_alerta > DATE_SUB(NOW(), INTERVAL 1 DAY)
+)
+"""
+
+
+def generar_alertas_stock(producto_ids=None, connection=None):
+    """Generar alertas de stock bajo/agotado en bloque.
+
+    Si se indican ``producto_ids`` solo se evalúan esos productos. Si se
+    pasa ``connection`` se reutiliza; si no, se toma una del pool.
+    Retorna el número de alertas creadas, o False si hubo un error.
+    """
+    if producto_ids is not None:
+        producto_ids = list(producto_ids)
+        if not producto_ids:
+            return 0
+
+    try:
+        if connection is not None:
+            return _generar(connection, producto_ids)
+
+        with db_config.connection() as connection:
+            if not connection:
+                return False
+            return _generar(connection, producto_ids)
+
+    except Exception as e:
+        print(f"Error generando alertas: {e}")
+        return False
+
+
+def _generar(connection, producto_ids):
+    filtro = ''
+    params = ()
+    if producto_ids is not None:
+        marcadores = ', '.join(['%s'] * len(producto_ids))
+        filtro = f"AND p.id IN ({marcadores})"
+        # El filtro aparece en las dos ramas del UNION
+        params = tuple(producto_ids) * 2
+
+    cursor = connection.cursor()
+    cursor.execute(QUERY_GENERAR_ALERTAS.format(filtro=filtro), params)
+    alertas_generadas = cursor.rowcount
+    cursor.close()
+
+    return alertas_generadas
+
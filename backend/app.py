@@ -4,32 +4,51 @@ Aplicación principal del Sistema de Gestión de Inventario Inteligente
 Backend API con Flask
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 import sys
 import os
 from werkzeug.utils import secure_filename
-from PIL import Image
-import uuid
+import io
+import json
+import base64
 from datetime import datetime
 
 # Agregar el directorio padre al path para importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.config import db_config
+from backend.alertas import generar_alertas_stock
+from backend.tareas import programador_tareas
+from backend.cache import catalogo_cache
+from backend.movimientos import registrar_movimientos
+from backend.edicion_masiva import CAMPOS_ALERTAS, validar_edicion, aplicar_edicion
+from backend.reservas import validar_pedido, validar_clave, descontar_pedido
+from backend.historico_stock import interpretar_fecha, stock_en_fecha
+from backend.busqueda import construir_busqueda
+from backend.catalogo_csv import importar_csv, exportar_csv, resultado_vacio
+from backend.imagenes import (
+    procesador_imagenes, estado_imagen, guardar_por_contenido, imagenes_pendientes,
+    nombre_variante, original_de_variante
+)
+from backend.eventos import RECONEXION_MS, bus_eventos, flujo_eventos, ultimo_id_solicitado
+from backend.serializacion import ProveedorJSONRapido
+from backend.respuestas import respuesta_condicional, comprimir_respuesta
+from backend.agrupacion import agrupar_peticiones, agrupador_peticiones, invalidar_tras_escritura
+from backend.metricas import (
+    CONSULTA_LENTA_MS, METRICAS_ACTIVAS, instrumentar_app, exportar_metricas, fase,
+    medidores_proceso, muestras_lentas
+)
 import mysql.connector
 from datetime import datetime
 
-app = Flask(__name__)
-CORS(app)  # Permitir peticiones desde el frontend
+# Rutas de la API; la aplicación se construye con crear_app()
+api = Blueprint('api', __name__)
 
-# Configuración
-app.config['SECRET_KEY'] = 'tu_clave_secreta_aqui'
-app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB máximo
-
-# Asegurar que la carpeta de uploads existe
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+CACHE_TTL_CATEGORIAS = float(os.getenv('CACHE_TTL_CATEGORIAS', 600))
+MOVIMIENTOS_LOTE_MAXIMO = int(os.getenv('MOVIMIENTOS_LOTE_MAXIMO', 5000))
+PRODUCTOS_LOTE_MAXIMO = int(os.getenv('PRODUCTOS_LOTE_MAXIMO', 10000))
+UPLOADS_MAX_AGE = 365 * 24 * 3600
 
 # Configuración de archivos permitidos
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -39,37 +58,62 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def save_image(file):
-    """Guardar imagen y retornar la URL"""
+    """Guardar imagen por contenido y encolar su optimización.
+
+    Retorna ``(url, estado)``: la URL de la variante ``detalle`` y el estado
+    del procesamiento (``pendiente`` o ``lista`` si la misma imagen ya se
+    había procesado), o ``(None, None)`` si el archivo no es válido.
+    """
     if file and allowed_file(file.filename):
-        # Generar nombre único para el archivo
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        
-        # Guardar archivo
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        carpeta = current_app.config['UPLOAD_FOLDER']
+        extension = file.filename.rsplit('.', 1)[1].lower()
         
-        # Optimizar imagen
-        try:
-            with Image.open(filepath) as img:
-                # Redimensionar si es muy grande
-                if img.width > 800 or img.height > 800:
-                    img.thumbnail((800, 800), Image.Resampling.LANCZOS)
-                    img.save(filepath, quality=85, optimize=True)
-        except Exception as e:
-            print(f"Error optimizando imagen: {e}")
-        
-        # Retornar URL relativa
-        return f"/uploads/{unique_filename}"
+        with fase('imagen'):
+            # El nombre es el hash del contenido: una imagen repetida no se guarda dos veces
+            filename, nuevo = guardar_por_contenido(file.stream, carpeta, extension)
+            
+            # Optimizar imagen y generar variantes en segundo plano (solo si no se hizo ya)
+            estado = estado_imagen(carpeta, filename)
+            if nuevo or (estado['estado'] == 'lista' and not estado['variantes']):
+                procesador_imagenes.encolar(carpeta, filename)
+                # Sin pool de procesos la imagen se procesa en línea y ya está lista
+                estado = estado_imagen(carpeta, filename)
+        
+        # Como antes, el producto usa la imagen reducida a 800px (el original se conserva)
+        return f"/uploads/{nombre_variante(filename, 'detalle')}", estado['estado']
     
-    return None
+    return None, None
 
 # Ruta para servir archivos estáticos (imágenes)
-@app.route('/uploads/<filename>')
+@api.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    carpeta = current_app.config['UPLOAD_FOLDER']
+    if not os.path.exists(os.path.join(carpeta, filename)):
+        original = original_de_variante(carpeta, filename, ALLOWED_EXTENSIONS)
+        if original:
+            # Variante aún en cola: el original, sin caché para pedir la variante después
+            response = send_from_directory(carpeta, original, max_age=0)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+    
+    # El contenido de cada archivo no cambia nunca: caché de un año y ETag por nombre
+    response = send_from_directory(carpeta, filename, etag=filename, max_age=UPLOADS_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={UPLOADS_MAX_AGE}, immutable'
+    return response
+
+@api.route('/api/imagenes/<filename>')
+def obtener_estado_imagen(filename):
+    """Estado del procesamiento de una imagen subida y sus variantes"""
+    carpeta = current_app.config['UPLOAD_FOLDER']
+    filename = secure_filename(filename)
+    # También se acepta la URL de una variante, como la que guarda el producto
+    estado = estado_imagen(carpeta, original_de_variante(carpeta, filename, ALLOWED_EXTENSIONS) or filename)
+    if not estado:
+        return jsonify({'error': 'Imagen no encontrada'}), 404
+    
+    return jsonify({'success': True, **estado})
 
-@app.route('/')
+@api.route('/')
 def home():
     """Ruta principal - Información de la API"""
     return jsonify({
@@ -79,85 +123,401 @@ def home():
             'productos': '/api/productos',
             'categorias': '/api/categorias',
             'movimientos': '/api/movimientos',
-            'alertas': '/api/alertas'
+            'stock': '/api/stock/descontar',
+            'alertas': '/api/alertas',
+            'dashboard': '/api/dashboard',
+            'predicciones': '/api/predicciones',
+            'eventos': '/api/eventos',
+            'metricas': '/api/metrics'
         }
     })
 
-@app.route('/api/health')
+@api.route('/api/health')
 def health_check():
     """Verificar el estado de la API y base de datos"""
     try:
         # Probar conexión a la base de datos
-        connection = db_config.get_connection()
-        if connection:
-            connection.close()
-            db_status = "conectado"
-        else:
-            db_status = "error"
+        with db_config.connection() as connection:
+            if connection:
+                db_status = "conectado"
+            else:
+                db_status = "error"
     except Exception as e:
         db_status = f"error: {str(e)}"
     
     return jsonify({
         'status': 'ok',
         'timestamp': datetime.now().isoformat(),
-        'database': db_status
+        'database': db_status,
+        'replicas': db_config.estado_replicas(),
+        'cache': catalogo_cache.estadisticas(),
+        'agrupacion': agrupador_peticiones.estadisticas(),
+        'eventos': bus_eventos.estadisticas()
     })
 
-@app.route('/api/productos', methods=['GET'])
-def obtener_productos():
-    """Obtener todos los productos"""
+@api.route('/api/metrics')
+def metricas():
+    """Métricas de peticiones, consultas, pool y caché en formato Prometheus (de todos los workers)"""
+    if not METRICAS_ACTIVAS:
+        return jsonify({'error': 'Métricas desactivadas (METRICAS=0)'}), 404
+    
+    return Response(exportar_metricas(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/api/metrics/consultas-lentas')
+def consultas_lentas():
+    """Últimas consultas que superaron METRICAS_CONSULTA_LENTA_MS, con su SQL y su huella"""
+    if not METRICAS_ACTIVAS:
+        return jsonify({'error': 'Métricas desactivadas (METRICAS=0)'}), 404
+    
+    return jsonify({
+        'success': True,
+        'umbral_ms': CONSULTA_LENTA_MS,
+        'consultas': muestras_lentas()
+    })
+
+# Columnas que se pueden pedir con ?campos= en el listado de productos
+CAMPOS_PRODUCTO = {
+    'id': 'p.id',
+    'codigo': 'p.codigo',
+    'nombre': 'p.nombre',
+    'descripcion': 'p.descripcion',
+    'precio': 'p.precio',
+    'stock_actual': 'p.stock_actual',
+    'stock_minimo': 'p.stock_minimo',
+    'categoria_id': 'p.categoria_id',
+    'categoria_nombre': 'c.nombre as categoria_nombre',
+    'imagen_url': 'p.imagen_url',
+    'activo': 'p.activo',
+    'created_at': 'p.created_at',
+    'updated_at': 'p.updated_at'
+}
+LIMITE_MAXIMO_PRODUCTOS = 1000
+LOTE_STREAMING_PRODUCTOS = 500
+LIMITE_BUSQUEDA = 100
+
+# Consultas compartidas con la variante asíncrona (backend/app_async.py)
+QUERY_PRODUCTO = """
+SELECT p.*, c.nombre as categoria_nombre 
+FROM productos p 
+LEFT JOIN categorias c ON p.categoria_id = c.id 
+WHERE p.id = %s AND p.activo = TRUE
+"""
+
+QUERY_CATEGORIAS = "SELECT * FROM categorias ORDER BY nombre"
+
+# Última ejecución del job: la que insertó el id más alto. Cada ejecución escribe
+# todas sus filas con la misma fecha_prediccion y borra las anteriores en la misma
+# transacción; el filtro cubre las bases de datos con ejecuciones de antes de ese cambio
+QUERY_PREDICCIONES = """
+SELECT pd.producto_id, pd.cantidad_predicha, pd.fecha_prediccion, pd.confianza,
+       pd.created_at, p.codigo as producto_codigo, p.nombre as producto_nombre,
+       p.stock_actual
+FROM predicciones_demanda pd
+JOIN productos p ON pd.producto_id = p.id
+WHERE pd.fecha_prediccion = (
+    SELECT fecha_prediccion FROM predicciones_demanda ORDER BY id DESC LIMIT 1
+)
+"""
+
+# Resumen consolidado más los cambios que los triggers de
+# database/migraciones/009_resumen_deltas.sql aún no han pasado al resumen
+# (backend/resumen.py los consolida cada RESUMEN_INTERVALO segundos)
+QUERY_DASHBOARD_CATEGORIAS = """
+SELECT r.categoria_id, c.nombre as categoria_nombre,
+       SUM(r.total_productos) as total_productos, SUM(r.stock_bajo) as stock_bajo,
+       SUM(r.agotados) as agotados, SUM(r.valor_inventario) as valor_inventario
+FROM (
+    SELECT categoria_id, total_productos, stock_bajo, agotados, valor_inventario
+    FROM resumen_categorias
+    UNION ALL
+    SELECT categoria_id, total_productos, stock_bajo, agotados, valor_inventario
+    FROM resumen_categorias_deltas
+) r
+LEFT JOIN categorias c ON r.categoria_id = c.id
+GROUP BY r.categoria_id, c.nombre
+HAVING SUM(r.total_productos) > 0
+ORDER BY c.nombre
+"""
+QUERY_DASHBOARD_ALERTAS = """
+SELECT IFNULL((SELECT no_leidas FROM resumen_alertas WHERE id = 1), 0)
+     + (SELECT IFNULL(SUM(no_leidas), 0) FROM resumen_alertas_deltas) as no_leidas
+"""
+QUERY_TOTAL_CATEGORIAS = "SELECT COUNT(*) as total FROM categorias"
+
+# Alertas de los últimos 7 días
+QUERY_ALERTAS_RECIENTES = """
+SELECT a.*, p.nombre as producto_nombre, p.codigo as producto_codigo
+FROM alertas a
+JOIN productos p ON a.producto_id = p.id
+WHERE a.fecha_alerta > DATE_SUB(NOW(), INTERVAL 7 DAY)
+ORDER BY a.fecha_alerta DESC
+LIMIT 20
+"""
+
+QUERY_MARCAR_ALERTA = "UPDATE alertas SET leida = TRUE WHERE id = %s"
+
+def columnas_producto(campos):
+    """Traducir el parámetro ``campos`` a las columnas del SELECT.
+
+    ``id`` y ``nombre`` se incluyen siempre porque forman el cursor.
+    """
+    if not campos:
+        return 'p.*, c.nombre as categoria_nombre'
+    
+    nombres = [campo.strip() for campo in campos.split(',') if campo.strip()]
+    invalidos = [campo for campo in nombres if campo not in CAMPOS_PRODUCTO]
+    if invalidos:
+        raise ValueError(f"Campos no válidos: {', '.join(invalidos)}")
+    
+    for requerido in ('nombre', 'id'):
+        if requerido not in nombres:
+            nombres.insert(0, requerido)
+    
+    return ', '.join(CAMPOS_PRODUCTO[campo] for campo in nombres)
+
+def codificar_cursor(producto):
+    """Cursor opaco con la posición (nombre, id) del último producto"""
+    posicion = json.dumps([producto['nombre'], producto['id']])
+    return base64.urlsafe_b64encode(posicion.encode('utf-8')).decode('ascii')
+
+def decodificar_cursor(valor):
     try:
-        connection = db_config.get_connection()
+        nombre, producto_id = json.loads(base64.urlsafe_b64decode(valor.encode('ascii')))
+        return str(nombre), int(producto_id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor no válido')
+
+def query_productos(columnas, posicion=None, limite=None):
+    """Construir la consulta keyset del listado ordenado por (nombre, id)"""
+    query = f"""
+    SELECT {columnas}
+    FROM productos p 
+    LEFT JOIN categorias c ON p.categoria_id = c.id 
+    WHERE p.activo = TRUE
+    """
+    params = []
+    
+    if posicion:
+        query += " AND (p.nombre > %s OR (p.nombre = %s AND p.id > %s))"
+        params.extend([posicion[0], posicion[0], posicion[1]])
+    
+    query += " ORDER BY p.nombre, p.id"
+    
+    if limite:
+        query += " LIMIT %s"
+        params.append(limite)
+    
+    return query, params
+
+def parametros_listado(args):
+    """Validar los parámetros del listado: (columnas, posicion, limite); lanza ValueError"""
+    columnas = columnas_producto(args.get('campos'))
+    posicion = decodificar_cursor(args['cursor']) if args.get('cursor') else None
+    limite = args.get('limit')
+    if limite is not None:
+        limite = int(limite)
+        if not 1 <= limite <= LIMITE_MAXIMO_PRODUCTOS:
+            raise ValueError(f'limit debe estar entre 1 y {LIMITE_MAXIMO_PRODUCTOS}')
+    return columnas, posicion, limite
+
+def respuesta_listado(productos, limite):
+    """Respuesta del listado a partir de una página leída con un producto de más"""
+    siguiente = None
+    if limite and len(productos) > limite:
+        productos = productos[:limite]
+        siguiente = codificar_cursor(productos[-1])
+    
+    respuesta = {
+        'success': True,
+        'productos': productos,
+        'total': len(productos)
+    }
+    if limite:
+        respuesta['next_cursor'] = siguiente
+    
+    return respuesta
+
+def parametros_busqueda(args):
+    """Validar los parámetros de búsqueda: (busqueda, limite, pagina); lanza ValueError"""
+    limite = args.get('limit', 20, type=int)
+    pagina = args.get('pagina', 1, type=int)
+    if not 1 <= limite <= LIMITE_BUSQUEDA or pagina < 1:
+        raise ValueError(f'limit debe estar entre 1 y {LIMITE_BUSQUEDA} y pagina ser mayor que 0')
+    
+    # Se pide un resultado de más para saber si hay otra página
+    busqueda = construir_busqueda(
+        args.get('q', ''),
+        categoria_id=args.get('categoria_id', type=int),
+        stock=args.get('stock'),
+        limite=limite + 1,
+        offset=(pagina - 1) * limite,
+        motor=db_config.motor
+    )
+    return busqueda, limite, pagina
+
+def query_predicciones(producto_id, limite):
+    query = QUERY_PREDICCIONES
+    params = []
+    
+    if producto_id:
+        query += " AND pd.producto_id = %s"
+        params.append(producto_id)
+    
+    query += " ORDER BY pd.cantidad_predicha DESC LIMIT %s"
+    params.append(limite)
+    
+    return query, params
+
+def respuesta_dashboard(por_categoria, fila_alertas, total_categorias):
+    """Totales del dashboard a partir del resumen por categoría"""
+    # MySQL devuelve las sumas como DECIMAL
+    for categoria in por_categoria:
+        for campo in ('total_productos', 'stock_bajo', 'agotados'):
+            categoria[campo] = int(categoria[campo])
+        categoria['valor_inventario'] = float(categoria['valor_inventario'])
+    
+    return {
+        'success': True,
+        'total_productos': sum(c['total_productos'] for c in por_categoria),
+        'stock_bajo': sum(c['stock_bajo'] for c in por_categoria),
+        'agotados': sum(c['agotados'] for c in por_categoria),
+        'valor_inventario': round(sum(c['valor_inventario'] for c in por_categoria), 2),
+        'total_categorias': total_categorias,
+        'alertas_no_leidas': int(fila_alertas['no_leidas']) if fila_alertas else 0,
+        'por_categoria': por_categoria
+    }
+
+def exportar_productos_ndjson(columnas, posicion):
+    """Generador NDJSON: un producto por línea, leídos por lotes con fetchmany"""
+    with db_config.connection(lectura=True) as connection:
         if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            yield current_app.json.dumps({'error': 'Error de conexión a la base de datos'}) + '\n'
+            return
+        
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        try:
+            query, params = query_productos(columnas, posicion)
+            cursor.execute(query, params)
+            
+            while True:
+                lote = cursor.fetchmany(LOTE_STREAMING_PRODUCTOS)
+                if not lote:
+                    break
+                yield ''.join(current_app.json.dumps(producto) + '\n' for producto in lote)
+        except Exception as e:
+            yield current_app.json.dumps({'error': f'Error exportando productos: {str(e)}'}) + '\n'
+        finally:
+            # Si el cliente cortó el stream quedan filas sin leer en el socket
+            if connection.unread_result:
+                connection.consume_results()
+            cursor.close()
+
+def consultar_productos(columnas, posicion, limite):
+    """Leer una página del listado (un producto de más para saber si hay otra)"""
+    with db_config.connection(lectura=True) as connection:
+        if not connection:
+            raise ConnectionError('Error de conexión a la base de datos')
         
         cursor = connection.cursor(dictionary=True)
+        query, params = query_productos(columnas, posicion, limite + 1 if limite else None)
+        cursor.execute(query, params)
+        productos = cursor.fetchall()
+        cursor.close()
         
-        query = """
-        SELECT p.*, c.nombre as categoria_nombre 
-        FROM productos p 
-        LEFT JOIN categorias c ON p.categoria_id = c.id 
-        WHERE p.activo = TRUE
-        ORDER BY p.nombre
-        """
+        return productos
+
+@api.route('/api/productos', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
+def obtener_productos():
+    """Obtener productos activos.
+
+    Parámetros opcionales:
+    - ``limit`` y ``cursor``: paginación keyset por (nombre, id)
+    - ``campos``: lista de columnas separadas por coma
+    - ``formato=ndjson``: exportación completa en streaming
+    """
+    try:
+        columnas, posicion, limite = parametros_listado(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.args.get('formato') == 'ndjson':
+        return Response(stream_with_context(exportar_productos_ndjson(columnas, posicion)),
+                        mimetype='application/x-ndjson')
+    
+    try:
+        productos = catalogo_cache.obtener(
+            'productos', ('lista', columnas, posicion, limite),
+            lambda: consultar_productos(columnas, posicion, limite)
+        )
         
-        cursor.execute(query)
-        productos = cursor.fetchall()
+        return jsonify(respuesta_listado(productos, limite))
         
-        cursor.close()
-        connection.close()
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo productos: {str(e)}'}), 500
+
+@api.route('/api/productos/buscar', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
+def buscar_productos():
+    """Buscar productos por prefijo de código o palabras del nombre/descripción"""
+    try:
+        busqueda, limite, pagina = parametros_busqueda(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if busqueda is None:
+        return jsonify({'error': 'Parámetro requerido: q'}), 400
+    
+    try:
+        with db_config.connection(lectura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            cursor = connection.cursor(dictionary=True)
+            
+            query, params = busqueda
+            cursor.execute(query, params)
+            productos = cursor.fetchall()
+            
+            cursor.close()
+        
+        hay_mas = len(productos) > limite
+        productos = productos[:limite]
         
         return jsonify({
             'success': True,
             'productos': productos,
-            'total': len(productos)
+            'total': len(productos),
+            'pagina': pagina,
+            'hay_mas': hay_mas
         })
         
     except Exception as e:
-        return jsonify({'error': f'Error obteniendo productos: {str(e)}'}), 500
+        return jsonify({'error': f'Error buscando productos: {str(e)}'}), 500
 
-@app.route('/api/productos/<int:producto_id>', methods=['GET'])
-def obtener_producto(producto_id):
-    """Obtener un producto específico por ID"""
-    try:
-        connection = db_config.get_connection()
+def consultar_producto(producto_id):
+    with db_config.connection(lectura=True) as connection:
         if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            raise ConnectionError('Error de conexión a la base de datos')
         
         cursor = connection.cursor(dictionary=True)
         
-        query = """
-        SELECT p.*, c.nombre as categoria_nombre 
-        FROM productos p 
-        LEFT JOIN categorias c ON p.categoria_id = c.id 
-        WHERE p.id = %s AND p.activo = TRUE
-        """
-        
-        cursor.execute(query, (producto_id,))
+        cursor.execute(QUERY_PRODUCTO, (producto_id,))
         producto = cursor.fetchone()
         
         cursor.close()
-        connection.close()
+        
+        return producto
+
+@api.route('/api/productos/<int:producto_id>', methods=['GET'])
+@agrupar_peticiones
+def obtener_producto(producto_id):
+    """Obtener un producto específico por ID"""
+    try:
+        producto = catalogo_cache.obtener('productos', ('detalle', producto_id),
+                                          lambda: consultar_producto(producto_id))
         
         if not producto:
             return jsonify({'error': 'Producto no encontrado'}), 404
@@ -170,22 +530,29 @@ def obtener_producto(producto_id):
     except Exception as e:
         return jsonify({'error': f'Error obteniendo producto: {str(e)}'}), 500
 
-@app.route('/api/categorias', methods=['GET'])
-def obtener_categorias():
-    """Obtener todas las categorías"""
-    try:
-        connection = db_config.get_connection()
+def consultar_categorias():
+    with db_config.connection(lectura=True) as connection:
         if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            raise ConnectionError('Error de conexión a la base de datos')
         
         cursor = connection.cursor(dictionary=True)
         
-        query = "SELECT * FROM categorias ORDER BY nombre"
-        cursor.execute(query)
+        cursor.execute(QUERY_CATEGORIAS)
         categorias = cursor.fetchall()
         
         cursor.close()
-        connection.close()
+        
+        return categorias
+
+@api.route('/api/categorias', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
+def obtener_categorias():
+    """Obtener todas las categorías"""
+    try:
+        # Las categorías casi nunca cambian: se cachean más tiempo que los productos
+        categorias = catalogo_cache.obtener('categorias', 'todas', consultar_categorias,
+                                            ttl=CACHE_TTL_CATEGORIAS)
         
         return jsonify({
             'success': True,
@@ -196,10 +563,12 @@ def obtener_categorias():
     except Exception as e:
         return jsonify({'error': f'Error obteniendo categorías: {str(e)}'}), 500
 
-@app.route('/api/productos', methods=['POST'])
+@api.route('/api/productos', methods=['POST'])
 def crear_producto():
     """Crear un nuevo producto"""
     try:
+        imagen_estado = None
+        
         # Manejar tanto JSON como form-data
         if request.is_json:
             data = request.get_json()
@@ -212,9 +581,10 @@ def crear_producto():
             if 'imagen_archivo' in request.files:
                 file = request.files['imagen_archivo']
                 if file and file.filename:
-                    uploaded_url = save_image(file)
+                    uploaded_url, estado_subida = save_image(file)
                     if uploaded_url:
                         imagen_url = uploaded_url
+                        imagen_estado = estado_subida
         
         # Validar datos requeridos
         required_fields = ['codigo', 'nombre', 'precio']
@@ -222,65 +592,125 @@ def crear_producto():
             if field not in data or not data[field]:
                 return jsonify({'error': f'Campo requerido: {field}'}), 400
         
-        connection = db_config.get_connection()
-        if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-        
-        cursor = connection.cursor()
-        
-        # Verificar si el código ya existe
-        cursor.execute("SELECT id FROM productos WHERE codigo = %s", (data['codigo'],))
-        if cursor.fetchone():
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            cursor = connection.cursor(dictionary=True)
+            
+            # Verificar si el código ya existe
+            cursor.execute("SELECT id FROM productos WHERE codigo = %s", (data['codigo'],))
+            if cursor.fetchone():
+                cursor.close()
+                return jsonify({'error': 'El código del producto ya existe'}), 400
+            
+            # Insertar nuevo producto
+            query = """
+            INSERT INTO productos (codigo, nombre, descripcion, precio, stock_actual, stock_minimo, categoria_id, imagen_url)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            
+            values = (
+                data['codigo'],
+                data['nombre'],
+                data.get('descripcion', ''),
+                float(data['precio']),
+                int(data.get('stock_actual', 0)),
+                int(data.get('stock_minimo', 5)),
+                data.get('categoria_id') if data.get('categoria_id') else None,
+                imagen_url
+            )
+            
+            cursor.execute(query, values)
+            producto_id = cursor.lastrowid
+            
+            # Evaluar alertas de stock del producto nuevo
+            generar_alertas_stock([producto_id], connection)
+            catalogo_cache.invalidar('productos')
+            
+            # Obtener el producto creado
+            cursor.execute("""
+                SELECT p.*, c.nombre as categoria_nombre 
+                FROM productos p 
+                LEFT JOIN categorias c ON p.categoria_id = c.id 
+                WHERE p.id = %s
+            """, (producto_id,))
+            
+            nuevo_producto = cursor.fetchone()
+            
             cursor.close()
-            connection.close()
-            return jsonify({'error': 'El código del producto ya existe'}), 400
-        
-        # Insertar nuevo producto
-        query = """
-        INSERT INTO productos (codigo, nombre, descripcion, precio, stock_actual, stock_minimo, categoria_id, imagen_url)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        values = (
-            data['codigo'],
-            data['nombre'],
-            data.get('descripcion', ''),
-            float(data['precio']),
-            int(data.get('stock_actual', 0)),
-            int(data.get('stock_minimo', 5)),
-            data.get('categoria_id') if data.get('categoria_id') else None,
-            imagen_url
-        )
-        
-        cursor.execute(query, values)
-        producto_id = cursor.lastrowid
-        
-        # Obtener el producto creado
-        cursor.execute("""
-            SELECT p.*, c.nombre as categoria_nombre 
-            FROM productos p 
-            LEFT JOIN categorias c ON p.categoria_id = c.id 
-            WHERE p.id = %s
-        """, (producto_id,))
-        
-        nuevo_producto = cursor.fetchone()
-        
-        cursor.close()
-        connection.close()
+            
+            return jsonify({
+                'success': True,
+                'mensaje': 'Producto creado exitosamente',
+                'producto': nuevo_producto,
+                'imagen_estado': imagen_estado
+            }), 201
+            
+    except Exception as e:
+        return jsonify({'error': f'Error creando producto: {str(e)}'}), 500
+
+@api.route('/api/productos/importar', methods=['POST'])
+def importar_productos():
+    """Importar productos desde CSV (alta o actualización por código)"""
+    try:
+        # Archivo en form-data (campo 'archivo') o CSV directamente en el cuerpo
+        if 'archivo' in request.files:
+            origen = request.files['archivo'].stream
+        else:
+            origen = request.stream
+        texto = io.TextIOWrapper(origen, encoding='utf-8-sig', newline='')
         
-        return jsonify({
-            'success': True,
-            'mensaje': 'Producto creado exitosamente',
-            'producto': nuevo_producto
-        }), 201
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            resultado = resultado_vacio()
+            try:
+                importar_csv(connection, texto, resultado=resultado)
+            except ValueError as e:
+                return jsonify({'error': f'CSV no válido: {str(e)}', 'success': False, **resultado}), 400
+            finally:
+                # Los lotes guardados antes de un error ya están confirmados
+                if resultado['guardadas']:
+                    catalogo_cache.invalidar('productos')
+                    generar_alertas_stock(connection=connection)
+        
+        if 'interrumpida' in resultado:
+            interrumpida = resultado['interrumpida']
+            return jsonify({
+                'error': f"CSV no válido (lectura detenida en la línea {interrumpida['linea']}): {interrumpida['error']}",
+                'success': False,
+                **resultado
+            }), 400
+        
+        return jsonify({'success': True, **resultado})
         
     except Exception as e:
-        return jsonify({'error': f'Error creando producto: {str(e)}'}), 500
+        return jsonify({'error': f'Error importando productos: {str(e)}'}), 500
+
+@api.route('/api/productos/exportar', methods=['GET'])
+def exportar_productos():
+    """Exportar el catálogo activo en CSV (en streaming)"""
+    connection = db_config.get_connection(lectura=True)
+    if not connection:
+        return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+    
+    response = Response(
+        stream_with_context(exportar_csv(connection)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=productos.csv'}
+    )
+    # La conexión vuelve al pool cuando termina (o se corta) la descarga
+    response.call_on_close(connection.close)
+    return response
 
-@app.route('/api/productos/<int:producto_id>', methods=['PUT'])
+@api.route('/api/productos/<int:producto_id>', methods=['PUT'])
 def actualizar_producto(producto_id):
     """Actualizar un producto existente"""
     try:
+        imagen_estado = None
+        
         # Manejar tanto JSON como form-data
         if request.is_json:
             data = request.get_json()
@@ -293,243 +723,435 @@ def actualizar_producto(producto_id):
             if 'imagen_archivo' in request.files:
                 file = request.files['imagen_archivo']
                 if file and file.filename:
-                    uploaded_url = save_image(file)
+                    uploaded_url, estado_subida = save_image(file)
                     if uploaded_url:
                         imagen_url = uploaded_url
+                        imagen_estado = estado_subida
         
-        connection = db_config.get_connection()
-        if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-        
-        cursor = connection.cursor()
-        
-        # Verificar si el producto existe
-        cursor.execute("SELECT id FROM productos WHERE id = %s", (producto_id,))
-        if not cursor.fetchone():
-            cursor.close()
-            connection.close()
-            return jsonify({'error': 'Producto no encontrado'}), 404
-        
-        # Verificar si el código ya existe en otro producto
-        if 'codigo' in data:
-            cursor.execute("SELECT id FROM productos WHERE codigo = %s AND id != %s", (data['codigo'], producto_id))
-            if cursor.fetchone():
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            cursor = connection.cursor(dictionary=True)
+            
+            # Verificar si el producto existe
+            cursor.execute("SELECT id FROM productos WHERE id = %s", (producto_id,))
+            if not cursor.fetchone():
                 cursor.close()
-                connection.close()
-                return jsonify({'error': 'El código del producto ya existe'}), 400
+                return jsonify({'error': 'Producto no encontrado'}), 404
+            
+            # Verificar si el código ya existe en otro producto
+            if 'codigo' in data:
+                cursor.execute("SELECT id FROM productos WHERE codigo = %s AND id != %s", (data['codigo'], producto_id))
+                if cursor.fetchone():
+                    cursor.close()
+                    return jsonify({'error': 'El código del producto ya existe'}), 400
+            
+            # Construir query de actualización
+            update_fields = []
+            values = []
+            
+            if 'nombre' in data:
+                update_fields.append("nombre = %s")
+                values.append(data['nombre'])
+            
+            if 'descripcion' in data:
+                update_fields.append("descripcion = %s")
+                values.append(data['descripcion'])
+            
+            if 'precio' in data:
+                update_fields.append("precio = %s")
+                values.append(float(data['precio']))
+            
+            if 'stock_actual' in data:
+                update_fields.append("stock_actual = %s")
+                values.append(int(data['stock_actual']))
+            
+            if 'stock_minimo' in data:
+                update_fields.append("stock_minimo = %s")
+                values.append(int(data['stock_minimo']))
+            
+            if 'categoria_id' in data:
+                update_fields.append("categoria_id = %s")
+                values.append(data['categoria_id'] if data['categoria_id'] else None)
+            
+            if 'imagen_url' in data or imagen_url:
+                update_fields.append("imagen_url = %s")
+                values.append(imagen_url)
+            
+            if 'codigo' in data:
+                update_fields.append("codigo = %s")
+                values.append(data['codigo'])
+            
+            if not update_fields:
+                cursor.close()
+                return jsonify({'error': 'No se proporcionaron campos para actualizar'}), 400
+            
+            # Agregar ID del producto al final
+            values.append(producto_id)
+            
+            query = f"UPDATE productos SET {', '.join(update_fields)} WHERE id = %s"
+            cursor.execute(query, values)
+            
+            # Reevaluar alertas si cambió el stock o su umbral
+            if 'stock_actual' in data or 'stock_minimo' in data:
+                generar_alertas_stock([producto_id], connection)
+            catalogo_cache.invalidar('productos')
+            
+            # Obtener el producto actualizado
+            cursor.execute("""
+                SELECT p.*, c.nombre as categoria_nombre 
+                FROM productos p 
+                LEFT JOIN categorias c ON p.categoria_id = c.id 
+                WHERE p.id = %s
+            """, (producto_id,))
+            
+            producto_actualizado = cursor.fetchone()
+            
+            cursor.close()
+            
+            return jsonify({
+                'success': True,
+                'mensaje': 'Producto actualizado exitosamente',
+                'producto': producto_actualizado,
+                'imagen_estado': imagen_estado
+            })
+            
+    except Exception as e:
+        return jsonify({'error': f'Error actualizando producto: {str(e)}'}), 500
+
+@api.route('/api/productos', methods=['PATCH'])
+def actualizar_productos_lote():
+    """Actualizar muchos productos en una transacción (lista de cambios o filtro + expresión)"""
+    try:
+        data = request.get_json(silent=True) or {}
         
-        # Construir query de actualización
-        update_fields = []
-        values = []
+        try:
+            edicion = validar_edicion(data, PRODUCTOS_LOTE_MAXIMO)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if 'nombre' in data:
-            update_fields.append("nombre = %s")
-            values.append(data['nombre'])
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            try:
+                ids, errores = aplicar_edicion(connection, edicion, db_config.motor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            if ids:
+                if edicion['campos'] & CAMPOS_ALERTAS:
+                    generar_alertas_stock(ids, connection)
+                catalogo_cache.invalidar('productos')
         
-        if 'descripcion' in data:
-            update_fields.append("descripcion = %s")
-            values.append(data['descripcion'])
+        return jsonify({
+            'success': True,
+            'actualizados': len(ids),
+            'rechazados': len(errores),
+            'ids': ids,
+            'errores': errores
+        })
         
-        if 'precio' in data:
-            update_fields.append("precio = %s")
-            values.append(float(data['precio']))
+    except Exception as e:
+        return jsonify({'error': f'Error actualizando productos: {str(e)}'}), 500
+
+@api.route('/api/movimientos', methods=['POST'])
+def registrar_movimientos_lote():
+    """Registrar un lote de movimientos de inventario (entradas, salidas y ajustes)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        movimientos = data.get('movimientos')
         
-        if 'stock_actual' in data:
-            update_fields.append("stock_actual = %s")
-            values.append(int(data['stock_actual']))
+        if not isinstance(movimientos, list) or not movimientos:
+            return jsonify({'error': 'Campo requerido: movimientos (lista no vacía)'}), 400
         
-        if 'stock_minimo' in data:
-            update_fields.append("stock_minimo = %s")
-            values.append(int(data['stock_minimo']))
+        if len(movimientos) > MOVIMIENTOS_LOTE_MAXIMO:
+            return jsonify({'error': f'El lote supera el máximo de {MOVIMIENTOS_LOTE_MAXIMO} movimientos'}), 400
         
-        if 'categoria_id' in data:
-            update_fields.append("categoria_id = %s")
-            values.append(data['categoria_id'] if data['categoria_id'] else None)
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            resultados, stock_final = registrar_movimientos(connection, movimientos)
+            
+            if stock_final:
+                generar_alertas_stock(stock_final.keys(), connection)
+                catalogo_cache.invalidar('productos')
         
-        if 'imagen_url' in data or imagen_url:
-            update_fields.append("imagen_url = %s")
-            values.append(imagen_url)
+        procesados = sum(1 for resultado in resultados if resultado['ok'])
         
-        if 'codigo' in data:
-            update_fields.append("codigo = %s")
-            values.append(data['codigo'])
+        return jsonify({
+            'success': True,
+            'procesados': procesados,
+            'rechazados': len(resultados) - procesados,
+            'resultados': resultados
+        })
         
-        if not update_fields:
-            cursor.close()
-            connection.close()
-            return jsonify({'error': 'No se proporcionaron campos para actualizar'}), 400
+    except Exception as e:
+        return jsonify({'error': f'Error registrando movimientos: {str(e)}'}), 500
+
+@api.route('/api/stock/descontar', methods=['POST'])
+def descontar_stock():
+    """Descontar el stock de un pedido de varias líneas (todo o nada, idempotente)"""
+    try:
+        data = request.get_json(silent=True) or {}
         
-        # Agregar ID del producto al final
-        values.append(producto_id)
+        try:
+            clave = validar_clave(request.headers.get('Idempotency-Key') or data.get('clave_idempotencia'))
+            pedido = validar_pedido(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        query = f"UPDATE productos SET {', '.join(update_fields)} WHERE id = %s"
-        cursor.execute(query, values)
+        if len(pedido['lineas']) > MOVIMIENTOS_LOTE_MAXIMO:
+            return jsonify({'error': f'El pedido supera el máximo de {MOVIMIENTOS_LOTE_MAXIMO} líneas'}), 400
         
-        # Obtener el producto actualizado
-        cursor.execute("""
-            SELECT p.*, c.nombre as categoria_nombre 
-            FROM productos p 
-            LEFT JOIN categorias c ON p.categoria_id = c.id 
-            WHERE p.id = %s
-        """, (producto_id,))
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            estado, datos = descontar_pedido(connection, clave, pedido)
+            
+            if estado == 'aplicado':
+                generar_alertas_stock(pedido['lineas'].keys(), connection)
+                catalogo_cache.invalidar('productos')
         
-        producto_actualizado = cursor.fetchone()
+        if estado == 'clave_en_uso':
+            return jsonify({'error': 'La clave de idempotencia ya se usó con otro pedido'}), 422
         
-        cursor.close()
-        connection.close()
+        if estado == 'rechazado':
+            return jsonify({
+                'error': 'Stock insuficiente para el pedido',
+                'success': False,
+                'lineas': datos
+            }), 409
         
         return jsonify({
             'success': True,
-            'mensaje': 'Producto actualizado exitosamente',
-            'producto': producto_actualizado
-        })
+            'repetido': estado == 'repetido',
+            **datos
+        }), 201 if estado == 'aplicado' else 200
         
     except Exception as e:
-        return jsonify({'error': f'Error actualizando producto: {str(e)}'}), 500
+        return jsonify({'error': f'Error descontando stock: {str(e)}'}), 500
 
-def generar_alertas_stock():
-    """Generar alertas automáticas de stock bajo"""
+@api.route('/api/stock/historico', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
+def obtener_stock_historico():
+    """Stock de un producto (?producto_id=) o de todo el catálogo en una fecha"""
     try:
-        connection = db_config.get_connection()
-        if not connection:
-            return False
-        
-        cursor = connection.cursor(dictionary=True)
+        fecha = interpretar_fecha(request.args.get('fecha'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    producto_id = request.args.get('producto_id', type=int)
+    
+    try:
+        with db_config.connection(lectura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            if producto_id is not None:
+                cursor = connection.cursor()
+                cursor.execute("SELECT id FROM productos WHERE id = %s", (producto_id,))
+                existe = cursor.fetchone()
+                cursor.close()
+                if not existe:
+                    return jsonify({'error': 'Producto no encontrado'}), 404
+            
+            resultado, fecha_snapshot = stock_en_fecha(connection, fecha, producto_id)
         
-        # Buscar productos con stock bajo
-        query = """
-        SELECT p.*, c.nombre as categoria_nombre 
-        FROM productos p 
-        LEFT JOIN categorias c ON p.categoria_id = c.id 
-        WHERE p.activo = TRUE AND p.stock_actual <= p.stock_minimo
-        """
+        respuesta = {
+            'success': True,
+            'fecha': fecha.isoformat(),
+            'snapshot': fecha_snapshot
+        }
+        if producto_id is not None:
+            respuesta.update(producto_id=producto_id, stock=resultado)
+        else:
+            respuesta.update(productos=resultado, total=len(resultado))
         
-        cursor.execute(query)
-        productos_stock_bajo = cursor.fetchall()
+        return jsonify(respuesta)
         
-        alertas_generadas = 0
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo stock histórico: {str(e)}'}), 500
+
+@api.route('/api/predicciones', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
+def obtener_predicciones():
+    """Obtener las predicciones de demanda más recientes"""
+    try:
+        producto_id = request.args.get('producto_id', type=int)
+        limite = min(request.args.get('limit', 100, type=int), LIMITE_MAXIMO_PRODUCTOS)
         
-        for producto in productos_stock_bajo:
-            # Verificar si ya existe una alerta reciente para este producto
-            cursor.execute("""
-                SELECT id FROM alertas 
-                WHERE producto_id = %s AND tipo_alerta = 'stock_bajo' 
-                AND fecha_alerta > DATE_SUB(NOW(), INTERVAL 1 DAY)
-            """, (producto['id'],))
+        with db_config.connection(lectura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
             
-            if not cursor.fetchone():
-                # Crear nueva alerta
-                mensaje = f"Stock bajo: {producto['nombre']} (Código: {producto['codigo']}) - Stock actual: {producto['stock_actual']}, Mínimo: {producto['stock_minimo']}"
-                
-                cursor.execute("""
-                    INSERT INTO alertas (producto_id, tipo_alerta, mensaje)
-                    VALUES (%s, 'stock_bajo', %s)
-                """, (producto['id'], mensaje))
-                
-                alertas_generadas += 1
-        
-        # Buscar productos agotados
-        query_agotados = """
-        SELECT p.*, c.nombre as categoria_nombre 
-        FROM productos p 
-        LEFT JOIN categorias c ON p.categoria_id = c.id 
-        WHERE p.activo = TRUE AND p.stock_actual = 0
-        """
-        
-        cursor.execute(query_agotados)
-        productos_agotados = cursor.fetchall()
-        
-        for producto in productos_agotados:
-            # Verificar si ya existe una alerta reciente
-            cursor.execute("""
-                SELECT id FROM alertas 
-                WHERE producto_id = %s AND tipo_alerta = 'stock_agotado' 
-                AND fecha_alerta > DATE_SUB(NOW(), INTERVAL 1 DAY)
-            """, (producto['id'],))
+            cursor = connection.cursor(dictionary=True)
             
-            if not cursor.fetchone():
-                # Crear nueva alerta
-                mensaje = f"STOCK AGOTADO: {producto['nombre']} (Código: {producto['codigo']}) - Reabastecimiento urgente requerido"
-                
-                cursor.execute("""
-                    INSERT INTO alertas (producto_id, tipo_alerta, mensaje)
-                    VALUES (%s, 'stock_agotado', %s)
-                """, (producto['id'], mensaje))
-                
-                alertas_generadas += 1
-        
-        cursor.close()
-        connection.close()
+            query, params = query_predicciones(producto_id, limite)
+            cursor.execute(query, params)
+            predicciones = cursor.fetchall()
+            
+            cursor.close()
+            
+            return jsonify({
+                'success': True,
+                'predicciones': predicciones,
+                'total': len(predicciones)
+            })
+            
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo predicciones: {str(e)}'}), 500
+
+@api.route('/api/dashboard', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
+def obtener_dashboard():
+    """Obtener las estadísticas del dashboard desde el resumen precalculado"""
+    try:
+        with db_config.connection(lectura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            cursor = connection.cursor(dictionary=True)
+            
+            cursor.execute(QUERY_DASHBOARD_CATEGORIAS)
+            por_categoria = cursor.fetchall()
+            
+            cursor.execute(QUERY_DASHBOARD_ALERTAS)
+            fila_alertas = cursor.fetchone()
+            
+            cursor.execute(QUERY_TOTAL_CATEGORIAS)
+            total_categorias = cursor.fetchone()['total']
+            
+            cursor.close()
         
-        return alertas_generadas
+        return jsonify(respuesta_dashboard(por_categoria, fila_alertas, total_categorias))
         
     except Exception as e:
-        print(f"Error generando alertas: {e}")
-        return False
+        return jsonify({'error': f'Error obteniendo dashboard: {str(e)}'}), 500
 
-@app.route('/api/alertas', methods=['GET'])
+@api.route('/api/alertas', methods=['GET'])
+@respuesta_condicional
+@agrupar_peticiones
 def obtener_alertas():
     """Obtener alertas recientes"""
     try:
-        # Generar alertas automáticas primero
-        generar_alertas_stock()
-        
-        connection = db_config.get_connection()
-        if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-        
-        cursor = connection.cursor(dictionary=True)
-        
-        # Obtener alertas de los últimos 7 días
-        query = """
-        SELECT a.*, p.nombre as producto_nombre, p.codigo as producto_codigo
-        FROM alertas a
-        JOIN productos p ON a.producto_id = p.id
-        WHERE a.fecha_alerta > DATE_SUB(NOW(), INTERVAL 7 DAY)
-        ORDER BY a.fecha_alerta DESC
-        LIMIT 20
-        """
-        
-        cursor.execute(query)
-        alertas = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
-        return jsonify({
-            'success': True,
-            'alertas': alertas,
-            'total': len(alertas)
-        })
-        
+        with db_config.connection(lectura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            cursor = connection.cursor(dictionary=True)
+            
+            cursor.execute(QUERY_ALERTAS_RECIENTES)
+            alertas = cursor.fetchall()
+            
+            cursor.close()
+            
+            return jsonify({
+                'success': True,
+                'alertas': alertas,
+                'total': len(alertas)
+            })
+            
     except Exception as e:
         return jsonify({'error': f'Error obteniendo alertas: {str(e)}'}), 500
 
-@app.route('/api/alertas/<int:alerta_id>/leer', methods=['PUT'])
+@api.route('/api/alertas/<int:alerta_id>/leer', methods=['PUT'])
 def marcar_alerta_leida(alerta_id):
     """Marcar una alerta como leída"""
     try:
-        connection = db_config.get_connection()
-        if not connection:
-            return jsonify({'error': 'Error de conexión a la base de datos'}), 500
-        
-        cursor = connection.cursor()
-        
-        cursor.execute("UPDATE alertas SET leida = TRUE WHERE id = %s", (alerta_id,))
-        
-        cursor.close()
-        connection.close()
-        
-        return jsonify({
-            'success': True,
-            'mensaje': 'Alerta marcada como leída'
-        })
-        
+        with db_config.connection(escritura=True) as connection:
+            if not connection:
+                return jsonify({'error': 'Error de conexión a la base de datos'}), 500
+            
+            cursor = connection.cursor()
+            
+            cursor.execute(QUERY_MARCAR_ALERTA, (alerta_id,))
+            
+            cursor.close()
+            
+            return jsonify({
+                'success': True,
+                'mensaje': 'Alerta marcada como leída'
+            })
+            
     except Exception as e:
         return jsonify({'error': f'Error marcando alerta: {str(e)}'}), 500
 
+@api.route('/api/eventos', methods=['GET'])
+def eventos():
+    """Flujo Server-Sent Events con los cambios de productos, stock y alertas.
+
+    EventSource se reconecta solo y envía ``Last-Event-ID``; también se
+    acepta ``?ultimo_id=``. Cada cliente ocupa un hilo del worker mientras
+    está conectado, así que se admiten como mucho ``EVENTOS_MAX_CLIENTES``
+    por worker; el frontend se conecta a la API asíncrona, donde un cliente
+    es solo una corrutina.
+    """
+    if not bus_eventos.ocupar_plaza():
+        return jsonify({
+            'error': 'Demasiados clientes de eventos en este worker; usar la API asíncrona'
+        }), 503, {'Retry-After': str(RECONEXION_MS // 1000)}
+    
+    ultimo_id = ultimo_id_solicitado(request.headers, request.args)
+    
+    response = Response(flujo_eventos(ultimo_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Evitar que nginx acumule el flujo en su buffer
+        'X-Accel-Buffering': 'no'
+    })
+    # Se libera al cerrar la respuesta, aunque el flujo no llegue a empezar
+    response.call_on_close(bus_eventos.liberar_plaza)
+    return response
+
+def crear_app(config=None):
+    """Crear y configurar la aplicación Flask.
+
+    No abre conexiones ni arranca hilos, así que se puede llamar en el
+    proceso maestro antes de crear los workers (ver backend/servidor.py).
+    """
+    app = Flask(__name__)
+    CORS(app)  # Permitir peticiones desde el frontend
+    
+    # Configuración
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'tu_clave_secreta_aqui')
+    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 5 * 1024 * 1024  # 5MB máximo
+    app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true')
+    if config:
+        app.config.update(config)
+    
+    # Asegurar que la carpeta de uploads existe
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    # Serializador JSON rápido (orjson si está instalado)
+    app.json = ProveedorJSONRapido(app)
+    
+    # Tiempos por ruta y por consulta para /api/metrics (METRICAS=0 lo desactiva)
+    carpeta = app.config['UPLOAD_FOLDER']
+    instrumentar_app(app, db_config, lambda: medidores_proceso(
+        db_config, catalogo_cache, imagenes_pendientes(carpeta), agrupador_peticiones.estadisticas()
+    ))
+    
+    # Registrado después para que su tiempo cuente en la duración de la petición
+    app.after_request(comprimir_respuesta)
+    
+    # Las escrituras descartan las lecturas agrupadas (backend/agrupacion.py)
+    app.after_request(invalidar_tras_escritura)
+    
+    app.register_blueprint(api)
+    return app
+
 if __name__ == '__main__':
+    # Servidor de desarrollo (un proceso). En producción: python backend/servidor.py
     print("🚀 Iniciando Sistema de Inventario...")
     print("📡 API disponible en: http://localhost:5000")
     print("🔗 Documentación: http://localhost:5000/")
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    programador_tareas.iniciar()
+    crear_app().run(debug=os.getenv('FLASK_DEBUG', '').lower() in ('1', 'true'),
+                    host='0.0.0.0', port=5000) 
\ No newline at end of file
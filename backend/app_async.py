@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Variante asíncrona de la API de lectura del Sistema de Inventario
+Quart + aiomysql
+
+Sirve las rutas de consulta (listado, búsqueda, detalle, categorías,
+dashboard, alertas y predicciones) sin bloquear un hilo por cada viaje a la
+base de datos: un solo proceso atiende miles de clientes concurrentes con un
+pool de ``DB_POOL_ASYNC_SIZE`` conexiones, y las consultas independientes de
+una misma petición (el dashboard) se lanzan a la vez.
+
+Las consultas, la validación de parámetros y el formato de las respuestas
+son los de ``backend/app.py``, así que el JSON es el mismo (también los
+mensajes de error de conexión). Las escrituras
+(crear/actualizar productos, imágenes, movimientos, CSV) siguen en la API
+síncrona. También sirve ``/api/eventos``: cada cliente SSE conectado es una
+corrutina en lugar de un hilo. Esta variante no usa la caché del catálogo ni
+expone /api/metrics.
+
+Uso:
+    python backend/app_async.py                       # desarrollo, puerto 5001
+    hypercorn --workers 4 --bind 0.0.0.0:5001 "backend.app_async:crear_app()"
+"""
+
+from datetime import datetime
+import asyncio
+import os
+import sys
+
+from quart import Blueprint, Quart, Response, current_app, jsonify, request
+import aiomysql
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config_async import db_config_async
+from backend.eventos import BusEventosAsync, flujo_eventos_async, ultimo_id_solicitado
+from backend.app import (
+    LIMITE_MAXIMO_PRODUCTOS, LOTE_STREAMING_PRODUCTOS, QUERY_PRODUCTO, QUERY_CATEGORIAS,
+    QUERY_DASHBOARD_CATEGORIAS, QUERY_DASHBOARD_ALERTAS, QUERY_TOTAL_CATEGORIAS,
+    QUERY_ALERTAS_RECIENTES, QUERY_MARCAR_ALERTA, query_productos, query_predicciones,
+    parametros_listado, parametros_busqueda, respuesta_listado, respuesta_dashboard
+)
+
+api = Blueprint('api', __name__)
+
+# Una sola tarea por proceso lee los eventos nuevos para todos los clientes SSE
+bus_eventos = BusEventosAsync(db_config_async.consultar)
+
+
+async def exportar_productos_ndjson(proveedor_json, columnas, posicion):
+    """Generador NDJSON leído con un cursor sin buffer del servidor.
+
+    Recibe el proveedor JSON porque el cuerpo se genera fuera del contexto
+    de la petición.
+    """
+    async with db_config_async.connection() as connection:
+        if not connection:
+            yield proveedor_json.dumps({'error': 'Error de conexión a la base de datos'}) + '\n'
+            return
+
+        cursor = await connection.cursor(aiomysql.SSDictCursor)
+        try:
+            query, params = query_productos(columnas, posicion)
+            await cursor.execute(query, params)
+
+            while True:
+                lote = await cursor.fetchmany(LOTE_STREAMING_PRODUCTOS)
+                if not lote:
+                    break
+                yield ''.join(proveedor_json.dumps(producto) + '\n' for producto in lote)
+        except Exception as e:
+            yield proveedor_json.dumps({'error': f'Error exportando productos: {str(e)}'}) + '\n'
+        finally:
+            # Cerrar un cursor sin buffer lee y descarta las filas pendientes
+            await cursor.close()
+
+
+@api.route('/api/health')
+async def health_check():
+    """Verificar el estado de la API y base de datos"""
+    try:
+        async with db_config_async.connection() as connection:
+            db_status = "conectado" if connection else "error"
+    except Exception as e:
+        db_status = f"error: {str(e)}"
+
+    return jsonify({
+        'status': 'ok',
+        'timestamp': datetime.now().isoformat(),
+        'database': db_status,
+        'pool': db_config_async.estadisticas()
+    })
+
+
+@api.route('/api/productos', methods=['GET'])
+async def obtener_productos():
+    """Obtener productos activos (mismos parámetros que la API síncrona)"""
+    try:
+        columnas, posicion, limite = parametros_listado(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('formato') == 'ndjson':
+        return Response(exportar_productos_ndjson(current_app.json, columnas, posicion),
+                        mimetype='application/x-ndjson')
+
+    try:
+        query, params = query_productos(columnas, posicion, limite + 1 if limite else None)
+        productos = await db_config_async.consultar(query, params)
+        return jsonify(respuesta_listado(productos, limite))
+
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo productos: {str(e)}'}), 500
+
+
+@api.route('/api/productos/buscar', methods=['GET'])
+async def buscar_productos():
+    """Buscar productos por prefijo de código o palabras del nombre/descripción"""
+    try:
+        busqueda, limite, pagina = parametros_busqueda(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if busqueda is None:
+        return jsonify({'error': 'Parámetro requerido: q'}), 400
+
+    try:
+        productos = await db_config_async.consultar(*busqueda)
+
+        hay_mas = len(productos) > limite
+        productos = productos[:limite]
+
+        return jsonify({
+            'success': True,
+            'productos': productos,
+            'total': len(productos),
+            'pagina': pagina,
+            'hay_mas': hay_mas
+        })
+
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': f'Error buscando productos: {str(e)}'}), 500
+
+
+@api.route('/api/productos/<int:producto_id>', methods=['GET'])
+async def obtener_producto(producto_id):
+    """Obtener un producto específico por ID"""
+    try:
+        producto = await db_config_async.consultar(QUERY_PRODUCTO, (producto_id,), uno=True)
+
+        if not producto:
+            return jsonify({'error': 'Producto no encontrado'}), 404
+
+        return jsonify({
+            'success': True,
+            'producto': producto
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo producto: {str(e)}'}), 500
+
+
+@api.route('/api/categorias', methods=['GET'])
+async def obtener_categorias():
+    """Obtener todas las categorías"""
+    try:
+        categorias = await db_config_async.consultar(QUERY_CATEGORIAS)
+
+        return jsonify({
+            'success': True,
+            'categorias': categorias,
+            'total': len(categorias)
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo categorías: {str(e)}'}), 500
+
+
+@api.route('/api/dashboard', methods=['GET'])
+async def obtener_dashboard():
+    """Estadísticas del dashboard; las tres consultas van en paralelo"""
+    try:
+        por_categoria, fila_alertas, fila_total = await asyncio.gather(
+            db_config_async.consultar(QUERY_DASHBOARD_CATEGORIAS),
+            db_config_async.consultar(QUERY_DASHBOARD_ALERTAS, uno=True),
+            db_config_async.consultar(QUERY_TOTAL_CATEGORIAS, uno=True)
+        )
+
+        return jsonify(respuesta_dashboard(list(por_categoria), fila_alertas, fila_total['total']))
+
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo dashboard: {str(e)}'}), 500
+
+
+@api.route('/api/alertas', methods=['GET'])
+async def obtener_alertas():
+    """Obtener alertas recientes"""
+    try:
+        alertas = await db_config_async.consultar(QUERY_ALERTAS_RECIENTES)
+
+        return jsonify({
+            'success': True,
+            'alertas': alertas,
+            'total': len(alertas)
+        })
+
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo alertas: {str(e)}'}), 500
+
+
+@api.route('/api/alertas/<int:alerta_id>/leer', methods=['PUT'])
+async def marcar_alerta_leida(alerta_id):
+    """Marcar una alerta como leída"""
+    try:
+        await db_config_async.ejecutar(QUERY_MARCAR_ALERTA, (alerta_id,))
+
+        return jsonify({
+            'success': True,
+            'mensaje': 'Alerta marcada como leída'
+        })
+
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': f'Error marcando alerta: {str(e)}'}), 500
+
+
+@api.route('/api/predicciones', methods=['GET'])
+async def obtener_predicciones():
+    """Obtener las predicciones de demanda más recientes"""
+    try:
+        producto_id = request.args.get('producto_id', type=int)
+        limite = min(request.args.get('limit', 100, type=int), LIMITE_MAXIMO_PRODUCTOS)
+
+        predicciones = await db_config_async.consultar(*query_predicciones(producto_id, limite))
+
+        return jsonify({
+            'success': True,
+            'predicciones': predicciones,
+            'total': len(predicciones)
+        })
+
+    except ConnectionError as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        return jsonify({'error': f'Error obteniendo predicciones: {str(e)}'}), 500
+
+
+@api.route('/api/eventos', methods=['GET'])
+async def eventos():
+    """Flujo Server-Sent Events (mismo formato que la API síncrona)"""
+    ultimo_id = ultimo_id_solicitado(request.headers, request.args)
+
+    response = Response(flujo_eventos_async(bus_eventos, ultimo_id), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Sin el límite de RESPONSE_TIMEOUT: el flujo dura lo que la conexión
+    response.timeout = None
+    return response
+
+
+async def cabeceras_cors(response):
+    # Equivalente a CORS(app) de la API síncrona
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, PUT, OPTIONS'
+    return response
+
+
+def crear_app():
+    """Crear la aplicación Quart; el pool se abre en el primer uso dentro del event loop"""
+    app = Quart(__name__)
+    app.after_request(cabeceras_cors)
+    app.after_serving(db_config_async.cerrar)
+    app.register_blueprint(api)
+    return app
+
+
+if __name__ == '__main__':
+    print("🚀 Iniciando API asíncrona del Sistema de Inventario...")
+    print("📡 API disponible en: http://localhost:5001")
+    crear_app().run(host='0.0.0.0', port=5001)
@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga de la API del Sistema de Inventario
+
+Crea (o recrea) una base de datos desechable, aplica las migraciones, la
+llena con un catálogo, movimientos y alertas sintéticos y lanza peticiones
+contra cada ruta con una concurrencia fija. Por cada ruta y nivel de
+concurrencia informa de latencia p50/p95/p99, peticiones por segundo y
+consultas SQL por petición, y guarda el resultado en JSON para comparar
+ejecuciones.
+
+Por defecto la API se levanta en este mismo proceso (servidor de Werkzeug
+con hilos); con ``--url`` se mide un servidor ya arrancado, que debe usar la
+misma base de datos (``DB_NAME``).
+
+Las consultas por petición se calculan con el contador global ``Questions``
+de MySQL, así que el servidor de MySQL no debe tener otra carga durante la
+medición. Con SQLite (``DB_MOTOR=sqlite``) la base de datos es el archivo
+``<base-datos>.sqlite3`` y no hay contador de consultas.
+
+Al final se anota la memoria: el pico de RSS de este proceso (API, cliente
+y, con SQLite, la caché de páginas) y la que usa el servidor de MySQL según
+``performance_schema``. ``--motores mysql sqlite`` repite el benchmark con
+cada motor en un proceso aparte y compara latencia y memoria.
+
+Uso:
+    python backend/benchmark_api.py --productos 10000 --concurrencia 1 8 32
+    python backend/benchmark_api.py --sin-sembrar --comparar base.json --salida nuevo.json
+    python backend/benchmark_api.py --motores mysql sqlite --concurrencia 1 8
+"""
+
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_DATOS_BENCHMARK = 'inventario_benchmark'
+LOTE_SEMILLA = 5000
+# Productos que reciben todas las ventas del escenario descontar
+PRODUCTOS_CALIENTES = 10
+PALABRAS = ['laptop', 'monitor', 'teclado', 'raton', 'cable', 'camiseta', 'pantalon',
+            'silla', 'mesa', 'lampara', 'libro', 'cuaderno', 'balon', 'raqueta',
+            'taladro', 'martillo', 'pro', 'mini', 'basico', 'premium']
+
+
+def preparar_entorno(base_datos):
+    """Apuntar la configuración a la base de datos del benchmark.
+
+    Debe llamarse antes de importar ``database.config`` o ``backend.app``,
+    que leen ``DB_NAME`` al importarse.
+    """
+    load_dotenv()
+    principal = os.getenv('DB_NAME', 'inventario_db')
+    if base_datos == principal:
+        raise SystemExit(f"❌ {base_datos} es la base de datos configurada de la aplicación; "
+                         f"el benchmark la borraría. Usa otro --base-datos")
+    os.environ['DB_NAME'] = base_datos
+    os.environ['DB_SQLITE_RUTA'] = os.path.abspath(f'{base_datos}.sqlite3')
+
+
+# ---------------------------------------------------------------------------
+# Datos sintéticos
+# ---------------------------------------------------------------------------
+
+def recrear_base_datos(db_config):
+    """Borrar y crear la base de datos del benchmark con todas las migraciones"""
+    if db_config.motor == 'sqlite':
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(db_config.sqlite_ruta + sufijo):
+                os.remove(db_config.sqlite_ruta + sufijo)
+        # Al conectar se crea el esquema
+        db_config.conectar().close()
+        return
+
+    import mysql.connector
+    from database.migrar import aplicar_migraciones
+
+    connection = mysql.connector.connect(
+        host=db_config.host,
+        user=db_config.user,
+        password=db_config.password,
+        port=db_config.port
+    )
+    cursor = connection.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{db_config.database}`")
+    cursor.execute(f"CREATE DATABASE `{db_config.database}`")
+    cursor.close()
+    connection.close()
+
+    connection = db_config.conectar()
+    try:
+        aplicar_migraciones(connection)
+    finally:
+        connection.close()
+
+
+def _insertar_por_lotes(connection, sentencia, filas):
+    cursor = connection.cursor()
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE_SEMILLA:
+            cursor.executemany(sentencia, lote)
+            lote = []
+    if lote:
+        cursor.executemany(sentencia, lote)
+    cursor.close()
+
+
+def sembrar(db_config, productos, movimientos, alertas, semilla):
+    """Llenar la base de datos con datos sintéticos reproducibles"""
+    rng = random.Random(semilla)
+    ahora = datetime.now()
+
+    connection = db_config.conectar()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT id FROM categorias")
+        categorias = [categoria_id for (categoria_id,) in cursor.fetchall()]
+        cursor.close()
+
+        def filas_productos():
+            for n in range(productos):
+                nombre = ' '.join(rng.choice(PALABRAS) for _ in range(3))
+                yield (f'BENCH{n:07d}', f'{nombre.capitalize()} {n}', f'Producto sintético {nombre}',
+                       round(rng.uniform(1, 2000), 2), rng.randint(0, 200), rng.randint(0, 20),
+                       rng.choice(categorias))
+
+        _insertar_por_lotes(connection, """
+            INSERT INTO productos (codigo, nombre, descripcion, precio, stock_actual,
+                                   stock_minimo, categoria_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, filas_productos())
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT MIN(id), MAX(id) FROM productos")
+        primero, ultimo = cursor.fetchone()
+        cursor.close()
+
+        def filas_movimientos():
+            for _ in range(movimientos):
+                yield (rng.randint(primero, ultimo), rng.choice(['entrada', 'salida', 'ajuste']),
+                       rng.randint(1, 50), 'benchmark',
+                       ahora - timedelta(seconds=rng.randint(0, 90 * 86400)))
+
+        _insertar_por_lotes(connection, """
+            INSERT INTO movimientos_inventario (producto_id, tipo_movimiento, cantidad, motivo,
+                                                fecha_movimiento)
+            VALUES (%s, %s, %s, %s, %s)
+        """, filas_movimientos())
+
+        def filas_alertas():
+            for _ in range(alertas):
+                yield (rng.randint(primero, ultimo), rng.choice(['stock_bajo', 'stock_agotado']),
+                       'Alerta sintética del benchmark', rng.random() < 0.5,
+                       ahora - timedelta(seconds=rng.randint(0, 14 * 86400)))
+
+        _insertar_por_lotes(connection, """
+            INSERT INTO alertas (producto_id, tipo_alerta, mensaje, leida, fecha_alerta)
+            VALUES (%s, %s, %s, %s, %s)
+        """, filas_alertas())
+
+        cursor = connection.cursor()
+        # Stock de sobra para que las ventas del benchmark no se agoten
+        cursor.execute("UPDATE productos SET stock_actual = 1000000 WHERE id < %s",
+                       (primero + PRODUCTOS_CALIENTES,))
+        cursor.execute("ANALYZE TABLE productos, movimientos_inventario, alertas")
+        cursor.fetchall()
+        cursor.close()
+
+        return primero, ultimo
+    finally:
+        connection.close()
+
+
+def rango_productos(db_config):
+    connection = db_config.conectar()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT MIN(id), MAX(id) FROM productos WHERE activo = TRUE")
+        primero, ultimo = cursor.fetchone()
+        cursor.close()
+    finally:
+        connection.close()
+
+    if primero is None:
+        raise SystemExit("❌ La base de datos no tiene productos; ejecuta sin --sin-sembrar")
+    return primero, ultimo
+
+
+# ---------------------------------------------------------------------------
+# Escenarios
+# ---------------------------------------------------------------------------
+
+def escenarios(primero, ultimo):
+    """Ruta -> función (rng, n) que devuelve (método, path, cuerpo JSON o None)"""
+    ejecucion = datetime.now().strftime('%Y%m%d%H%M%S')
+    # Los códigos nuevos no se pueden repetir entre niveles de concurrencia
+    codigos = itertools.count()
+
+    return {
+        'health': lambda rng, n: ('GET', '/api/health', None),
+        'listado': lambda rng, n: ('GET', '/api/productos?limit=50', None),
+        'detalle': lambda rng, n: ('GET', f'/api/productos/{rng.randint(primero, ultimo)}', None),
+        'crear': lambda rng, n: ('POST', '/api/productos', {
+            'codigo': f'BN{ejecucion}{next(codigos):07d}',
+            'nombre': f'Producto benchmark {n}',
+            'precio': round(rng.uniform(1, 2000), 2),
+            'stock_actual': rng.randint(0, 100)
+        }),
+        'actualizar': lambda rng, n: ('PUT', f'/api/productos/{rng.randint(primero, ultimo)}', {
+            'stock_actual': rng.randint(0, 200)
+        }),
+        'alertas': lambda rng, n: ('GET', '/api/alertas', None),
+        # Ventas concurrentes sobre pocos productos (filas calientes)
+        'descontar': lambda rng, n: ('POST', '/api/stock/descontar', {
+            'clave_idempotencia': f'BN{ejecucion}-{next(codigos)}',
+            'lineas': [{'producto_id': primero + rng.randrange(PRODUCTOS_CALIENTES), 'cantidad': 1}]
+        }),
+    }
+
+
+class Cliente:
+    """Conexión HTTP keep-alive por hilo"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._local = threading.local()
+
+    def _conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self._local.conexion = conexion
+        return conexion
+
+    def peticion(self, metodo, path, cuerpo):
+        """Retorna (segundos, código de estado)"""
+        headers = {}
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        inicio = time.perf_counter()
+        try:
+            conexion = self._conexion()
+            conexion.request(metodo, path, body=datos, headers=headers)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            estado = respuesta.status
+        except (OSError, http.client.HTTPException):
+            self._local.conexion = None
+            estado = None
+        return time.perf_counter() - inicio, estado
+
+
+def contador_consultas(db_config):
+    """Valor actual del contador global de sentencias de MySQL (None con SQLite)"""
+    if db_config.motor == 'sqlite':
+        return None
+
+    connection = db_config.conectar()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        valor = int(cursor.fetchone()[1])
+        cursor.close()
+        return valor
+    finally:
+        connection.close()
+
+
+def percentil(ordenados, p):
+    """Percentil por el método del rango más cercano"""
+    if not ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def medir_ruta(cliente, generador, concurrencia, peticiones, calentamiento, semilla, db_config):
+    contador = itertools.count()
+    locales = threading.local()
+
+    def ejecutar(_):
+        rng = getattr(locales, 'rng', None)
+        if rng is None:
+            rng = locales.rng = random.Random(f'{semilla}-{threading.get_ident()}')
+        return cliente.peticion(*generador(rng, next(contador)))
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        list(executor.map(ejecutar, range(calentamiento)))
+
+        consultas_antes = contador_consultas(db_config)
+        inicio = time.perf_counter()
+        medidas = list(executor.map(ejecutar, range(peticiones)))
+        duracion = time.perf_counter() - inicio
+        consultas_despues = contador_consultas(db_config)
+
+    latencias = sorted(segundos * 1000 for segundos, estado in medidas)
+    errores = sum(1 for _, estado in medidas if estado is None or estado >= 400)
+
+    return {
+        'concurrencia': concurrencia,
+        'peticiones': peticiones,
+        'errores': errores,
+        'duracion_s': round(duracion, 3),
+        'req_s': round(peticiones / duracion, 1),
+        'latencia_ms': {
+            'p50': round(percentil(latencias, 50), 2),
+            'p95': round(percentil(latencias, 95), 2),
+            'p99': round(percentil(latencias, 99), 2),
+            'media': round(sum(latencias) / len(latencias), 2),
+            'max': round(latencias[-1], 2)
+        },
+        # La propia consulta del contador suma una sentencia
+        'consultas_por_peticion': (round((consultas_despues - consultas_antes - 1) / peticiones, 2)
+                                   if consultas_antes is not None else None)
+    }
+
+
+def memoria(db_config):
+    """Memoria en MB: pico de este proceso, servidor de MySQL y archivo de SQLite"""
+    proceso = None
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KiB en Linux, bytes en macOS
+        proceso = pico / 1024 / (1024 if sys.platform == 'darwin' else 1)
+
+    servidor = archivo = None
+    if db_config.motor == 'sqlite':
+        archivo = sum(os.path.getsize(db_config.sqlite_ruta + sufijo) for sufijo in ('', '-wal')
+                      if os.path.exists(db_config.sqlite_ruta + sufijo)) / 1024 / 1024
+    else:
+        connection = db_config.conectar()
+        try:
+            cursor = connection.cursor()
+            # Memoria instrumentada del servidor, incluido el buffer pool de InnoDB
+            cursor.execute("""
+                SELECT SUM(CURRENT_NUMBER_OF_BYTES_USED)
+                FROM performance_schema.memory_summary_global_by_event_name
+            """)
+            valor = cursor.fetchone()[0]
+            servidor = float(valor) / 1024 / 1024 if valor is not None else None
+            cursor.close()
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la memoria del servidor de MySQL: {e}")
+        finally:
+            connection.close()
+
+    return {
+        'proceso_mb': round(proceso, 1) if proceso is not None else None,
+        'servidor_mb': round(servidor, 1) if servidor is not None else None,
+        'archivo_mb': round(archivo, 1) if archivo is not None else None
+    }
+
+
+# ---------------------------------------------------------------------------
+# Servidor y comparación
+# ---------------------------------------------------------------------------
+
+def iniciar_servidor():
+    """Levantar la API en un hilo; retorna (host, puerto, servidor)"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from backend.app import crear_app
+
+    class ManejadorKeepAlive(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    servidor = make_server('127.0.0.1', 0, crear_app(), threaded=True,
+                           request_handler=ManejadorKeepAlive)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return '127.0.0.1', servidor.server_port, servidor
+
+
+def comparar(anterior, actual, tolerancia):
+    """Imprimir la variación frente a otra ejecución; retorna True si hay regresiones"""
+    previos = {(r['ruta'], r['concurrencia']): r for r in anterior['resultados']}
+    regresiones = False
+
+    print(f"\n{'ruta':>12} {'conc.':>6} {'p95 antes':>10} {'p95 ahora':>10} {'req/s antes':>12} {'req/s ahora':>12}")
+    for resultado in actual['resultados']:
+        previo = previos.get((resultado['ruta'], resultado['concurrencia']))
+        if not previo:
+            continue
+
+        p95_antes, p95_ahora = previo['latencia_ms']['p95'], resultado['latencia_ms']['p95']
+        rps_antes, rps_ahora = previo['req_s'], resultado['req_s']
+        peor = p95_ahora > p95_antes * (1 + tolerancia) or rps_ahora < rps_antes * (1 - tolerancia)
+        regresiones = regresiones or peor
+
+        marca = '❌' if peor else '✅'
+        print(f"{resultado['ruta']:>12} {resultado['concurrencia']:>6} {p95_antes:10.2f} "
+              f"{p95_ahora:10.2f} {rps_antes:12.1f} {rps_ahora:12.1f} {marca}")
+
+    return regresiones
+
+
+def comparar_motores(args, argumentos):
+    """Ejecutar el benchmark con cada motor en un proceso aparte e imprimir ambos lado a lado"""
+    informes = {}
+    base, extension = os.path.splitext(args.salida)
+    for motor in args.motores:
+        salida = f'{base}_{motor}{extension}'
+        print(f"\n{'=' * 20} DB_MOTOR={motor} {'=' * 20}")
+        proceso = subprocess.run([sys.executable, os.path.abspath(__file__), *argumentos, '--salida', salida],
+                                 env={**os.environ, 'DB_MOTOR': motor})
+        if proceso.returncode != 0:
+            raise SystemExit(f"❌ El benchmark con {motor} terminó con código {proceso.returncode}")
+        with open(salida, 'r', encoding='utf-8') as archivo:
+            informes[motor] = json.load(archivo)
+
+    motores = list(informes)
+    por_motor = {motor: {(r['ruta'], r['concurrencia']): r for r in informe['resultados']}
+                 for motor, informe in informes.items()}
+
+    print(f"\n{'ruta':>12} {'conc.':>6}" + ''.join(f" {f'p50 {m}':>12} {f'p95 {m}':>12} {f'req/s {m}':>12}"
+                                             for m in motores))
+    for clave in por_motor[motores[0]]:
+        columnas = ''
+        for motor in motores:
+            resultado = por_motor[motor].get(clave)
+            if resultado is None:
+                columnas += f" {'-':>12} {'-':>12} {'-':>12}"
+                continue
+            latencia = resultado['latencia_ms']
+            columnas += f" {latencia['p50']:12.2f} {latencia['p95']:12.2f} {resultado['req_s']:12.1f}"
+        print(f"{clave[0]:>12} {clave[1]:>6}{columnas}")
+
+    print(f"\n{'memoria (MB)':>12}" + ''.join(f" {m:>12}" for m in motores))
+    for campo, nombre in (('proceso_mb', 'proceso'), ('servidor_mb', 'servidor'), ('archivo_mb', 'archivo')):
+        valores = [informes[m]['memoria'].get(campo) for m in motores]
+        print(f"{nombre:>12}" + ''.join(f" {valor if valor is not None else '-':>12}" for valor in valores))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga de la API')
+    parser.add_argument('--base-datos', default=BASE_DATOS_BENCHMARK,
+                        help='Base de datos desechable (se borra y se recrea)')
+    parser.add_argument('--sin-sembrar', action='store_true',
+                        help='Reutilizar la base de datos de una ejecución anterior')
+    parser.add_argument('--productos', type=int, default=10000)
+    parser.add_argument('--movimientos', type=int, default=100000)
+    parser.add_argument('--alertas', type=int, default=5000)
+    parser.add_argument('--rutas', nargs='+', help='Rutas a medir (por defecto todas)')
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--peticiones', type=int, default=500, help='Peticiones por ruta y nivel')
+    parser.add_argument('--calentamiento', type=int, default=20)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--url', help='Medir un servidor ya arrancado en lugar del proceso local')
+    parser.add_argument('--salida', default='benchmark_api.json')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.10,
+                        help='Empeoramiento relativo de p95 o req/s que cuenta como regresión')
+    parser.add_argument('--motores', nargs='+', choices=['mysql', 'sqlite'],
+                        help='Repetir el benchmark con cada motor y comparar latencia y memoria')
+    args = parser.parse_args()
+
+    if args.motores:
+        # El resto de argumentos se pasan tal cual a cada ejecución
+        argumentos = []
+        omitir = False
+        for argumento in sys.argv[1:]:
+            if argumento.startswith('--'):
+                omitir = argumento in ('--motores', '--salida', '--comparar')
+            if not omitir:
+                argumentos.append(argumento)
+        comparar_motores(args, argumentos)
+        return
+
+    preparar_entorno(args.base_datos)
+    from database.config import db_config
+
+    if args.sin_sembrar:
+        primero, ultimo = rango_productos(db_config)
+    else:
+        print(f"🗄️ Recreando {args.base_datos}...")
+        recrear_base_datos(db_config)
+        print(f"🌱 Sembrando {args.productos} productos, {args.movimientos} movimientos, "
+              f"{args.alertas} alertas...")
+        primero, ultimo = sembrar(db_config, args.productos, args.movimientos,
+                                  args.alertas, args.semilla)
+
+    if args.url:
+        partes = urlsplit(args.url)
+        host, port = partes.hostname, partes.port or 80
+    else:
+        host, port, servidor = iniciar_servidor()
+
+    todas = escenarios(primero, ultimo)
+    rutas = args.rutas or list(todas)
+    desconocidas = [ruta for ruta in rutas if ruta not in todas]
+    if desconocidas:
+        raise SystemExit(f"❌ Rutas desconocidas: {', '.join(desconocidas)}. "
+                         f"Disponibles: {', '.join(todas)}")
+
+    cliente = Cliente(host, port)
+    resultados = []
+
+    print(f"\n{'ruta':>12} {'conc.':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'SQL/pet.':>9} {'errores':>8}   (DB_MOTOR={db_config.motor})")
+    for ruta in rutas:
+        for concurrencia in args.concurrencia:
+            resultado = medir_ruta(cliente, todas[ruta], concurrencia, args.peticiones,
+                                   args.calentamiento, args.semilla, db_config)
+            resultado['ruta'] = ruta
+            resultados.append(resultado)
+
+            latencia = resultado['latencia_ms']
+            consultas = resultado['consultas_por_peticion']
+            print(f"{ruta:>12} {concurrencia:>6} {resultado['req_s']:9.1f} {latencia['p50']:8.2f} "
+                  f"{latencia['p95']:8.2f} {latencia['p99']:8.2f} "
+                  f"{consultas if consultas is not None else '-':>9} {resultado['errores']:8}")
+
+    if not args.url:
+        servidor.shutdown()
+
+    uso_memoria = memoria(db_config)
+    print(f"\n🧠 Memoria (MB): proceso {uso_memoria['proceso_mb']}, servidor MySQL "
+          f"{uso_memoria['servidor_mb']}, archivo SQLite {uso_memoria['archivo_mb']}")
+
+    informe = {
+        'fecha': datetime.now().isoformat(),
+        'configuracion': {
+            'motor': db_config.motor,
+            'base_datos': args.base_datos,
+            'sembrada': not args.sin_sembrar,
+            'productos': args.productos,
+            'movimientos': args.movimientos,
+            'alertas': args.alertas,
+            'peticiones': args.peticiones,
+            'calentamiento': args.calentamiento,
+            'semilla': args.semilla,
+            'url': args.url
+        },
+        'entorno': {
+            'python': platform.python_version(),
+            'sistema': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'memoria': uso_memoria,
+        'resultados': resultados
+    }
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        if comparar(anterior, informe, args.tolerancia):
+            print(f"\n❌ Regresión mayor del {args.tolerancia:.0%} respecto a {args.comparar}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Búsqueda de productos
+
+Combina dos accesos por índice en lugar de recorrer la tabla:
+- prefijo de ``codigo`` (rango sobre el índice UNIQUE de codigo)
+- palabras de ``nombre``/``descripcion`` (índice FULLTEXT ft_productos_busqueda)
+
+Cada rama se resuelve por separado y se unen con UNION ALL, porque un OR
+entre LIKE y MATCH impediría a MySQL usar ninguno de los dos índices.
+
+Con SQLite (``DB_MOTOR=sqlite``) la rama de palabras consulta la tabla FTS5
+``productos_fts`` y puntúa con bm25.
+"""
+
+import os
+import re
+import unicodedata
+
+# Tokens más cortos que innodb_ft_min_token_size no están en el índice
+MIN_TOKEN = int(os.getenv('BUSQUEDA_MIN_TOKEN', 3))
+MAX_TOKENS = 8
+
+FILTROS_STOCK = {
+    'bajo': 'p.stock_actual <= p.stock_minimo',
+    'agotado': 'p.stock_actual = 0',
+    'disponible': 'p.stock_actual > 0'
+}
+
+
+def quitar_acentos(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Palabras normalizadas (minúsculas, sin acentos) útiles para el índice"""
+    palabras = re.findall(r'\w+', quitar_acentos(texto).lower())
+    return [palabra for palabra in palabras if len(palabra) >= MIN_TOKEN][:MAX_TOKENS]
+
+
+def expresion_fulltext(tokens):
+    """Expresión BOOLEAN MODE: todas las palabras, cada una como prefijo"""
+    return ' '.join(f'+{token}*' for token in tokens)
+
+
+def expresion_fts5(tokens):
+    """Expresión MATCH de FTS5 con el mismo significado (AND implícito entre prefijos)"""
+    return ' '.join(f'{token}*' for token in tokens)
+
+
+def escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def construir_busqueda(q, categoria_id=None, stock=None, limite=20, offset=0, motor='mysql'):
+    """Construir la consulta de búsqueda ordenada por relevancia.
+
+    Las coincidencias por prefijo de código van primero; después, por la
+    puntuación del índice FULLTEXT. Retorna ``(query, params)`` o None si
+    ``q`` no tiene nada buscable.
+    """
+    if stock is not None and stock not in FILTROS_STOCK:
+        raise ValueError(f"stock debe ser uno de: {', '.join(FILTROS_STOCK)}")
+
+    q = q.strip()
+    tokens = tokenizar(q)
+    ramas = []
+    params = []
+
+    if q:
+        ramas.append("""
+            SELECT id, 1 AS por_codigo, 0 AS puntuacion
+            FROM productos
+            WHERE codigo LIKE %s
+        """)
+        params.append(escapar_like(q) + '%')
+
+    if tokens and motor == 'sqlite':
+        ramas.append("""
+            SELECT rowid AS id, 0 AS por_codigo, -bm25(productos_fts) AS puntuacion
+            FROM productos_fts
+            WHERE productos_fts MATCH %s
+        """)
+        params.append(expresion_fts5(tokens))
+    elif tokens:
+        expresion = expresion_fulltext(tokens)
+        ramas.append("""
+            SELECT id, 0 AS por_codigo,
+                   MATCH(nombre, descripcion) AGAINST (%s IN BOOLEAN MODE) AS puntuacion
+            FROM productos
+            WHERE MATCH(nombre, descripcion) AGAINST (%s IN BOOLEAN MODE)
+        """)
+        params.extend([expresion, expresion])
+
+    if not ramas:
+        return None
+
+    filtros = ['p.activo = TRUE']
+    if categoria_id is not None:
+        filtros.append('p.categoria_id = %s')
+        params.append(categoria_id)
+    if stock is not None:
+        filtros.append(FILTROS_STOCK[stock])
+
+    query = f"""
+    SELECT p.*, c.nombre as categoria_nombre, r.por_codigo, r.puntuacion as relevancia
+    FROM (
+        SELECT id, MAX(por_codigo) AS por_codigo, MAX(puntuacion) AS puntuacion
+        FROM ({' UNION ALL '.join(ramas)}) coincidencias
+        GROUP BY id
+    ) r
+    JOIN productos p ON p.id = r.id
+    LEFT JOIN categorias c ON p.categoria_id = c.id
+    WHERE {' AND '.join(filtros)}
+    ORDER BY r.por_codigo DESC, r.puntuacion DESC, p.nombre, p.id
+    LIMIT %s OFFSET %s
+    """
+    params.extend([limite, offset])
+
+    return query, params
@@ -0,0 +1,214 @@
+"""
+Caché de lectura del catálogo (categorías y productos)
+
+Caché en proceso con expulsión LRU + TTL, invalidación explícita por
+espacio de claves y protección contra estampidas: si varias peticiones
+piden a la vez la misma clave ausente, solo una consulta la base de datos
+y las demás esperan su resultado.
+
+Para que varios workers vean las invalidaciones de los demás se puede
+configurar un backend compartido (Redis, o ``BackendMemoria`` como sustituto
+local). En él solo se guarda un número de generación por espacio: invalidar
+lo incrementa y cada worker descarta sus entradas de generaciones anteriores.
+
+Con réplicas de lectura (``DB_REPLICAS``), lo que se carga justo después de
+una invalidación puede venir de una réplica que aún no tiene el cambio (otro
+worker escribió en el primario). Esas entradas duran solo
+``ttl_tras_invalidar`` segundos, el retraso máximo admitido en las réplicas.
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+
+from database.config import db_config
+
+
+class BackendMemoria:
+    """Backend compartido en memoria, para pruebas y despliegues de un solo proceso"""
+
+    def __init__(self):
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            return self._valores.get(clave)
+
+    def incr(self, clave):
+        with self._lock:
+            self._valores[clave] = int(self._valores.get(clave) or 0) + 1
+            return self._valores[clave]
+
+
+class BackendRedis:
+    """Backend compartido sobre Redis (requiere el paquete ``redis``)"""
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, clave):
+        return self._redis.get(clave)
+
+    def incr(self, clave):
+        return self._redis.incr(clave)
+
+
+class _Carga:
+    """Carga en curso de una clave, compartida por las peticiones que esperan"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class CacheCatalogo:
+    def __init__(self, max_entradas=1024, ttl=60, compartido=None, intervalo_sync=1.0,
+                 ttl_tras_invalidar=0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.ttl_tras_invalidar = ttl_tras_invalidar
+        self.compartido = compartido
+        self.intervalo_sync = intervalo_sync
+        self._entradas = OrderedDict()
+        self._cargas = {}
+        self._generaciones = {}
+        self._sincronizado = {}
+        self._cambiado = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+
+    def obtener(self, espacio, clave, cargar, ttl=None):
+        """Devolver el valor cacheado o calcularlo con ``cargar()`` (read-through)"""
+        ttl = self.ttl if ttl is None else ttl
+        llave = (espacio, clave)
+        generacion = self._generacion(espacio)
+
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is not None:
+                valor, expira, gen_entrada = entrada
+                if gen_entrada == generacion and expira > time.monotonic():
+                    self._entradas.move_to_end(llave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[llave]
+
+            self.fallos += 1
+            carga = self._cargas.get(llave)
+            propietario = carga is None
+            if propietario:
+                carga = self._cargas[llave] = _Carga()
+
+        if not propietario:
+            carga.evento.wait()
+            if carga.error is not None:
+                raise carga.error
+            return carga.valor
+
+        try:
+            carga.valor = cargar()
+        except Exception as e:
+            carga.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._cargas[llave]
+                if carga.error is None:
+                    if time.monotonic() - self._cambiado.get(espacio, float('-inf')) < self.ttl_tras_invalidar:
+                        ttl = min(ttl, self.ttl_tras_invalidar)
+                    self._guardar(llave, carga.valor, ttl, generacion)
+            carga.evento.set()
+
+        return carga.valor
+
+    def _guardar(self, llave, valor, ttl, generacion):
+        self._entradas[llave] = (valor, time.monotonic() + ttl, generacion)
+        self._entradas.move_to_end(llave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+            self.expulsiones += 1
+
+    def invalidar(self, espacio):
+        """Invalidar todas las entradas de un espacio, en este y en los demás workers"""
+        if self.compartido is not None:
+            try:
+                nueva = int(self.compartido.incr(f'cache:gen:{espacio}'))
+            except Exception as e:
+                print(f"Error invalidando caché compartida: {e}")
+                nueva = None
+        else:
+            nueva = None
+
+        with self._lock:
+            if nueva is None:
+                nueva = self._generaciones.get(espacio, 0) + 1
+            self._generaciones[espacio] = nueva
+            self._sincronizado[espacio] = self._cambiado[espacio] = time.monotonic()
+            self.invalidaciones += 1
+
+    def _generacion(self, espacio):
+        """Generación vigente del espacio, releída del backend compartido como mucho cada ``intervalo_sync``"""
+        if self.compartido is None:
+            return self._generaciones.get(espacio, 0)
+
+        ahora = time.monotonic()
+        if ahora - self._sincronizado.get(espacio, 0) < self.intervalo_sync:
+            return self._generaciones.get(espacio, 0)
+
+        try:
+            remota = int(self.compartido.get(f'cache:gen:{espacio}') or 0)
+        except Exception as e:
+            print(f"Error leyendo caché compartida: {e}")
+            return self._generaciones.get(espacio, 0)
+
+        with self._lock:
+            if remota != self._generaciones.get(espacio, 0):
+                self._cambiado[espacio] = ahora
+            self._generaciones[espacio] = remota
+            self._sincronizado[espacio] = ahora
+        return remota
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'expulsiones': self.expulsiones,
+                'invalidaciones': self.invalidaciones
+            }
+
+
+def crear_cache():
+    """Crear la caché del catálogo según las variables de entorno"""
+    compartido = None
+    redis_url = os.getenv('CACHE_REDIS_URL')
+    if redis_url:
+        try:
+            compartido = BackendRedis(redis_url)
+        except ImportError:
+            print("CACHE_REDIS_URL configurado pero el paquete 'redis' no está instalado")
+
+    return CacheCatalogo(
+        max_entradas=int(os.getenv('CACHE_MAX_ENTRADAS', 1024)),
+        ttl=float(os.getenv('CACHE_TTL', 60)),
+        compartido=compartido,
+        ttl_tras_invalidar=db_config.ventana_escritura if db_config.replicas_config else 0
+    )
+
+# Instancia global de la caché del catálogo
+catalogo_cache = crear_cache()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Importación y exportación del catálogo de productos en CSV
+
+La importación lee el CSV en streaming y valida las filas por lotes; cada
+lote se guarda con un único ``INSERT ... ON DUPLICATE KEY UPDATE`` (por
+``codigo``) dentro de una transacción. Si un lote falla en la base de
+datos se reintenta fila a fila para poder informar del error exacto.
+
+La exportación escribe el mismo formato, leyendo con ``fetchmany`` para
+que la memoria no dependa del tamaño del catálogo.
+
+Uso desde la línea de comandos (sin el límite de tamaño de la API):
+    python backend/catalogo_csv.py importar proveedores.csv
+    python backend/catalogo_csv.py exportar catalogo.csv
+"""
+
+from decimal import Decimal, InvalidOperation
+import argparse
+import csv
+import io
+import os
+import sys
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import db_config
+from backend.alertas import generar_alertas_stock
+from backend.cache import catalogo_cache
+
+COLUMNAS_CSV = ['codigo', 'nombre', 'descripcion', 'precio', 'stock_actual',
+                'stock_minimo', 'categoria_id', 'imagen_url']
+REQUERIDAS = ('codigo', 'nombre', 'precio')
+TAMANO_LOTE = 1000
+MAX_ERRORES = 1000
+
+QUERY_IDS_CATEGORIAS = "SELECT id FROM categorias"
+QUERY_EXPORTAR = f"""
+    SELECT {', '.join(COLUMNAS_CSV)}
+    FROM productos
+    WHERE activo = TRUE
+    ORDER BY id
+"""
+
+
+def validar_fila(fila, columnas, categorias):
+    """Convertir una fila del CSV a la tupla de valores; lanza ValueError si no es válida"""
+    for campo in REQUERIDAS:
+        if not (fila.get(campo) or '').strip():
+            raise ValueError(f'Campo requerido: {campo}')
+
+    valores = []
+    for columna in columnas:
+        valor = (fila.get(columna) or '').strip()
+
+        if columna == 'codigo' and len(valor) > 50:
+            raise ValueError('codigo supera 50 caracteres')
+        elif columna == 'nombre' and len(valor) > 200:
+            raise ValueError('nombre supera 200 caracteres')
+        elif columna == 'precio':
+            try:
+                valor = Decimal(valor)
+            except InvalidOperation:
+                raise ValueError(f'precio no es un número: {valor}')
+            if not valor.is_finite():
+                raise ValueError(f'precio no es un número: {valor}')
+            if valor < 0:
+                raise ValueError('precio no puede ser negativo')
+        elif columna in ('stock_actual', 'stock_minimo'):
+            try:
+                valor = int(valor or 0)
+            except ValueError:
+                raise ValueError(f'{columna} no es un entero: {valor}')
+        elif columna == 'categoria_id':
+            if not valor:
+                valor = None
+            else:
+                try:
+                    valor = int(valor)
+                except ValueError:
+                    raise ValueError(f'categoria_id no es un entero: {valor}')
+                if valor not in categorias:
+                    raise ValueError(f'La categoría {valor} no existe')
+
+        valores.append(valor)
+
+    return tuple(valores)
+
+
+def sentencia_upsert(columnas):
+    """``INSERT ... ON DUPLICATE KEY UPDATE`` de productos con las ``columnas`` del CSV"""
+    actualizables = [columna for columna in columnas if columna != 'codigo']
+    return f"""
+        INSERT INTO productos ({', '.join(columnas)})
+        VALUES ({', '.join(['%s'] * len(columnas))})
+        ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in actualizables)}
+    """
+
+
+def _guardar_lote(connection, sentencia, lote, resultado):
+    """Guardar un lote [(numero_fila, valores)] en una transacción"""
+    cursor = connection.cursor()
+    try:
+        try:
+            connection.start_transaction()
+            cursor.executemany(sentencia, [valores for _, valores in lote])
+            connection.commit()
+            resultado['guardadas'] += len(lote)
+            return
+        except Exception:
+            connection.rollback()
+
+        # Reintentar fila a fila: InnoDB solo deshace la sentencia que falla
+        connection.start_transaction()
+        try:
+            for numero, valores in lote:
+                try:
+                    cursor.execute(sentencia, valores)
+                    resultado['guardadas'] += 1
+                except Exception as e:
+                    _registrar_error(resultado, numero, str(e))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    finally:
+        cursor.close()
+
+
+def _registrar_error(resultado, numero, mensaje):
+    resultado['con_error'] += 1
+    if len(resultado['errores']) < MAX_ERRORES:
+        resultado['errores'].append({'fila': numero, 'error': mensaje})
+
+
+def resultado_vacio():
+    """Contadores de una importación antes de leer ninguna fila"""
+    return {'procesadas': 0, 'guardadas': 0, 'con_error': 0, 'errores': []}
+
+
+def importar_csv(connection, texto, tamano_lote=TAMANO_LOTE, resultado=None):
+    """Importar (upsert por código) un CSV leído de ``texto`` (objeto de texto).
+
+    Solo se actualizan las columnas presentes en la cabecera. Los errores
+    indican la línea del archivo (la cabecera es la línea 1).
+
+    Si el archivo se corta a medias (codificación o CSV mal formado) se
+    guardan las filas leídas hasta ese punto y ``resultado['interrumpida']``
+    indica la línea en la que se detuvo la lectura. Los lotes ya guardados
+    no se deshacen: quien pase su propio ``resultado`` puede consultar
+    ``guardadas`` aunque la importación termine con una excepción.
+    """
+    if resultado is None:
+        resultado = resultado_vacio()
+
+    lector = csv.DictReader(texto)
+    cabecera = [columna.strip() for columna in (lector.fieldnames or [])]
+    lector.fieldnames = cabecera
+
+    faltantes = [campo for campo in REQUERIDAS if campo not in cabecera]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en la cabecera: {', '.join(faltantes)}")
+
+    columnas = [columna for columna in COLUMNAS_CSV if columna in cabecera]
+    sentencia = sentencia_upsert(columnas)
+
+    cursor = connection.cursor()
+    cursor.execute(QUERY_IDS_CATEGORIAS)
+    categorias = {categoria_id for (categoria_id,) in cursor.fetchall()}
+    cursor.close()
+
+    lote = []
+
+    try:
+        for fila in lector:
+            numero = lector.line_num
+            resultado['procesadas'] += 1
+            try:
+                lote.append((numero, validar_fila(fila, columnas, categorias)))
+            except ValueError as e:
+                _registrar_error(resultado, numero, str(e))
+
+            if len(lote) >= tamano_lote:
+                _guardar_lote(connection, sentencia, lote, resultado)
+                lote = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        resultado['interrumpida'] = {'linea': lector.line_num, 'error': str(e)}
+
+    if lote:
+        _guardar_lote(connection, sentencia, lote, resultado)
+
+    return resultado
+
+
+def exportar_csv(connection, tamano_lote=TAMANO_LOTE):
+    """Generador de trozos CSV con todos los productos activos"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS_CSV)
+
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(QUERY_EXPORTAR)
+
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            escritor.writerows(
+                ['' if valor is None else valor for valor in fila] for fila in filas
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        # Si el cliente cortó la descarga quedan filas sin leer en el socket
+        if connection.unread_result:
+            connection.consume_results()
+        cursor.close()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importar o exportar el catálogo en CSV')
+    parser.add_argument('accion', choices=['importar', 'exportar'])
+    parser.add_argument('archivo', help='Ruta del CSV')
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por transacción')
+    args = parser.parse_args()
+
+    with db_config.connection() as connection:
+        if not connection:
+            print("❌ No se pudo conectar a MySQL")
+            sys.exit(1)
+
+        if args.accion == 'exportar':
+            with open(args.archivo, 'w', encoding='utf-8', newline='') as destino:
+                for trozo in exportar_csv(connection, args.lote):
+                    destino.write(trozo)
+            print(f"✅ Catálogo exportado a {args.archivo}")
+            return
+
+        resultado = resultado_vacio()
+        try:
+            with open(args.archivo, 'r', encoding='utf-8-sig', newline='') as origen:
+                importar_csv(connection, origen, args.lote, resultado)
+        finally:
+            if resultado['guardadas']:
+                catalogo_cache.invalidar('productos')
+                generar_alertas_stock(connection=connection)
+
+    print(f"✅ Filas procesadas: {resultado['procesadas']}, guardadas: {resultado['guardadas']}")
+    for error in resultado['errores']:
+        print(f"❌ Fila {error['fila']}: {error['error']}")
+    if 'interrumpida' in resultado:
+        interrumpida = resultado['interrumpida']
+        print(f"❌ Lectura detenida en la línea {interrumpida['linea']}: {interrumpida['error']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Edición masiva de productos (PATCH /api/productos)
+
+Dos formas de indicar los cambios:
+
+- ``productos``: lista de cambios parciales, cada uno con su ``id``. Los
+  elementos inválidos, de productos inexistentes o con una categoría que no
+  existe se rechazan sin afectar al resto.
+- ``filtro`` + ``cambios``: una misma expresión para todos los productos
+  que cumplen el filtro, p. ej. subir un 5% el precio de una categoría.
+
+Todo el lote va en una transacción: las filas afectadas se bloquean en
+orden de id con un ``SELECT ... FOR UPDATE`` y se actualizan con un único
+UPDATE, sin ninguna consulta por producto. En el modo lista los cambios van
+en una tabla derivada (una fila por producto) unida a ``productos`` por id;
+en el modo filtro, el UPDATE lleva el mismo filtro. Con SQLite, que limita
+los marcadores de una sentencia y no tiene viaje de red, la lista se aplica
+por bloques de ``BLOQUE_SENTENCIA`` productos.
+
+Los triggers del dashboard solo insertan filas de cambios
+(``backend/resumen.py``), así que la edición no bloquea filas compartidas
+por categoría. Si se interbloquea con otra escritura sobre los mismos
+productos, MySQL deshace la transacción y se repite como en
+``backend/movimientos.py``.
+
+``codigo`` e ``imagen_url`` no se editan en bloque: se cambian de uno en uno
+con ``PUT /api/productos/<id>``.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+import mysql.connector
+from mysql.connector import errorcode
+
+CAMPOS_EDITABLES = ('nombre', 'descripcion', 'precio', 'stock_actual', 'stock_minimo', 'categoria_id', 'activo')
+CAMPOS_NUMERICOS = ('precio', 'stock_actual', 'stock_minimo')
+# Campos que obligan a reevaluar las alertas de stock
+CAMPOS_ALERTAS = {'stock_actual', 'stock_minimo', 'activo'}
+# Campos que admiten NULL: llevan una columna que indica si el producto los cambia
+CAMPOS_NULABLES = ('descripcion', 'categoria_id')
+BLOQUE_SENTENCIA = 1000
+REINTENTOS_INTERBLOQUEO = 3
+
+
+def _entero(campo, valor, minimo=None):
+    if isinstance(valor, bool):
+        raise ValueError(f'{campo} debe ser un entero')
+    try:
+        entero = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'{campo} debe ser un entero')
+    if minimo is not None and entero < minimo:
+        raise ValueError(f'{campo} no puede ser menor que {minimo}')
+    return entero
+
+
+def _decimal(campo, valor):
+    if isinstance(valor, bool):
+        raise ValueError(f'{campo} debe ser un número')
+    try:
+        numero = Decimal(str(valor))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'{campo} debe ser un número')
+    if not numero.is_finite():
+        raise ValueError(f'{campo} debe ser un número')
+    return numero
+
+
+def validar_valor(campo, valor):
+    """Valor normalizado de ``campo``; lanza ValueError si no es válido"""
+    if campo == 'nombre':
+        if not isinstance(valor, str) or not valor.strip():
+            raise ValueError('nombre no puede estar vacío')
+        if len(valor) > 200:
+            raise ValueError('nombre admite como máximo 200 caracteres')
+        return valor
+    if campo == 'descripcion':
+        if valor is not None and not isinstance(valor, str):
+            raise ValueError('descripcion debe ser texto')
+        return valor
+    if campo == 'precio':
+        precio = _decimal(campo, valor)
+        if precio < 0:
+            raise ValueError('precio no puede ser negativo')
+        # Redondeo de MySQL al guardar en DECIMAL(10,2)
+        return precio.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    if campo in ('stock_actual', 'stock_minimo'):
+        return _entero(campo, valor, minimo=0)
+    if campo == 'categoria_id':
+        return _entero(campo, valor) if valor not in (None, '') else None
+    if campo == 'activo':
+        if not isinstance(valor, bool):
+            raise ValueError('activo debe ser true o false')
+        return valor
+    if campo in ('codigo', 'imagen_url'):
+        raise ValueError(f'{campo} no se puede editar en bloque; usa PUT /api/productos/<id>')
+    raise ValueError(f'Campo no editable: {campo}')
+
+
+def validar_cambio(item):
+    """``(producto_id, campos)`` de un elemento de ``productos``; lanza ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError('Cada cambio debe ser un objeto')
+    if 'id' not in item:
+        raise ValueError('Campo requerido: id')
+    producto_id = _entero('id', item['id'])
+
+    campos = {campo: validar_valor(campo, valor) for campo, valor in item.items() if campo != 'id'}
+    if not campos:
+        raise ValueError('No se proporcionaron campos para actualizar')
+    return producto_id, campos
+
+
+def validar_expresion(campo, valor):
+    """``(sql, params)`` de la asignación de ``campo`` en el modo filtro.
+
+    Un valor se asigna tal cual; ``{"sumar": n}`` suma (precio y stock) y
+    ``{"porcentaje": p}`` multiplica el precio por ``1 + p/100``. El
+    resultado nunca baja de 0.
+    """
+    if not isinstance(valor, dict):
+        return f"{campo} = %s", [validar_valor(campo, valor)]
+
+    if campo not in CAMPOS_NUMERICOS:
+        raise ValueError(f'{campo} solo admite un valor')
+    if len(valor) != 1:
+        raise ValueError(f'{campo}: la expresión debe ser un valor, {{"sumar": n}}'
+                         + (' o {"porcentaje": p}' if campo == 'precio' else ''))
+
+    operacion, cantidad = next(iter(valor.items()))
+    if operacion == 'sumar':
+        cantidad = _decimal(campo, cantidad) if campo == 'precio' else _entero(campo, cantidad)
+        return f"{campo} = GREATEST({campo} + %s, 0)", [cantidad]
+    if operacion == 'porcentaje' and campo == 'precio':
+        factor = 1 + _decimal('porcentaje', cantidad) / 100
+        return "precio = GREATEST(ROUND(precio * %s, 2), 0)", [factor]
+    raise ValueError(f'{campo}: operación no admitida: {operacion}')
+
+
+def construir_filtro(filtro, maximo_ids):
+    """``(where, params)`` del filtro; lanza ValueError si está vacío o no es válido"""
+    if not isinstance(filtro, dict) or not filtro:
+        raise ValueError('filtro debe ser un objeto con al menos una condición')
+
+    condiciones = []
+    params = []
+    for campo, valor in filtro.items():
+        if campo == 'categoria_id':
+            if valor in (None, ''):
+                condiciones.append("categoria_id IS NULL")
+            else:
+                condiciones.append("categoria_id = %s")
+                params.append(_entero('categoria_id', valor))
+        elif campo == 'ids':
+            if not isinstance(valor, list) or not valor:
+                raise ValueError('filtro.ids debe ser una lista no vacía')
+            if len(valor) > maximo_ids:
+                raise ValueError(f'filtro.ids admite como máximo {maximo_ids} ids')
+            condiciones.append(f"id IN ({', '.join(['%s'] * len(valor))})")
+            params.extend(_entero('id', producto_id) for producto_id in valor)
+        elif campo == 'activo':
+            if not isinstance(valor, bool):
+                raise ValueError('filtro.activo debe ser true o false')
+            condiciones.append("activo = %s")
+            params.append(valor)
+        else:
+            raise ValueError(f'Filtro no admitido: {campo} (usa categoria_id, ids o activo)')
+
+    return ' AND '.join(condiciones), params
+
+
+def validar_edicion(data, maximo):
+    """Normalizar el cuerpo de PATCH /api/productos; lanza ValueError si no es válido.
+
+    Los errores de un elemento de ``productos`` no invalidan la petición:
+    quedan en ``errores`` y se aplica el resto.
+    """
+    if 'productos' in data:
+        items = data['productos']
+        if not isinstance(items, list) or not items:
+            raise ValueError('productos debe ser una lista no vacía')
+        if len(items) > maximo:
+            raise ValueError(f'El lote supera el máximo de {maximo} productos')
+
+        cambios = {}
+        indices = {}
+        errores = []
+        for indice, item in enumerate(items):
+            try:
+                producto_id, campos = validar_cambio(item)
+            except ValueError as e:
+                errores.append({'indice': indice, 'error': str(e)})
+                continue
+            # Un id repetido acumula sus cambios; si coinciden, gana el último
+            cambios.setdefault(producto_id, {}).update(campos)
+            indices[producto_id] = indice
+
+        return {'modo': 'lista', 'cambios': cambios, 'indices': indices, 'errores': errores,
+                'campos': {campo for campos in cambios.values() for campo in campos}}
+
+    if 'filtro' in data:
+        where, params = construir_filtro(data['filtro'], maximo)
+        cambios = data.get('cambios')
+        if not isinstance(cambios, dict) or not cambios:
+            raise ValueError('cambios debe ser un objeto con al menos un campo')
+        asignaciones = [validar_expresion(campo, valor) for campo, valor in cambios.items()]
+        categoria_id = validar_valor('categoria_id', cambios['categoria_id']) if 'categoria_id' in cambios else None
+        return {'modo': 'filtro', 'where': where, 'params': params, 'asignaciones': asignaciones,
+                'categoria_id': categoria_id, 'campos': set(cambios), 'errores': [], 'maximo': maximo}
+
+    raise ValueError('Se requiere productos (lista de cambios) o filtro y cambios')
+
+
+def _bloques(valores, motor):
+    # MySQL recibe la lista completa en una sentencia (el conector sustituye los marcadores)
+    tamano = len(valores) if motor == 'mysql' else BLOQUE_SENTENCIA
+    for inicio in range(0, len(valores), tamano or 1):
+        yield valores[inicio:inicio + tamano]
+
+
+def _categorias_existentes(cursor, categoria_ids, motor):
+    existentes = set()
+    categoria_ids = sorted(categoria_ids)
+    for bloque in _bloques(categoria_ids, motor):
+        cursor.execute(f"SELECT id FROM categorias WHERE id IN ({', '.join(['%s'] * len(bloque))})", bloque)
+        existentes.update(fila[0] for fila in cursor.fetchall())
+    return existentes
+
+
+def sentencia_lista(cambios, ids, motor='mysql'):
+    """``(sql, params)`` del UPDATE que aplica los cambios de ``ids`` en una sentencia.
+
+    Cada producto es una fila de la tabla derivada ``c``. Un campo que el
+    producto no cambia va a NULL y conserva su valor; en los que admiten
+    NULL, ``cambia_<campo>`` distingue "no cambia" de "pasa a NULL".
+    """
+    campos = [campo for campo in CAMPOS_EDITABLES if any(campo in cambios[producto_id] for producto_id in ids)]
+    columnas = ['id']
+    asignaciones = []
+    for campo in campos:
+        columnas.append(f'nuevo_{campo}')
+        if campo in CAMPOS_NULABLES:
+            columnas.append(f'cambia_{campo}')
+            asignaciones.append(f"{campo} = IF(c.cambia_{campo}, c.nuevo_{campo}, p.{campo})")
+        else:
+            asignaciones.append(f"{campo} = IFNULL(c.nuevo_{campo}, p.{campo})")
+
+    params = []
+    for producto_id in ids:
+        params.append(producto_id)
+        for campo in campos:
+            params.append(cambios[producto_id].get(campo))
+            if campo in CAMPOS_NULABLES:
+                params.append(campo in cambios[producto_id])
+
+    marcadores = ', '.join(['%s'] * len(columnas))
+    if motor == 'sqlite':
+        filas = ', '.join([f'({marcadores})'] * len(ids))
+        sql = f"""
+            WITH c ({', '.join(columnas)}) AS (VALUES {filas})
+            UPDATE productos AS p SET {', '.join(asignaciones)}
+            FROM c WHERE c.id = p.id
+        """
+    else:
+        derivada = ' UNION ALL '.join(
+            ['SELECT ' + ', '.join(f'%s AS {columna}' for columna in columnas)]
+            + [f'SELECT {marcadores}'] * (len(ids) - 1)
+        )
+        sql = f"""
+            UPDATE productos p
+            JOIN ({derivada}) c ON c.id = p.id
+            SET {', '.join(asignaciones)}
+        """
+    return sql, params
+
+
+def aplicar_edicion(connection, edicion, motor='mysql'):
+    """Aplicar una edición validada en una transacción.
+
+    Retorna ``(ids, errores)``: los ids de los productos actualizados, en
+    orden, y los elementos rechazados.
+    """
+    for intento in range(REINTENTOS_INTERBLOQUEO):
+        try:
+            return _aplicar(connection, edicion, motor)
+        except mysql.connector.Error as e:
+            # Interbloqueo con otra transacción: MySQL ya deshizo esta, se repite
+            if e.errno != errorcode.ER_LOCK_DEADLOCK or intento == REINTENTOS_INTERBLOQUEO - 1:
+                raise
+
+
+def _aplicar(connection, edicion, motor):
+    cursor = connection.cursor()
+    connection.start_transaction()
+    try:
+        if edicion['modo'] == 'lista':
+            ids, errores = _aplicar_lista(cursor, edicion, motor)
+        else:
+            ids, errores = _aplicar_filtro(cursor, edicion, motor)
+        connection.commit()
+        return ids, errores
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _aplicar_lista(cursor, edicion, motor):
+    # Copia: un reintento vuelve a partir de todos los cambios
+    cambios = dict(edicion['cambios'])
+    errores = list(edicion['errores'])
+
+    def rechazar(producto_id, error):
+        errores.append({'indice': edicion['indices'][producto_id], 'id': producto_id, 'error': error})
+        del cambios[producto_id]
+
+    # Bloquear todas las filas afectadas, en orden de id
+    existentes = set()
+    for bloque in _bloques(sorted(cambios), motor):
+        cursor.execute(f"""
+            SELECT id FROM productos WHERE id IN ({', '.join(['%s'] * len(bloque))})
+            ORDER BY id
+            FOR UPDATE
+        """, bloque)
+        existentes.update(fila[0] for fila in cursor.fetchall())
+
+    categorias = {campos['categoria_id'] for campos in cambios.values() if campos.get('categoria_id') is not None}
+    categorias_existentes = _categorias_existentes(cursor, categorias, motor) if categorias else set()
+
+    for producto_id in sorted(cambios):
+        categoria_id = cambios[producto_id].get('categoria_id')
+        if producto_id not in existentes:
+            rechazar(producto_id, 'Producto no encontrado')
+        elif categoria_id is not None and categoria_id not in categorias_existentes:
+            rechazar(producto_id, f'Categoría no encontrada: {categoria_id}')
+
+    ids = sorted(cambios)
+    for bloque in _bloques(ids, motor):
+        cursor.execute(*sentencia_lista(cambios, bloque, motor))
+
+    return ids, sorted(errores, key=lambda error: error['indice'])
+
+
+def _aplicar_filtro(cursor, edicion, motor):
+    categoria_id = edicion['categoria_id']
+    if categoria_id is not None and not _categorias_existentes(cursor, {categoria_id}, motor):
+        raise ValueError(f'Categoría no encontrada: {categoria_id}')
+
+    # Uno más del máximo basta para saber si el filtro lo supera
+    maximo = edicion['maximo']
+    cursor.execute(f"SELECT id FROM productos WHERE {edicion['where']} ORDER BY id LIMIT %s FOR UPDATE",
+                   edicion['params'] + [maximo + 1])
+    ids = [fila[0] for fila in cursor.fetchall()]
+    if len(ids) > maximo:
+        raise ValueError(f'El filtro coincide con más de {maximo} productos; acótelo más')
+
+    if ids:
+        asignaciones = ', '.join(sql for sql, _ in edicion['asignaciones'])
+        params = [valor for _, valores in edicion['asignaciones'] for valor in valores]
+        cursor.execute(f"UPDATE productos SET {asignaciones} WHERE {edicion['where']}",
+                       params + edicion['params'])
+
+    return ids, []
@@ -0,0 +1,436 @@
+"""
+Eventos en tiempo real del Sistema de Inventario (Server-Sent Events)
+
+Los triggers de ``database/migraciones/005_eventos.sql`` anotan en la tabla
+``eventos`` cada producto creado o actualizado, cada cambio de stock y cada
+alerta creada o leída, venga de la API, de la importación CSV o de otro
+worker. Cada proceso tiene un único hilo (o tarea, en la API asíncrona) que
+lee los eventos nuevos cada ``EVENTOS_INTERVALO`` segundos mientras haya
+clientes conectados y los reparte a sus colas: N clientes cuestan una
+consulta por intervalo, no N.
+
+El ``id`` de cada evento SSE es el de la tabla. Un cliente que se reconecta
+con ``Last-Event-ID`` recibe primero los eventos que se perdió; si ya se
+purgaron (o son más de ``LIMITE_REENVIO``) recibe ``reiniciar`` y debe
+recargar sus listas.
+
+Los ids son AUTO_INCREMENT y se asignan al insertar, no al confirmar: una
+transacción larga (una importación CSV, un PATCH masivo) puede confirmar un
+id menor que otros ya repartidos. El bus anota cada hueco que ve en la
+secuencia y lo vuelve a leer en cada sondeo durante ``EVENTOS_ESPERA_HUECOS``
+segundos; si aparece se reparte como evento tardío (sin ``id:``, para no
+retroceder el ``Last-Event-ID`` del cliente). Pasado ese tiempo se da por
+una transacción deshecha. Si hay más de ``MAX_HUECOS`` abiertos a la vez el
+bus deja de seguirlos y envía ``reiniciar``.
+
+En la API síncrona cada cliente ocupa un hilo del worker mientras está
+conectado, así que ``BusEventos.max_clientes`` limita los clientes por
+worker (la ruta responde 503 con ``Retry-After`` al llegar al límite).
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+
+from database.config import db_config
+
+INTERVALO_SONDEO = float(os.getenv('EVENTOS_INTERVALO', 0.5))
+RETENCION_HORAS = int(os.getenv('EVENTOS_RETENCION_HORAS', 24))
+# Comentario SSE enviado sin eventos para que proxies y clientes no corten la conexión
+INTERVALO_LATIDO = 15
+RECONEXION_MS = 3000
+LIMITE_REENVIO = 1000
+TAMANO_COLA = 1000
+LOTE_PURGA = 10000
+# Segundos que se sigue esperando un id saltado; mayor que la transacción más larga
+ESPERA_HUECOS = float(os.getenv('EVENTOS_ESPERA_HUECOS', 300))
+MAX_HUECOS = 1000
+# Clientes SSE por worker de la API síncrona (0 = sin límite); servidor.py lo ajusta a los hilos
+MAX_CLIENTES = int(os.getenv('EVENTOS_MAX_CLIENTES', 0))
+
+QUERY_RANGO_EVENTOS = "SELECT COALESCE(MIN(id), 0) AS primero, COALESCE(MAX(id), 0) AS ultimo FROM eventos"
+QUERY_EVENTOS_DESDE = "SELECT id, tipo, datos FROM eventos WHERE id > %s ORDER BY id LIMIT %s"
+QUERY_EVENTOS_IDS = "SELECT id, tipo, datos FROM eventos WHERE id IN ({marcadores}) ORDER BY id"
+# El último evento no se borra nunca: MIN(id) indica así qué ids se purgaron
+QUERY_PURGAR_EVENTOS = """
+DELETE FROM eventos
+WHERE creado_en < NOW(3) - INTERVAL %s HOUR AND id < %s
+LIMIT %s
+"""
+
+
+def formatear_evento(tipo, datos, id_evento=None):
+    """Evento en formato ``text/event-stream``; ``datos`` ya es JSON de una línea"""
+    lineas = [f"id: {id_evento}"] if id_evento is not None else []
+    lineas.append(f"event: {tipo}")
+    lineas.append(f"data: {datos}")
+    return '\n'.join(lineas) + '\n\n'
+
+
+def normalizar_evento(fila):
+    # mysql-connector puede devolver las columnas JSON como bytes
+    datos = fila['datos']
+    if isinstance(datos, (bytes, bytearray)):
+        datos = datos.decode('utf-8')
+    return {'id': fila['id'], 'tipo': fila['tipo'], 'datos': datos}
+
+
+def consulta_huecos(huecos):
+    """``(query, params)`` para releer los ids saltados"""
+    return QUERY_EVENTOS_IDS.format(marcadores=', '.join(['%s'] * len(huecos))), huecos
+
+
+def punto_de_partida(rango, ultimo_id):
+    """Decidir desde qué id se sirve a un cliente nuevo.
+
+    Devuelve ``(inicio, reiniciar)``: sin ``Last-Event-ID`` se empieza por el
+    último evento; si el id es anterior al primero conservado (o posterior al
+    último, p. ej. tras recrear la base de datos) el cliente debe recargar.
+    """
+    if ultimo_id is None:
+        return rango['ultimo'], False
+    if ultimo_id < rango['primero'] - 1 or ultimo_id > rango['ultimo']:
+        return rango['ultimo'], True
+    return ultimo_id, False
+
+
+def consultar_eventos(query, params=None, uno=False):
+    """Consulta de lectura sobre la tabla de eventos en una conexión del pool"""
+    with db_config.connection() as connection:
+        if not connection:
+            raise ConnectionError('Error de conexión a la base de datos')
+
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchone() if uno else cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def purgar_eventos():
+    """Borrar los eventos más antiguos que ``EVENTOS_RETENCION_HORAS`` por lotes"""
+    try:
+        with db_config.connection() as connection:
+            if not connection:
+                return 0
+
+            cursor = connection.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM eventos")
+            ultimo = cursor.fetchone()[0]
+
+            total = 0
+            while True:
+                cursor.execute(QUERY_PURGAR_EVENTOS, (RETENCION_HORAS, ultimo, LOTE_PURGA))
+                total += cursor.rowcount
+                if cursor.rowcount < LOTE_PURGA:
+                    break
+            cursor.close()
+            return total
+
+    except Exception as e:
+        print(f"Error purgando eventos: {e}")
+        return 0
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado"""
+
+    def __init__(self, cola):
+        self.cola = cola
+        # Se marca si el cliente no consume a tiempo y su cola se llena
+        self.desbordada = False
+
+
+class BusEventos:
+    """Reparte los eventos de la tabla a los clientes SSE de este proceso (hilos)"""
+
+    def __init__(self, intervalo=INTERVALO_SONDEO, max_clientes=MAX_CLIENTES):
+        self.intervalo = intervalo
+        self.max_clientes = max_clientes
+        self.espera_huecos = ESPERA_HUECOS
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._ultimo_id = None
+        # id saltado -> momento en que se vio el hueco
+        self._huecos = {}
+        self._plazas = 0
+        self._rechazados = 0
+
+    def ocupar_plaza(self):
+        """Reservar una plaza para un cliente nuevo; False si el worker está al límite"""
+        with self._lock:
+            if self.max_clientes and self._plazas >= self.max_clientes:
+                self._rechazados += 1
+                return False
+            self._plazas += 1
+            return True
+
+    def liberar_plaza(self):
+        with self._lock:
+            self._plazas = max(self._plazas - 1, 0)
+
+    def suscribir(self, desde):
+        """Registrar un cliente; el hilo arranca con el primero y para sin clientes"""
+        suscripcion = Suscripcion(queue.Queue(TAMANO_COLA))
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+            if self._hilo is None:
+                self._iniciar_desde(desde)
+                self._hilo = threading.Thread(target=self._ejecutar, name='bus-eventos', daemon=True)
+                self._hilo.start()
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def clientes(self):
+        return len(self._suscripciones)
+
+    def estadisticas(self):
+        return {
+            'clientes': self.clientes(),
+            'max_clientes': self.max_clientes,
+            'rechazados': self._rechazados,
+            'huecos_abiertos': len(self._huecos)
+        }
+
+    def _iniciar_desde(self, desde):
+        self._ultimo_id = desde
+        self._huecos = {}
+
+    def _huecos_pendientes(self):
+        """Ids saltados que se siguen esperando; olvida los que superan ``espera_huecos``"""
+        ahora = time.monotonic()
+        for id_evento in [i for i, visto in self._huecos.items() if ahora - visto > self.espera_huecos]:
+            del self._huecos[id_evento]
+        return sorted(self._huecos)
+
+    def _procesar(self, filas, rellenos):
+        """Eventos a repartir de las filas nuevas y de los huecos rellenados.
+
+        Anota los ids que faltan entre las filas nuevas como huecos.
+        """
+        eventos = []
+        for fila in rellenos:
+            if self._huecos.pop(fila['id'], None) is not None:
+                evento = normalizar_evento(fila)
+                evento['tardio'] = True
+                eventos.append(evento)
+
+        ahora = time.monotonic()
+        desbordado = False
+        esperado = self._ultimo_id + 1
+        for fila in filas:
+            if fila['id'] > esperado:
+                if len(self._huecos) + fila['id'] - esperado > MAX_HUECOS:
+                    desbordado = True
+                else:
+                    self._huecos.update(dict.fromkeys(range(esperado, fila['id']), ahora))
+            esperado = fila['id'] + 1
+            eventos.append(normalizar_evento(fila))
+        if filas:
+            self._ultimo_id = filas[-1]['id']
+
+        if desbordado:
+            # Demasiados huecos para seguirlos: los clientes recargan sus listas
+            self._huecos.clear()
+            eventos.append({'id': None, 'tipo': 'reiniciar', 'datos': '{}'})
+        return eventos
+
+    def _repartir(self, eventos, suscripciones):
+        for evento in eventos:
+            for suscripcion in suscripciones:
+                if suscripcion.desbordada:
+                    continue
+                try:
+                    suscripcion.cola.put_nowait(evento)
+                except (queue.Full, asyncio.QueueFull):
+                    # Se le cierra el flujo; al reconectar se pone al día con Last-Event-ID
+                    suscripcion.desbordada = True
+                    self.cancelar(suscripcion)
+
+    def _ejecutar(self):
+        while True:
+            with self._lock:
+                if not self._suscripciones:
+                    self._hilo = None
+                    return
+                suscripciones = list(self._suscripciones)
+
+            huecos = self._huecos_pendientes()
+            try:
+                rellenos = consultar_eventos(*consulta_huecos(huecos)) if huecos else []
+                filas = consultar_eventos(QUERY_EVENTOS_DESDE, (self._ultimo_id, TAMANO_COLA))
+            except Exception as e:
+                print(f"Error leyendo eventos: {e}")
+                rellenos, filas = [], []
+
+            eventos = self._procesar(filas, rellenos)
+            if eventos:
+                self._repartir(eventos, suscripciones)
+            # Con un lote completo puede haber más eventos pendientes
+            if len(filas) < TAMANO_COLA:
+                time.sleep(self.intervalo)
+
+
+class BusEventosAsync(BusEventos):
+    """Variante del bus para la API asíncrona: una tarea del event loop y colas asyncio"""
+
+    def __init__(self, consultar, intervalo=INTERVALO_SONDEO):
+        # Un cliente es una corrutina, no un hilo: sin límite de clientes
+        super().__init__(intervalo, max_clientes=0)
+        self.consultar = consultar
+        self._tarea = None
+
+    def suscribir(self, desde):
+        suscripcion = Suscripcion(asyncio.Queue(TAMANO_COLA))
+        self._suscripciones.add(suscripcion)
+        if self._tarea is None:
+            self._iniciar_desde(desde)
+            self._tarea = asyncio.get_running_loop().create_task(self._ejecutar())
+        return suscripcion
+
+    async def _ejecutar(self):
+        while self._suscripciones:
+            huecos = self._huecos_pendientes()
+            try:
+                rellenos = await self.consultar(*consulta_huecos(huecos)) if huecos else []
+                filas = await self.consultar(QUERY_EVENTOS_DESDE, (self._ultimo_id, TAMANO_COLA))
+            except Exception as e:
+                print(f"Error leyendo eventos: {e}")
+                rellenos, filas = [], []
+
+            eventos = self._procesar(filas, rellenos)
+            if eventos:
+                self._repartir(eventos, list(self._suscripciones))
+            if len(filas) < TAMANO_COLA:
+                await asyncio.sleep(self.intervalo)
+        self._tarea = None
+
+
+def eventos_iniciales(rango, ultimo_id, pendientes):
+    """Mensajes SSE que recibe un cliente al conectarse, el último id enviado y los ids reenviados.
+
+    ``pendientes`` son los eventos posteriores al punto de partida leídos
+    después de suscribirse, para no perder los que lleguen entretanto.
+    """
+    inicio, reiniciar = punto_de_partida(rango, ultimo_id)
+    mensajes = [f"retry: {RECONEXION_MS}\n\n"]
+
+    if len(pendientes) > LIMITE_REENVIO:
+        reiniciar, pendientes = True, []
+        inicio = max(inicio, rango['ultimo'])
+
+    if reiniciar:
+        mensajes.append(formatear_evento('reiniciar', '{}', inicio))
+    else:
+        mensajes.append(formatear_evento('conectado', '{}', inicio))
+
+    enviado = inicio
+    reenviados = set()
+    for evento in map(normalizar_evento, pendientes):
+        mensajes.append(formatear_evento(evento['tipo'], evento['datos'], evento['id']))
+        enviado = evento['id']
+        reenviados.add(evento['id'])
+    return mensajes, enviado, reenviados
+
+
+def mensaje_del_bus(evento, enviado, reenviados):
+    """Mensaje SSE de un evento del bus (o None si el cliente ya lo tiene) y el nuevo último id"""
+    if evento['id'] is None:
+        return formatear_evento(evento['tipo'], evento['datos']), enviado
+    if evento.get('tardio'):
+        # Sin id: el Last-Event-ID del cliente no retrocede
+        if evento['id'] in reenviados:
+            return None, enviado
+        return formatear_evento(evento['tipo'], evento['datos']), enviado
+    # Los que ya llegaron con el reenvío inicial se descartan
+    if evento['id'] <= enviado:
+        return None, enviado
+    return formatear_evento(evento['tipo'], evento['datos'], evento['id']), evento['id']
+
+
+def flujo_eventos(ultimo_id=None, bus=None):
+    """Generador ``text/event-stream`` para la API síncrona"""
+    bus = bus or bus_eventos
+    try:
+        rango = consultar_eventos(QUERY_RANGO_EVENTOS, uno=True)
+    except Exception as e:
+        yield formatear_evento('error', json.dumps({'error': f'Error leyendo eventos: {str(e)}'}))
+        return
+
+    inicio, _ = punto_de_partida(rango, ultimo_id)
+    suscripcion = bus.suscribir(inicio)
+    try:
+        try:
+            pendientes = consultar_eventos(QUERY_EVENTOS_DESDE, (inicio, LIMITE_REENVIO + 1))
+        except Exception as e:
+            yield formatear_evento('error', json.dumps({'error': f'Error leyendo eventos: {str(e)}'}))
+            return
+
+        mensajes, enviado, reenviados = eventos_iniciales(rango, ultimo_id, pendientes)
+        yield ''.join(mensajes)
+
+        while not (suscripcion.desbordada and suscripcion.cola.empty()):
+            try:
+                evento = suscripcion.cola.get(timeout=INTERVALO_LATIDO)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            mensaje, enviado = mensaje_del_bus(evento, enviado, reenviados)
+            if mensaje:
+                yield mensaje
+    finally:
+        bus.cancelar(suscripcion)
+
+
+async def flujo_eventos_async(bus, ultimo_id=None):
+    """Generador ``text/event-stream`` para la API asíncrona"""
+    try:
+        rango = await bus.consultar(QUERY_RANGO_EVENTOS, uno=True)
+    except Exception as e:
+        yield formatear_evento('error', json.dumps({'error': f'Error leyendo eventos: {str(e)}'}))
+        return
+
+    inicio, _ = punto_de_partida(rango, ultimo_id)
+    suscripcion = bus.suscribir(inicio)
+    try:
+        try:
+            pendientes = await bus.consultar(QUERY_EVENTOS_DESDE, (inicio, LIMITE_REENVIO + 1))
+        except Exception as e:
+            yield formatear_evento('error', json.dumps({'error': f'Error leyendo eventos: {str(e)}'}))
+            return
+
+        mensajes, enviado, reenviados = eventos_iniciales(rango, ultimo_id, pendientes)
+        yield ''.join(mensajes)
+
+        while not (suscripcion.desbordada and suscripcion.cola.empty()):
+            try:
+                evento = await asyncio.wait_for(suscripcion.cola.get(), INTERVALO_LATIDO)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            mensaje, enviado = mensaje_del_bus(evento, enviado, reenviados)
+            if mensaje:
+                yield mensaje
+    finally:
+        bus.cancelar(suscripcion)
+
+
+def ultimo_id_solicitado(cabeceras, args):
+    """``Last-Event-ID`` (reconexión automática de EventSource) o ``?ultimo_id=``"""
+    valor = cabeceras.get('Last-Event-ID') or args.get('ultimo_id')
+    try:
+        return int(valor) if valor else None
+    except ValueError:
+        return None
+
+
+# Bus global de la API síncrona
+bus_eventos = BusEventos()
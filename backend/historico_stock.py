@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Stock histórico a partir de snapshots periódicos
+
+Los triggers de ``database/migraciones/007_historico_stock.sql`` anotan cada
+variación de stock en ``cambios_stock``. El stock en la fecha T es la suma
+de los cambios hasta T; en lugar de sumar toda la historia se parte del
+snapshot más cercano a T (anterior o posterior) y solo se suman o restan
+los cambios entre ambas fechas, que nunca son más de un intervalo. El coste
+de una consulta no crece con la longitud del historial.
+
+Cada snapshot es la suma de todos los cambios hasta su corte (no lee
+``productos`` ni parte del snapshot anterior). La fecha de un cambio es la
+de inicio de su sentencia, no la de su commit: una transacción larga puede
+confirmar después del corte un cambio anterior a él. Por eso el corte se
+toma ``SNAPSHOT_MARGEN_SEGUNDOS`` segundos atrás y, al crear un snapshot, se
+recalcula también el anterior, que así recoge los cambios que confirmaron
+tarde. Un cambio que confirme más de un intervalo después de su fecha solo
+queda fuera de los snapshots ya recalculados; las consultas que parten de
+un snapshot posterior o de la historia completa lo cuentan.
+
+``backend/retencion.py`` compacta los cambios más antiguos que
+``STOCK_HISTORICO_RETENCION_DIAS`` en un saldo por producto y borra los
+snapshots de antes de esa fecha, así que solo se responden fechas dentro
+del historial conservado.
+
+Uso:
+    python backend/historico_stock.py             # crear un snapshot ahora
+    python backend/historico_stock.py --listar
+"""
+
+from datetime import datetime, time as hora, timedelta
+import argparse
+import os
+import sys
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import db_config
+from backend.retencion import HISTORICO_RETENCION_DIAS
+
+INTERVALO_SNAPSHOT_HORAS = float(os.getenv('SNAPSHOT_INTERVALO_HORAS', 24))
+# Más que la transacción más larga que escriba stock (esperas de locks,
+# timeouts de las peticiones, importaciones CSV grandes)
+MARGEN_SNAPSHOT = float(os.getenv('SNAPSHOT_MARGEN_SEGUNDOS', 600))
+
+QUERY_SNAPSHOT_ANTERIOR = """
+SELECT id, fecha FROM snapshots_stock WHERE fecha <= %s ORDER BY fecha DESC LIMIT 1
+"""
+QUERY_SNAPSHOT_POSTERIOR = """
+SELECT id, fecha FROM snapshots_stock WHERE fecha > %s ORDER BY fecha LIMIT 1
+"""
+
+QUERY_STOCK_PRODUCTO = """
+SELECT
+    IFNULL((SELECT stock FROM snapshots_stock_productos
+            WHERE snapshot_id = %s AND producto_id = %s), 0)
+    + %s * IFNULL((SELECT SUM(variacion) FROM cambios_stock
+                   WHERE producto_id = %s AND fecha > %s AND fecha <= %s), 0) AS stock
+"""
+
+# Catálogo completo: productos creados hasta la fecha, con su stock
+QUERY_STOCK_CATALOGO = """
+SELECT p.id AS producto_id, p.codigo, p.nombre,
+       IFNULL(s.stock, 0) + %s * IFNULL(d.variacion, 0) AS stock
+FROM productos p
+LEFT JOIN snapshots_stock_productos s ON s.snapshot_id = %s AND s.producto_id = p.id
+LEFT JOIN (
+    SELECT producto_id, SUM(variacion) AS variacion
+    FROM cambios_stock
+    WHERE fecha > %s AND fecha <= %s
+    GROUP BY producto_id
+) d ON d.producto_id = p.id
+WHERE p.created_at <= %s
+ORDER BY p.id
+"""
+
+QUERY_CREAR_SNAPSHOT = """
+INSERT INTO snapshots_stock_productos (snapshot_id, producto_id, stock)
+SELECT %s, producto_id, SUM(variacion)
+FROM cambios_stock
+WHERE fecha <= %s
+GROUP BY producto_id
+HAVING SUM(variacion) <> 0
+"""
+QUERY_VACIAR_SNAPSHOT = "DELETE FROM snapshots_stock_productos WHERE snapshot_id = %s"
+
+# Sin snapshot previo se parte de "antes de toda la historia"
+INICIO_HISTORIA = datetime(1970, 1, 2)
+
+
+def interpretar_fecha(valor):
+    """Fecha local de ``?fecha=``; una fecha sin hora es el cierre de ese día. Lanza ValueError"""
+    if not valor:
+        raise ValueError('Parámetro requerido: fecha (AAAA-MM-DD o AAAA-MM-DDTHH:MM:SS)')
+    try:
+        fecha = datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError('fecha debe tener formato AAAA-MM-DD o AAAA-MM-DDTHH:MM:SS')
+    if len(valor) == 10:
+        fecha = datetime.combine(fecha.date(), hora.max).replace(microsecond=999000)
+    if fecha.tzinfo is not None:
+        # La base de datos guarda hora local: convertir antes de quitar la zona
+        fecha = fecha.astimezone().replace(tzinfo=None)
+    if HISTORICO_RETENCION_DIAS > 0 and fecha < datetime.now() - timedelta(days=HISTORICO_RETENCION_DIAS):
+        raise ValueError(f'Solo se conserva el historial de los últimos {HISTORICO_RETENCION_DIAS} días')
+    return fecha
+
+
+def snapshot_mas_cercano(cursor, fecha):
+    """``(snapshot_id, fecha_snapshot, signo, desde, hasta)`` para calcular el stock en ``fecha``.
+
+    Con el snapshot anterior se suman los cambios de (snapshot, fecha]; con
+    el posterior se restan los de (fecha, snapshot].
+    """
+    cursor.execute(QUERY_SNAPSHOT_ANTERIOR, (fecha,))
+    anterior = cursor.fetchone()
+    cursor.execute(QUERY_SNAPSHOT_POSTERIOR, (fecha,))
+    posterior = cursor.fetchone()
+
+    if posterior and (not anterior or posterior[1] - fecha < fecha - anterior[1]):
+        return posterior[0], posterior[1], -1, fecha, posterior[1]
+    if anterior:
+        return anterior[0], anterior[1], 1, anterior[1], fecha
+    return None, None, 1, INICIO_HISTORIA, fecha
+
+
+def stock_en_fecha(connection, fecha, producto_id=None):
+    """Stock de un producto (entero) o del catálogo (lista de dicts) en ``fecha``.
+
+    Retorna ``(resultado, fecha_snapshot)``.
+    """
+    cursor = connection.cursor()
+    snapshot_id, fecha_snapshot, signo, desde, hasta = snapshot_mas_cercano(cursor, fecha)
+    cursor.close()
+
+    if producto_id is not None:
+        cursor = connection.cursor()
+        cursor.execute(QUERY_STOCK_PRODUCTO, (snapshot_id, producto_id, signo, producto_id, desde, hasta))
+        stock = int(cursor.fetchone()[0])
+        cursor.close()
+        return stock, fecha_snapshot
+
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(QUERY_STOCK_CATALOGO, (signo, snapshot_id, desde, hasta, fecha))
+    productos = cursor.fetchall()
+    cursor.close()
+    for producto in productos:
+        producto['stock'] = int(producto['stock'])
+    return productos, fecha_snapshot
+
+
+def calcular_snapshot(cursor, snapshot_id, fecha):
+    """(Re)calcular las filas de un snapshot con todos los cambios hasta ``fecha``; retorna cuántas hay"""
+    cursor.execute(QUERY_VACIAR_SNAPSHOT, (snapshot_id,))
+    cursor.execute(QUERY_CREAR_SNAPSHOT, (snapshot_id, fecha))
+    productos = cursor.rowcount
+    cursor.execute("UPDATE snapshots_stock SET productos = %s WHERE id = %s", (productos, snapshot_id))
+    return productos
+
+
+def crear_snapshot(connection, fecha=None):
+    """Crear el snapshot de ``fecha`` (por defecto ahora menos el margen) y recalcular el anterior.
+
+    Retorna ``(snapshot_id, productos)`` o None si ya existe uno posterior.
+    """
+    if fecha is None:
+        fecha = datetime.now() - timedelta(seconds=MARGEN_SNAPSHOT)
+
+    cursor = connection.cursor()
+    # Lectura consistente sin bloquear cambios_stock: los triggers siguen escribiendo
+    connection.start_transaction(isolation_level='READ COMMITTED')
+    try:
+        cursor.execute("SELECT id, fecha FROM snapshots_stock ORDER BY fecha DESC LIMIT 1 FOR UPDATE")
+        ultimo = cursor.fetchone()
+        if ultimo and ultimo[1] >= fecha:
+            connection.rollback()
+            return None
+
+        if ultimo:
+            # Recoge los cambios con fecha anterior a su corte que confirmaron después
+            calcular_snapshot(cursor, *ultimo)
+
+        cursor.execute("INSERT INTO snapshots_stock (fecha, productos) VALUES (%s, 0)", (fecha,))
+        snapshot_id = cursor.lastrowid
+        productos = calcular_snapshot(cursor, snapshot_id, fecha)
+
+        connection.commit()
+        return snapshot_id, productos
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def snapshot_periodico():
+    """Crear un snapshot si el último tiene más de ``SNAPSHOT_INTERVALO_HORAS`` (0 lo desactiva)"""
+    if INTERVALO_SNAPSHOT_HORAS <= 0:
+        return None
+    try:
+        with db_config.connection() as connection:
+            if not connection:
+                return None
+
+            cursor = connection.cursor()
+            # Columna y no MAX(fecha): así SQLite también la devuelve como datetime
+            cursor.execute("SELECT fecha FROM snapshots_stock ORDER BY fecha DESC LIMIT 1")
+            ultimo = cursor.fetchone()
+            cursor.close()
+
+            if ultimo and datetime.now() - ultimo[0] < timedelta(hours=INTERVALO_SNAPSHOT_HORAS):
+                return None
+            return crear_snapshot(connection)
+
+    except Exception as e:
+        print(f"Error creando snapshot de stock: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snapshots del stock histórico')
+    parser.add_argument('--listar', action='store_true', help='Mostrar los snapshots existentes')
+    args = parser.parse_args()
+
+    with db_config.connection() as connection:
+        if not connection:
+            print("❌ No se pudo conectar a MySQL")
+            sys.exit(1)
+
+        if args.listar:
+            cursor = connection.cursor()
+            cursor.execute("SELECT id, fecha, productos FROM snapshots_stock ORDER BY fecha")
+            for snapshot_id, fecha, productos in cursor.fetchall():
+                print(f"{snapshot_id:>6}  {fecha}  {productos} productos con stock")
+            cursor.close()
+            return
+
+        resultado = crear_snapshot(connection)
+        if resultado is None:
+            print("ℹ️ Ya existe un snapshot más reciente")
+        else:
+            print(f"✅ Snapshot {resultado[0]} creado ({resultado[1]} productos con stock)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Procesamiento de imágenes de productos en segundo plano
+
+La petición solo guarda el archivo subido y encola el trabajo; un pool de
+procesos (para no competir por el GIL con los hilos de Flask) decodifica la
+imagen una vez y genera todas las variantes de tamaño, cada una en su
+formato original y en WebP.
+
+Los archivos se nombran por el hash SHA-256 de su contenido: subir dos
+veces la misma imagen reutiliza el archivo y sus variantes ya generadas, y
+como el contenido de una URL nunca cambia se puede cachear indefinidamente.
+
+Mientras el trabajo está pendiente existe un archivo marcador en
+``<uploads>/.pendientes``, de modo que cualquier worker del servidor puede
+consultar el estado de una imagen. El producto guarda la URL de la variante
+``detalle``; hasta que se genera, pedir una variante devuelve el original
+(ver ``original_de_variante``).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+
+from PIL import Image
+
+# Lado máximo en píxeles de cada variante. El original nunca se modifica.
+VARIANTES = {
+    'detalle': 800,
+    'lista': 300,
+    'miniatura': 150
+}
+CALIDAD = 85
+CARPETA_PENDIENTES = '.pendientes'
+TAMANO_BLOQUE = 64 * 1024
+PATRON_VARIANTE = re.compile(r'^([0-9a-f]{64})_(%s)\.\w+$' % '|'.join(VARIANTES))
+
+
+def nombre_variante(filename, variante, extension=None):
+    """Nombre de archivo de una variante"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}_{variante}{extension or ext}"
+
+
+def _marcador(carpeta, filename):
+    return os.path.join(carpeta, CARPETA_PENDIENTES, filename)
+
+
+def _guardar(img, ruta, **opciones):
+    """Guardar de forma atómica para no servir nunca un archivo a medio escribir"""
+    temporal = f"{ruta}.tmp"
+    img.save(temporal, **opciones)
+    os.replace(temporal, ruta)
+
+
+def procesar_imagen(carpeta, filename):
+    """Generar todas las variantes de una imagen con una sola decodificación.
+
+    Se ejecuta en un proceso del pool; retorna la lista de archivos creados.
+    """
+    ruta = os.path.join(carpeta, filename)
+    creados = []
+
+    try:
+        with Image.open(ruta) as original:
+            formato = original.format
+            original.load()
+            actual = original
+
+            # De mayor a menor: cada variante se reduce a partir de la anterior
+            for variante, lado in VARIANTES.items():
+                if actual.width > lado or actual.height > lado:
+                    actual = actual.copy()
+                    actual.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+
+                destino = os.path.join(carpeta, nombre_variante(filename, variante))
+                _guardar(actual, destino, format=formato, quality=CALIDAD, optimize=True)
+                creados.append(destino)
+
+                destino_webp = os.path.join(carpeta, nombre_variante(filename, variante, '.webp'))
+                _guardar(actual, destino_webp, format='WEBP', quality=CALIDAD, method=4)
+                creados.append(destino_webp)
+    except Exception as e:
+        print(f"Error optimizando imagen {filename}: {e}")
+    finally:
+        try:
+            os.remove(_marcador(carpeta, filename))
+        except FileNotFoundError:
+            pass
+
+    return creados
+
+
+class ProcesadorImagenes:
+    """Pool de procesos para optimizar imágenes fuera del hilo de la petición"""
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _obtener_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # 'spawn' evita heredar hilos y sockets del servidor al hacer fork
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+
+    def encolar(self, carpeta, filename):
+        """Marcar la imagen como pendiente y enviarla al pool"""
+        os.makedirs(os.path.join(carpeta, CARPETA_PENDIENTES), exist_ok=True)
+        open(_marcador(carpeta, filename), 'w').close()
+
+        try:
+            return self._obtener_pool().submit(procesar_imagen, carpeta, filename)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # Pool caído o cerrado: recrearlo para la próxima y procesar aquí
+            print(f"Pool de imágenes no disponible ({e}), procesando en línea")
+            with self._lock:
+                self._pool = None
+            procesar_imagen(carpeta, filename)
+            return None
+
+    def apagar(self, esperar=True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=esperar)
+
+
+def guardar_por_contenido(stream, carpeta, extension):
+    """Guardar un archivo subido con nombre ``<sha256>.<extension>``.
+
+    El hash se calcula mientras se escribe, en un solo paso por los datos.
+    Retorna ``(filename, nuevo)``; ``nuevo`` es False si ya existía.
+    """
+    resumen = hashlib.sha256()
+    temporal = os.path.join(carpeta, f".subida-{os.getpid()}-{threading.get_ident()}.tmp")
+
+    try:
+        with open(temporal, 'wb') as destino:
+            while True:
+                bloque = stream.read(TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                resumen.update(bloque)
+                destino.write(bloque)
+
+        filename = f"{resumen.hexdigest()}.{extension}"
+        ruta = os.path.join(carpeta, filename)
+        if os.path.exists(ruta):
+            return filename, False
+
+        os.replace(temporal, ruta)
+        return filename, True
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def original_de_variante(carpeta, filename, extensiones):
+    """Nombre del original de ``filename`` si es una variante, o None"""
+    coincidencia = PATRON_VARIANTE.match(filename)
+    if not coincidencia:
+        return None
+    for extension in extensiones:
+        original = f"{coincidencia.group(1)}.{extension}"
+        if os.path.exists(os.path.join(carpeta, original)):
+            return original
+    return None
+
+
+def imagenes_pendientes(carpeta):
+    """Número de imágenes encoladas que aún no se han procesado"""
+    try:
+        return len(os.listdir(os.path.join(carpeta, CARPETA_PENDIENTES)))
+    except FileNotFoundError:
+        return 0
+
+
+def estado_imagen(carpeta, filename):
+    """Estado de una imagen subida y URLs de las variantes disponibles"""
+    if not os.path.exists(os.path.join(carpeta, filename)):
+        return None
+
+    if os.path.exists(_marcador(carpeta, filename)):
+        return {'estado': 'pendiente', 'variantes': {}}
+
+    variantes = {}
+    for variante in VARIANTES:
+        for extension in (None, '.webp'):
+            nombre = nombre_variante(filename, variante, extension)
+            if os.path.exists(os.path.join(carpeta, nombre)):
+                clave = variante if extension is None else f"{variante}_webp"
+                variantes[clave] = f"/uploads/{nombre}"
+
+    return {'estado': 'lista', 'variantes': variantes}
+
+
+workers_imagenes = os.getenv('IMAGENES_WORKERS')
+procesador_imagenes = ProcesadorImagenes(int(workers_imagenes) if workers_imagenes else None)
@@ -0,0 +1,643 @@
+"""
+Métricas de la API en formato Prometheus
+
+Mide cada petición por ruta y desglosa su tiempo en fases: espera de una
+conexión del pool (``db_espera``), sentencias SQL (``sql``), serialización
+JSON (``json``), compresión (``compresion``) e imágenes (``imagen``). Las
+consultas se miden con el cursor instrumentado de ``database.config``. Las
+lentas se cuentan por huella (el SQL sin valores, con las listas ``IN`` y
+``CASE`` colapsadas) y ruta, de modo que las series no crecen con cada
+consulta; las muestras con su SQL se sirven en JSON desde
+``/api/metrics/consultas-lentas``. Al exportar se añaden el estado del pool,
+de las réplicas de lectura, de la caché y de la agrupación de peticiones.
+
+Con ``METRICAS=0`` no se registra ningún hook: los cursores son los de
+mysql-connector sin envolver y el coste es nulo.
+
+Variables de entorno:
+- ``METRICAS``: 1 (por defecto) o 0
+- ``METRICAS_CONSULTA_LENTA_MS``: umbral para guardar una consulta lenta (100)
+- ``METRICAS_MUESTRAS_LENTAS``: consultas lentas que se conservan (20)
+- ``LOG_PETICIONES_LENTAS_MS``: si es > 0, las peticiones más lentas se
+  escriben en stderr como una línea JSON
+- ``METRICAS_DIR``: carpeta compartida por los workers de un mismo servidor
+  (ver ``AgregadorMetricas``); ``backend/servidor.py`` usa una temporal si
+  no se indica
+
+Con varios workers cada uno tiene su propio registro. Para que cualquier
+worker que atienda ``/api/metrics`` exporte los totales del servidor, cada
+uno vuelca cada segundo su registro y sus medidores en ``METRICAS_DIR`` y la
+exportación suma los volcados: los contadores y los histogramas de todos los
+workers, también de los que ya terminaron (al reciclarse un worker sus
+totales pasan a ``acumulado.json``, de modo que los contadores nunca bajan),
+y los medidores del momento (pool, caché...) de cada worker vivo con la
+etiqueta ``pid``.
+"""
+
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo el servidor de desarrollo, sin agregación
+    fcntl = None
+
+from flask import g, request
+
+from backend.serializacion import ProveedorJSONRapido
+
+METRICAS_ACTIVAS = os.getenv('METRICAS', '1').lower() not in ('0', 'false', 'no')
+CONSULTA_LENTA_MS = float(os.getenv('METRICAS_CONSULTA_LENTA_MS', 100))
+MUESTRAS_LENTAS = int(os.getenv('METRICAS_MUESTRAS_LENTAS', 20))
+PETICION_LENTA_MS = float(os.getenv('LOG_PETICIONES_LENTAS_MS', 0))
+
+# Límites de los histogramas, en segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FASES = ('db_espera', 'sql', 'json', 'compresion', 'imagen')
+TIPOS_CONSULTA = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+MAX_SQL_MUESTRA = 300
+METRICAS_DIR = os.getenv('METRICAS_DIR')
+INTERVALO_VOLCADO = 1.0
+# Un volcado sin renovar durante este tiempo es de un worker que ya no existe
+VIDA_VOLCADO = 5 * INTERVALO_VOLCADO
+ARCHIVO_ACUMULADO = 'acumulado.json'
+
+AYUDA = {
+    'inventario_peticiones_total': ('counter', 'Peticiones atendidas'),
+    'inventario_peticion_duracion_segundos': ('histogram', 'Duración de las peticiones'),
+    'inventario_peticion_fase_segundos_total': ('counter', 'Tiempo de las peticiones por fase'),
+    'inventario_peticion_consultas_total': ('counter', 'Sentencias SQL ejecutadas por las peticiones'),
+    'inventario_consultas_total': ('counter', 'Sentencias SQL ejecutadas'),
+    'inventario_consulta_duracion_segundos': ('histogram', 'Duración de las sentencias SQL'),
+    'inventario_consultas_lentas_total': ('counter', 'Sentencias SQL por encima del umbral, por huella'),
+    'inventario_consulta_lenta_segundos_total': ('counter', 'Tiempo de las sentencias SQL lentas, por huella'),
+    'inventario_pool_espera_segundos': ('histogram', 'Espera para obtener una conexión del pool'),
+}
+
+# Fases de la petición en curso (por hilo); None fuera de una petición
+_local = threading.local()
+
+
+class Histograma:
+    def __init__(self):
+        self.cuentas = [0] * (len(BUCKETS) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect_left(BUCKETS, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class RegistroMetricas:
+    """Contadores, histogramas y consultas lentas, seguros entre hilos"""
+
+    def __init__(self, muestras_lentas=MUESTRAS_LENTAS):
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+        self.consultas_lentas = deque(maxlen=muestras_lentas)
+
+    def incrementar(self, nombre, etiquetas=(), valor=1):
+        clave = (nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, etiquetas, valor):
+        clave = (nombre, etiquetas)
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma()
+            histograma.observar(valor)
+
+    def consulta_lenta(self, sql, segundos, ruta):
+        huella = huella_sql(sql)
+        etiquetas = (('huella', huella), ('ruta', ruta or ''))
+        self.incrementar('inventario_consultas_lentas_total', etiquetas)
+        self.incrementar('inventario_consulta_lenta_segundos_total', etiquetas, segundos)
+        with self._lock:
+            self.consultas_lentas.append({
+                'huella': huella,
+                'sql': normalizar_sql(sql),
+                'ruta': ruta,
+                'segundos': round(segundos, 6),
+                'momento': time.time()
+            })
+
+    def muestras_lentas(self):
+        """Consultas lentas recientes, de la más nueva a la más antigua"""
+        with self._lock:
+            return list(reversed(self.consultas_lentas))
+
+    def instantanea(self):
+        """Copia de contadores, histogramas y consultas lentas"""
+        with self._lock:
+            return {
+                'contadores': dict(self._contadores),
+                'histogramas': {clave: (list(h.cuentas), h.suma, h.total)
+                                for clave, h in self._histogramas.items()},
+                'lentas': list(self.consultas_lentas)
+            }
+
+    def exportar(self, medidores):
+        """Texto en formato de exposición de Prometheus.
+
+        ``medidores`` es una lista de (nombre, tipo, ayuda, [(etiquetas, valor)])
+        con los valores que se leen en el momento (pool, caché...).
+        """
+        instantanea = self.instantanea()
+        return formatear(instantanea['contadores'], instantanea['histogramas'], medidores)
+
+
+def formatear(contadores, histogramas, medidores):
+    """Texto Prometheus de contadores y histogramas del registro y de los medidores"""
+    lineas = []
+    declarados = set()
+
+    def cabecera(nombre, tipo, ayuda):
+        if nombre not in declarados:
+            declarados.add(nombre)
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+
+    for (nombre, etiquetas), valor in sorted(contadores.items()):
+        cabecera(nombre, *AYUDA[nombre])
+        lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_numero(valor)}')
+
+    for (nombre, etiquetas), (cuentas, suma, total) in sorted(histogramas.items()):
+        cabecera(nombre, *AYUDA[nombre])
+        acumulado = 0
+        for limite, cuenta in zip(BUCKETS + ('+Inf',), cuentas):
+            acumulado += cuenta
+            lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", str(limite)),))} {acumulado}')
+        lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {_numero(suma)}')
+        lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {total}')
+
+    for nombre, tipo, ayuda, valores in medidores:
+        cabecera(nombre, tipo, ayuda)
+        for etiquetas, valor in valores:
+            lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_numero(valor)}')
+
+    return '\n'.join(lineas) + '\n'
+
+
+def normalizar_sql(sql):
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    return re.sub(r'\s+', ' ', sql).strip()[:MAX_SQL_MUESTRA]
+
+
+def huella_sql(sql):
+    """Identificador corto de la forma de una sentencia, sin sus valores"""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    forma = re.sub(r'\s+', ' ', sql).strip()
+    forma = re.sub(r"'(?:[^'\\]|\\.)*'", '?', forma)
+    forma = re.sub(r'%s|\b\d+(?:\.\d+)?\b', '?', forma)
+    # Listas de longitud variable: IN (...), filas de VALUES, ramas de CASE y
+    # filas de una tabla derivada (SELECT ?, ? UNION ALL SELECT ?, ? ...)
+    forma = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?+)', forma)
+    forma = re.sub(r'\(\?\+\)(?:\s*,\s*\(\?\+\))+', '(?+)', forma)
+    forma = re.sub(r'(?:WHEN \? THEN \?\s*)+', 'WHEN ? THEN ? ', forma, flags=re.IGNORECASE)
+    forma = re.sub(r'(?: UNION ALL SELECT \?(?:, \?)*)+', ' UNION ALL SELECT ?+', forma, flags=re.IGNORECASE)
+    return hashlib.sha1(forma.encode('utf-8')).hexdigest()[:12]
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def tipo_consulta(sql):
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    palabra = sql.lstrip()[:7].upper()
+    for tipo in TIPOS_CONSULTA:
+        if palabra.startswith(tipo):
+            return tipo
+    return 'OTRA'
+
+
+def _acumular(fase, segundos):
+    fases = getattr(_local, 'fases', None)
+    if fases is not None:
+        fases[fase] += segundos
+
+
+class ObservadorMetricas:
+    """Observador que ``database.config`` llama en cada consulta y conexión"""
+
+    def __init__(self, registro):
+        self.registro = registro
+
+    def consulta(self, sql, segundos):
+        tipo = (('tipo', tipo_consulta(sql)),)
+        self.registro.incrementar('inventario_consultas_total', tipo)
+        self.registro.observar('inventario_consulta_duracion_segundos', tipo, segundos)
+
+        fases = getattr(_local, 'fases', None)
+        if fases is not None:
+            fases['sql'] += segundos
+            _local.consultas += 1
+
+        if segundos * 1000 >= CONSULTA_LENTA_MS:
+            self.registro.consulta_lenta(sql, segundos, getattr(_local, 'ruta', None))
+
+    def espera_conexion(self, segundos):
+        self.registro.observar('inventario_pool_espera_segundos', (), segundos)
+        _acumular('db_espera', segundos)
+
+
+class ProveedorJSONMedido(ProveedorJSONRapido):
+    """Proveedor JSON de la API que suma el tiempo de serialización a la fase ``json``"""
+
+    def serializar(self, obj, indentar=False):
+        inicio = time.perf_counter()
+        try:
+            return super().serializar(obj, indentar)
+        finally:
+            _acumular('json', time.perf_counter() - inicio)
+
+
+def fase(nombre):
+    """Context manager que suma el tiempo del bloque a una fase de la petición"""
+    if not METRICAS_ACTIVAS:
+        return nullcontext()
+    return _medir_fase(nombre)
+
+
+@contextmanager
+def _medir_fase(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _acumular(nombre, time.perf_counter() - inicio)
+
+
+def _ruta_actual():
+    # La plantilla de la ruta, no la URL: /api/productos/<int:producto_id>
+    return request.url_rule.rule if request.url_rule else 'sin_ruta'
+
+
+def _inicio_peticion():
+    g.inicio_metricas = time.perf_counter()
+    _local.fases = dict.fromkeys(FASES, 0.0)
+    _local.consultas = 0
+    _local.ruta = _ruta_actual()
+
+
+def _fin_peticion(response):
+    inicio = g.pop('inicio_metricas', None)
+    fases = getattr(_local, 'fases', None)
+    if inicio is None or fases is None:
+        return response
+
+    duracion = time.perf_counter() - inicio
+    ruta = _local.ruta
+    consultas = _local.consultas
+    _local.fases = None
+
+    metodo = request.method
+    registro.incrementar('inventario_peticiones_total',
+                         (('metodo', metodo), ('ruta', ruta), ('estado', str(response.status_code))))
+    registro.observar('inventario_peticion_duracion_segundos', (('metodo', metodo), ('ruta', ruta)), duracion)
+    registro.incrementar('inventario_peticion_consultas_total', (('ruta', ruta),), consultas)
+    for nombre, segundos in fases.items():
+        if segundos:
+            registro.incrementar('inventario_peticion_fase_segundos_total',
+                                 (('ruta', ruta), ('fase', nombre)), segundos)
+
+    if PETICION_LENTA_MS > 0 and duracion * 1000 >= PETICION_LENTA_MS:
+        print(json.dumps({
+            'evento': 'peticion_lenta',
+            'metodo': metodo,
+            'ruta': ruta,
+            'path': request.full_path.rstrip('?'),
+            'estado': response.status_code,
+            'duracion_ms': round(duracion * 1000, 2),
+            'consultas': consultas,
+            **{f'{nombre}_ms': round(segundos * 1000, 2) for nombre, segundos in fases.items()}
+        }), file=sys.stderr, flush=True)
+
+    return response
+
+
+def _a_json(instantanea, medidores=()):
+    return {
+        'contadores': [[nombre, etiquetas, valor] for (nombre, etiquetas), valor in instantanea['contadores'].items()],
+        'histogramas': [[nombre, etiquetas, *datos] for (nombre, etiquetas), datos in instantanea['histogramas'].items()],
+        'lentas': instantanea['lentas'],
+        'medidores': [list(medidor) for medidor in medidores]
+    }
+
+
+def _etiquetas_tupla(etiquetas):
+    return tuple(tuple(par) for par in etiquetas)
+
+
+def combinar(volcados, vivos=()):
+    """Sumar volcados de workers; ``vivos`` son los índices cuyos medidores siguen vigentes.
+
+    Los medidores de tipo ``counter`` se suman como los del registro; los
+    ``gauge`` solo se exportan de los workers vivos, con la etiqueta ``pid``.
+    """
+    contadores = {}
+    histogramas = {}
+    lentas = []
+    medidores = {}
+    for indice, volcado in enumerate(volcados):
+        for nombre, etiquetas, valor in volcado['contadores']:
+            clave = (nombre, _etiquetas_tupla(etiquetas))
+            contadores[clave] = contadores.get(clave, 0) + valor
+        for nombre, etiquetas, cuentas, suma, total in volcado['histogramas']:
+            clave = (nombre, _etiquetas_tupla(etiquetas))
+            previo = histogramas.get(clave)
+            if previo is not None:
+                cuentas = [a + b for a, b in zip(previo[0], cuentas)]
+                suma, total = previo[1] + suma, previo[2] + total
+            histogramas[clave] = (list(cuentas), suma, total)
+        lentas.extend(volcado['lentas'])
+
+        for nombre, tipo, ayuda, valores in volcado['medidores']:
+            if tipo == 'gauge' and indice not in vivos:
+                continue
+            serie = medidores.setdefault(nombre, (tipo, ayuda, {}))[2]
+            for etiquetas, valor in valores:
+                etiquetas = _etiquetas_tupla(etiquetas)
+                if tipo == 'gauge':
+                    etiquetas += (('pid', str(volcado['pid'])),)
+                serie[etiquetas] = serie.get(etiquetas, 0) + valor
+
+    lentas.sort(key=lambda muestra: muestra['momento'])
+    return {
+        'contadores': contadores,
+        'histogramas': histogramas,
+        'lentas': lentas[-MUESTRAS_LENTAS:],
+        'medidores': [(nombre, tipo, ayuda, sorted(serie.items()))
+                      for nombre, (tipo, ayuda, serie) in medidores.items()]
+    }
+
+
+class AgregadorMetricas:
+    """Volcado periódico del registro de cada worker en una carpeta compartida y su suma al exportar.
+
+    Cada worker escribe ``<pid>.json`` de forma atómica. Al terminar (o al
+    exportar, si un worker murió sin despedirse) su volcado se suma a
+    ``acumulado.json`` con un lock de archivo y se borra, así que la carpeta
+    no crece con los reciclados.
+    """
+
+    def __init__(self, registro, directorio=None):
+        self.registro = registro
+        self.directorio = directorio
+        # Función que devuelve los medidores del momento de este worker
+        self.medidores = None
+        self._hilo = None
+        self._parar = threading.Event()
+
+    @property
+    def activo(self):
+        return bool(self.directorio) and fcntl is not None
+
+    def preparar(self, directorio):
+        """Usar ``directorio`` y vaciarlo de volcados de una ejecución anterior (proceso maestro)"""
+        os.makedirs(directorio, exist_ok=True)
+        for ruta in glob.glob(os.path.join(directorio, '*.json')):
+            os.remove(ruta)
+        self.directorio = directorio
+
+    def iniciar(self):
+        """Arrancar el hilo de volcado del worker (tras el fork)"""
+        if not self.activo:
+            return
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name='volcado-metricas', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Parar el hilo y pasar los totales de este worker a ``acumulado.json``"""
+        if not self.activo:
+            return
+        self._parar.set()
+        # Un volcado en curso recrearía <pid>.json después de acumularlo
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        try:
+            with self._bloqueo():
+                self._acumular([self._ruta(os.getpid())], [self._volcado()])
+        except Exception as e:
+            print(f"Error guardando métricas del worker: {e}")
+
+    def _ejecutar(self):
+        while not self._parar.wait(INTERVALO_VOLCADO):
+            try:
+                self.volcar()
+            except Exception as e:
+                print(f"Error volcando métricas: {e}")
+
+    def _ruta(self, pid):
+        return os.path.join(self.directorio, f'{pid}.json')
+
+    def _volcado(self, medidores=None):
+        if medidores is None:
+            medidores = self.medidores() if self.medidores else []
+        datos = _a_json(self.registro.instantanea(), medidores)
+        datos['pid'] = os.getpid()
+        return datos
+
+    def volcar(self, medidores=None):
+        """Escribir el volcado de este worker (nada si ya se detuvo y sus totales están acumulados)"""
+        ruta = self._ruta(os.getpid())
+        temporal = f'{ruta}.tmp'
+        datos = self._volcado(medidores)
+        # Con el lock: _acumular no puede borrar el archivo a medio reemplazar
+        with self._bloqueo():
+            if self._parar.is_set():
+                return
+            with open(temporal, 'w') as archivo:
+                json.dump(datos, archivo)
+            os.replace(temporal, ruta)
+
+    def _bloqueo(self):
+        return _BloqueoArchivo(os.path.join(self.directorio, '.lock'))
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta) as archivo:
+                return json.load(archivo)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _acumular(self, rutas, volcados):
+        """Sumar ``volcados`` a ``acumulado.json`` y borrar sus archivos (con el lock tomado)"""
+        ruta_acumulado = os.path.join(self.directorio, ARCHIVO_ACUMULADO)
+        previo = self._leer(ruta_acumulado)
+        combinado = combinar(([previo] if previo else []) + volcados)
+        datos = _a_json(combinado, [m for m in combinado['medidores'] if m[1] == 'counter'])
+        datos['pid'] = None
+        temporal = f'{ruta_acumulado}.tmp'
+        with open(temporal, 'w') as archivo:
+            json.dump(datos, archivo)
+        os.replace(temporal, ruta_acumulado)
+        for ruta in rutas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    def leer(self, medidores):
+        """Suma de los volcados de todos los workers, con el de este worker al día"""
+        self.volcar(medidores)
+        ahora = time.time()
+        with self._bloqueo():
+            volcados, vivos, muertos = [], set(), []
+            for ruta in glob.glob(os.path.join(self.directorio, '*.json')):
+                volcado = self._leer(ruta)
+                if volcado is None:
+                    continue
+                if volcado['pid'] is not None and ahora - os.path.getmtime(ruta) > VIDA_VOLCADO \
+                        and not _proceso_vivo(volcado['pid']):
+                    muertos.append((ruta, volcado))
+                    continue
+                if volcado['pid'] is not None:
+                    vivos.add(len(volcados))
+                volcados.append(volcado)
+
+            if muertos:
+                # Workers terminados sin despedirse (p. ej. por timeout)
+                self._acumular([ruta for ruta, _ in muertos], [volcado for _, volcado in muertos])
+                volcados = [v for v in volcados if v['pid'] is not None]
+                vivos = set(range(len(volcados)))
+                volcados.append(self._leer(os.path.join(self.directorio, ARCHIVO_ACUMULADO)))
+        return combinar(volcados, vivos)
+
+    def exportar(self, medidores):
+        combinado = self.leer(medidores)
+        return formatear(combinado['contadores'], combinado['histogramas'], combinado['medidores'])
+
+    def muestras_lentas(self):
+        return list(reversed(self.leer(None)['lentas']))
+
+
+class _BloqueoArchivo:
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def __enter__(self):
+        self._archivo = open(self.ruta, 'a')
+        fcntl.flock(self._archivo, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._archivo, fcntl.LOCK_UN)
+        self._archivo.close()
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def instrumentar_app(app, db_config, medidores=None):
+    """Registrar los hooks de medición en la app y en la base de datos.
+
+    ``medidores`` es una función sin argumentos con los medidores del
+    momento del proceso (ver ``medidores_proceso``).
+    """
+    if not METRICAS_ACTIVAS:
+        return
+
+    agregador.medidores = medidores
+    app.json = ProveedorJSONMedido(app)
+    app.before_request(_inicio_peticion)
+    app.after_request(_fin_peticion)
+    db_config.instrumentar(ObservadorMetricas(registro))
+
+
+def medidores_proceso(db_config, cache, pendientes_imagenes=None, agrupacion=None):
+    """Medidores con el estado actual del proceso: pool, réplicas, caché, agrupación e imágenes"""
+    pool = db_config.pool.estadisticas()
+    estadisticas_cache = cache.estadisticas()
+
+    medidores = [
+        ('inventario_pool_conexiones', 'gauge', 'Conexiones del pool por estado',
+         [((('estado', estado),), pool[estado]) for estado in ('abiertas', 'libres', 'en_uso')]),
+        ('inventario_pool_tamano', 'gauge', 'Tamaño máximo del pool', [((), pool['tamano'])]),
+        ('inventario_cache_entradas', 'gauge', 'Entradas en la caché del catálogo',
+         [((), estadisticas_cache['entradas'])]),
+        ('inventario_cache_aciertos_total', 'counter', 'Aciertos de la caché',
+         [((), estadisticas_cache['aciertos'])]),
+        ('inventario_cache_fallos_total', 'counter', 'Fallos de la caché',
+         [((), estadisticas_cache['fallos'])]),
+        ('inventario_cache_expulsiones_total', 'counter', 'Entradas expulsadas por LRU',
+         [((), estadisticas_cache['expulsiones'])]),
+        ('inventario_cache_invalidaciones_total', 'counter', 'Invalidaciones de la caché',
+         [((), estadisticas_cache['invalidaciones'])]),
+    ]
+    replicas = db_config.estado_replicas()
+    if replicas:
+        medidores += [
+            ('inventario_replica_disponible', 'gauge', 'Réplica de lectura en servicio (1) o expulsada (0)',
+             [((('replica', r['replica']),), int(r['disponible'])) for r in replicas]),
+            ('inventario_replica_retraso_segundos', 'gauge', 'Último retraso de replicación medido',
+             [((('replica', r['replica']),), r['retraso']) for r in replicas if r['retraso'] is not None]),
+            ('inventario_replica_conexiones_en_uso', 'gauge', 'Conexiones en uso del pool de cada réplica',
+             [((('replica', r['replica']),), r['en_uso']) for r in replicas]),
+        ]
+    if agrupacion is not None:
+        medidores += [
+            ('inventario_agrupacion_ejecuciones_total', 'counter',
+             'Ejecuciones de las vistas de lectura agrupables',
+             [((('ruta', ruta),), total) for ruta, total in agrupacion['ejecutadas'].items()]),
+            ('inventario_agrupacion_agrupadas_total', 'counter',
+             'Peticiones servidas con la respuesta de otra idéntica, sin ejecutar la vista',
+             [((('ruta', ruta),), total) for ruta, total in agrupacion['agrupadas'].items()]),
+        ]
+    if pendientes_imagenes is not None:
+        medidores.append(('inventario_imagenes_pendientes', 'gauge',
+                          'Imágenes pendientes de optimizar', [((), pendientes_imagenes)]))
+    return medidores
+
+
+def exportar_metricas():
+    """Texto Prometheus con las métricas acumuladas y el estado actual (de todos los workers si se agregan)"""
+    medidores = agregador.medidores() if agregador.medidores else []
+    if agregador.activo:
+        return agregador.exportar(medidores)
+    return registro.exportar(medidores)
+
+
+def muestras_lentas():
+    """Consultas lentas recientes (de todos los workers si se agregan)"""
+    if agregador.activo:
+        return agregador.muestras_lentas()
+    return registro.muestras_lentas()
+
+
+registro = RegistroMetricas()
+agregador = AgregadorMetricas(registro, METRICAS_DIR)
@@ -0,0 +1,163 @@
+"""
+Registro de movimientos de inventario por lotes
+
+Cada lote se aplica en una sola transacción: se bloquean a la vez las
+filas de los productos afectados, se validan los movimientos en orden,
+se insertan con ``executemany`` en ``movimientos_inventario`` y se
+actualiza ``productos.stock_actual`` con una única sentencia.
+
+Los productos se bloquean en orden de id. Los triggers del dashboard solo
+insertan filas de cambios (``backend/resumen.py``), así que el lote no
+bloquea ninguna fila compartida por categoría. Aun así puede interbloquearse
+con otra escritura sobre los mismos productos (un pedido, un PATCH masivo);
+MySQL deshace entonces la transacción y el lote se repite como en
+``backend/reservas.py``.
+"""
+
+import mysql.connector
+from mysql.connector import errorcode
+
+TIPOS_MOVIMIENTO = ('entrada', 'salida', 'ajuste')
+REINTENTOS_INTERBLOQUEO = 3
+
+QUERY_BLOQUEAR_PRODUCTOS = """
+    SELECT id, stock_actual FROM productos
+    WHERE id IN ({marcadores}) AND activo = TRUE
+    ORDER BY id
+    FOR UPDATE
+"""
+QUERY_INSERTAR_MOVIMIENTO = """
+    INSERT INTO movimientos_inventario (producto_id, tipo_movimiento, cantidad, motivo, usuario_id)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+QUERY_FIJAR_STOCK = """
+    UPDATE productos SET stock_actual = CASE id {casos} END
+    WHERE id IN ({marcadores})
+"""
+
+
+def validar_movimiento(item):
+    """Normalizar un movimiento del lote; lanza ValueError si no es válido"""
+    if not isinstance(item, dict):
+        raise ValueError('El movimiento debe ser un objeto')
+
+    tipo = item.get('tipo_movimiento')
+    if tipo not in TIPOS_MOVIMIENTO:
+        raise ValueError(f"tipo_movimiento debe ser uno de: {', '.join(TIPOS_MOVIMIENTO)}")
+
+    try:
+        producto_id = int(item['producto_id'])
+        cantidad = int(item['cantidad'])
+        usuario_id = item.get('usuario_id')
+        usuario_id = int(usuario_id) if usuario_id not in (None, '') else None
+    except KeyError as e:
+        raise ValueError(f'Campo requerido: {e.args[0]}')
+    except (TypeError, ValueError):
+        raise ValueError('producto_id, cantidad y usuario_id deben ser enteros')
+
+    # Entradas y salidas llevan cantidad positiva; los ajustes, con signo
+    if tipo == 'ajuste':
+        if cantidad == 0:
+            raise ValueError('La cantidad de un ajuste no puede ser 0')
+    elif cantidad <= 0:
+        raise ValueError('La cantidad debe ser mayor que 0')
+
+    return {
+        'producto_id': producto_id,
+        'tipo_movimiento': tipo,
+        'cantidad': cantidad,
+        'motivo': item.get('motivo'),
+        'usuario_id': usuario_id
+    }
+
+
+def variacion_stock(movimiento):
+    """Efecto del movimiento sobre stock_actual"""
+    if movimiento['tipo_movimiento'] == 'salida':
+        return -movimiento['cantidad']
+    return movimiento['cantidad']
+
+
+def registrar_movimientos(connection, items):
+    """Aplicar un lote de movimientos en una transacción.
+
+    Retorna ``(resultados, stock_final)``: un resultado por elemento de
+    ``items`` (en el mismo orden) y el stock final de cada producto
+    modificado. Los movimientos inválidos, de productos inexistentes o que
+    dejarían el stock en negativo se rechazan sin afectar al resto.
+    """
+    resultados = [None] * len(items)
+    validos = []
+
+    for indice, item in enumerate(items):
+        try:
+            validos.append((indice, validar_movimiento(item)))
+        except ValueError as e:
+            resultados[indice] = {'indice': indice, 'ok': False, 'error': str(e)}
+
+    if not validos:
+        return resultados, {}
+
+    for intento in range(REINTENTOS_INTERBLOQUEO):
+        try:
+            return resultados, _aplicar(connection, validos, resultados)
+        except mysql.connector.Error as e:
+            # Interbloqueo con otra transacción: MySQL ya deshizo esta, se repite
+            if e.errno != errorcode.ER_LOCK_DEADLOCK or intento == REINTENTOS_INTERBLOQUEO - 1:
+                raise
+
+
+def _aplicar(connection, validos, resultados):
+    """Transacción del lote; completa ``resultados`` y retorna el stock final por producto"""
+    stock_final = {}
+    producto_ids = sorted({movimiento['producto_id'] for _, movimiento in validos})
+    marcadores = ', '.join(['%s'] * len(producto_ids))
+
+    cursor = connection.cursor()
+    connection.start_transaction()
+    try:
+        # Bloquear todas las filas afectadas en un solo viaje (en orden de id)
+        cursor.execute(QUERY_BLOQUEAR_PRODUCTOS.format(marcadores=marcadores), producto_ids)
+        stock = dict(cursor.fetchall())
+
+        filas = []
+        for indice, movimiento in validos:
+            producto_id = movimiento['producto_id']
+            if producto_id not in stock:
+                resultados[indice] = {'indice': indice, 'ok': False, 'error': 'Producto no encontrado'}
+                continue
+
+            nuevo_stock = stock[producto_id] + variacion_stock(movimiento)
+            if nuevo_stock < 0:
+                resultados[indice] = {
+                    'indice': indice, 'ok': False,
+                    'error': f'Stock insuficiente (disponible: {stock[producto_id]})'
+                }
+                continue
+
+            stock[producto_id] = nuevo_stock
+            stock_final[producto_id] = nuevo_stock
+            filas.append((
+                producto_id, movimiento['tipo_movimiento'], movimiento['cantidad'],
+                movimiento['motivo'], movimiento['usuario_id']
+            ))
+            resultados[indice] = {'indice': indice, 'ok': True, 'producto_id': producto_id,
+                                  'stock_actual': nuevo_stock}
+
+        if filas:
+            cursor.executemany(QUERY_INSERTAR_MOVIMIENTO, filas)
+
+            casos = ' '.join(['WHEN %s THEN %s'] * len(stock_final))
+            params = [valor for par in stock_final.items() for valor in par]
+            params.extend(stock_final.keys())
+            cursor.execute(QUERY_FIJAR_STOCK.format(casos=casos, marcadores=', '.join(['%s'] * len(stock_final))),
+                           params)
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return stock_final
@@ -0,0 +1,238 @@
+"""
+Descuento atómico de stock para pedidos (checkout de los puntos de venta)
+
+Todas las líneas de un pedido se descuentan con una sola sentencia
+condicional:
+
+    UPDATE productos SET stock_actual = stock_actual - CASE id ... END
+    WHERE id IN (...) AND activo = TRUE AND stock_actual >= CASE id ... END
+
+MySQL evalúa la condición sobre la fila ya bloqueada, así que dos ventas
+simultáneas del mismo producto nunca parten del mismo stock (no hay
+lectura-modificación-escritura en Python) y las filas solo quedan bloqueadas
+durante la transacción corta que sigue. Si a alguna línea le falta stock se
+deshace el pedido completo.
+
+Cada pedido lleva una clave de idempotencia: el reintento de un pedido ya
+aplicado devuelve la misma respuesta sin volver a descontar. Los pedidos
+rechazados no guardan la clave, así que se pueden reintentar con ella.
+"""
+
+import hashlib
+import json
+import os
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from database.config import db_config
+
+RETENCION_CLAVES_HORAS = int(os.getenv('IDEMPOTENCIA_RETENCION_HORAS', 48))
+LONGITUD_MAXIMA_CLAVE = 100
+REINTENTOS_INTERBLOQUEO = 3
+LOTE_PURGA = 10000
+
+QUERY_RESERVAR_CLAVE = "INSERT INTO claves_idempotencia (clave, huella) VALUES (%s, %s)"
+QUERY_DESCONTAR_STOCK = """
+    UPDATE productos SET stock_actual = stock_actual - CASE id {casos} END
+    WHERE id IN ({marcadores}) AND activo = TRUE
+    AND stock_actual >= CASE id {casos} END
+"""
+QUERY_INSERTAR_SALIDA = """
+    INSERT INTO movimientos_inventario (producto_id, tipo_movimiento, cantidad, motivo, usuario_id)
+    VALUES (%s, 'salida', %s, %s, %s)
+"""
+QUERY_STOCK_PEDIDO = "SELECT id, stock_actual FROM productos WHERE id IN ({marcadores})"
+QUERY_STOCK_ACTIVOS = "SELECT id, stock_actual FROM productos WHERE id IN ({marcadores}) AND activo = TRUE"
+QUERY_GUARDAR_RESPUESTA = "UPDATE claves_idempotencia SET respuesta = %s WHERE clave = %s"
+QUERY_RESPUESTA_GUARDADA = "SELECT huella, respuesta FROM claves_idempotencia WHERE clave = %s"
+QUERY_PURGAR_CLAVES = """
+    DELETE FROM claves_idempotencia
+    WHERE creado_en < NOW() - INTERVAL %s HOUR
+    LIMIT %s
+"""
+
+
+def validar_pedido(data):
+    """Normalizar el cuerpo del pedido; lanza ValueError si no es válido.
+
+    Las líneas del mismo producto se suman y quedan ordenadas por id.
+    """
+    lineas = data.get('lineas')
+    if not isinstance(lineas, list) or not lineas:
+        raise ValueError('Campo requerido: lineas (lista no vacía)')
+
+    cantidades = {}
+    for linea in lineas:
+        if not isinstance(linea, dict):
+            raise ValueError('Cada línea debe ser un objeto')
+        try:
+            producto_id = int(linea['producto_id'])
+            cantidad = int(linea['cantidad'])
+        except KeyError as e:
+            raise ValueError(f'Campo requerido en la línea: {e.args[0]}')
+        except (TypeError, ValueError):
+            raise ValueError('producto_id y cantidad deben ser enteros')
+        if cantidad <= 0:
+            raise ValueError('La cantidad debe ser mayor que 0')
+        cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+
+    usuario_id = data.get('usuario_id')
+    try:
+        usuario_id = int(usuario_id) if usuario_id not in (None, '') else None
+    except (TypeError, ValueError):
+        raise ValueError('usuario_id debe ser un entero')
+
+    return {
+        'lineas': dict(sorted(cantidades.items())),
+        'motivo': data.get('motivo'),
+        'usuario_id': usuario_id
+    }
+
+
+def validar_clave(clave):
+    if not clave:
+        raise ValueError('Se requiere una clave de idempotencia (cabecera Idempotency-Key o clave_idempotencia)')
+    clave = str(clave)
+    if len(clave) > LONGITUD_MAXIMA_CLAVE:
+        raise ValueError(f'La clave de idempotencia admite como máximo {LONGITUD_MAXIMA_CLAVE} caracteres')
+    return clave
+
+
+def huella_pedido(pedido):
+    """Hash del pedido normalizado para detectar una clave reutilizada con otro contenido"""
+    contenido = json.dumps([list(pedido['lineas'].items()), pedido['motivo'], pedido['usuario_id']])
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def descontar_pedido(connection, clave, pedido):
+    """Aplicar un pedido de forma atómica e idempotente.
+
+    Retorna ``(estado, datos)``:
+    - ``('aplicado', respuesta)``: stock descontado y movimientos registrados
+    - ``('repetido', respuesta)``: la clave ya se aplicó; respuesta original
+    - ``('rechazado', lineas)``: falta stock o algún producto no existe
+    - ``('clave_en_uso', None)``: la clave se usó con un pedido distinto
+    """
+    for intento in range(REINTENTOS_INTERBLOQUEO):
+        try:
+            return _descontar(connection, clave, pedido)
+        except mysql.connector.Error as e:
+            # Interbloqueo con otra transacción: MySQL ya deshizo esta, se repite
+            if e.errno != errorcode.ER_LOCK_DEADLOCK or intento == REINTENTOS_INTERBLOQUEO - 1:
+                raise
+
+
+def _descontar(connection, clave, pedido):
+    lineas = pedido['lineas']
+    producto_ids = list(lineas)
+    marcadores = ', '.join(['%s'] * len(producto_ids))
+    casos = ' '.join(['WHEN %s THEN %s'] * len(producto_ids))
+    cantidades = [valor for par in lineas.items() for valor in par]
+    huella = huella_pedido(pedido)
+
+    cursor = connection.cursor()
+    connection.start_transaction()
+    try:
+        # Primero la clave: un reintento simultáneo espera aquí a que esta
+        # transacción termine y luego falla por clave duplicada, sin tocar stock
+        try:
+            cursor.execute(QUERY_RESERVAR_CLAVE, (clave, huella))
+        except mysql.connector.IntegrityError as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+            connection.rollback()
+            return respuesta_guardada(connection, clave, huella)
+
+        cursor.execute(QUERY_DESCONTAR_STOCK.format(casos=casos, marcadores=marcadores),
+                       cantidades + producto_ids + cantidades)
+
+        if cursor.rowcount != len(producto_ids):
+            connection.rollback()
+            return 'rechazado', lineas_rechazadas(connection, lineas)
+
+        motivo = pedido['motivo'] or f'Pedido {clave}'
+        filas = [
+            (producto_id, cantidad, motivo, pedido['usuario_id'])
+            for producto_id, cantidad in lineas.items()
+        ]
+        cursor.executemany(QUERY_INSERTAR_SALIDA, filas)
+
+        cursor.execute(QUERY_STOCK_PEDIDO.format(marcadores=marcadores), producto_ids)
+        stock = dict(cursor.fetchall())
+
+        respuesta = {
+            'clave_idempotencia': clave,
+            'lineas': [
+                {'producto_id': producto_id, 'cantidad': cantidad, 'stock_actual': stock[producto_id]}
+                for producto_id, cantidad in lineas.items()
+            ]
+        }
+        cursor.execute(QUERY_GUARDAR_RESPUESTA, (json.dumps(respuesta), clave))
+
+        connection.commit()
+        return 'aplicado', respuesta
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def respuesta_guardada(connection, clave, huella):
+    cursor = connection.cursor()
+    cursor.execute(QUERY_RESPUESTA_GUARDADA, (clave,))
+    fila = cursor.fetchone()
+    cursor.close()
+
+    if not fila or fila[0] != huella or fila[1] is None:
+        return 'clave_en_uso', None
+
+    respuesta = fila[1]
+    if isinstance(respuesta, (bytes, bytearray)):
+        respuesta = respuesta.decode('utf-8')
+    return 'repetido', json.loads(respuesta)
+
+
+def lineas_rechazadas(connection, lineas):
+    """Motivo de rechazo de cada línea, leído tras deshacer el pedido"""
+    marcadores = ', '.join(['%s'] * len(lineas))
+    cursor = connection.cursor()
+    cursor.execute(QUERY_STOCK_ACTIVOS.format(marcadores=marcadores), list(lineas))
+    stock = dict(cursor.fetchall())
+    cursor.close()
+
+    resultado = []
+    for producto_id, cantidad in lineas.items():
+        linea = {'producto_id': producto_id, 'cantidad': cantidad}
+        if producto_id not in stock:
+            linea['error'] = 'Producto no encontrado'
+        else:
+            # Puede haberse repuesto entretanto; entonces la línea no lleva error
+            linea['disponible'] = stock[producto_id]
+            if stock[producto_id] < cantidad:
+                linea['error'] = f'Stock insuficiente (disponible: {stock[producto_id]})'
+        resultado.append(linea)
+    return resultado
+
+
+def purgar_claves_idempotencia():
+    """Borrar las claves más antiguas que ``IDEMPOTENCIA_RETENCION_HORAS`` por lotes"""
+    try:
+        with db_config.connection() as connection:
+            if not connection:
+                return 0
+
+            cursor = connection.cursor()
+            total = 0
+            while True:
+                cursor.execute(QUERY_PURGAR_CLAVES, (RETENCION_CLAVES_HORAS, LOTE_PURGA))
+                total += cursor.rowcount
+                if cursor.rowcount < LOTE_PURGA:
+                    break
+            cursor.close()
+            return total
+
+    except Exception as e:
+        print(f"Error purgando claves de idempotencia: {e}")
+        return 0
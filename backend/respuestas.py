@@ -0,0 +1,87 @@
+"""
+Respuestas condicionales y comprimidas de la API
+
+- ``respuesta_condicional``: decorador para las rutas de listado que añade un
+  ETag calculado sobre el cuerpo y contesta ``304 Not Modified`` cuando
+  coincide con ``If-None-Match``. El navegador lo hace solo en cada ``fetch``,
+  así que recargar el dashboard sin cambios no vuelve a descargar los datos.
+- ``comprimir_respuesta``: hook ``after_request`` que comprime con brotli (si
+  está instalado) o gzip según ``Accept-Encoding`` las respuestas de texto
+  mayores que ``COMPRESION_MINIMO``. Las respuestas en streaming (CSV,
+  NDJSON, eventos) y las imágenes no se tocan.
+
+Variables de entorno:
+- ``COMPRESION_MINIMO``: bytes a partir de los que se comprime (1024; 0 la desactiva)
+- ``COMPRESION_NIVEL``: nivel de gzip (6)
+- ``COMPRESION_NIVEL_BROTLI``: calidad de brotli (4, adecuada para contenido dinámico)
+"""
+
+from functools import wraps
+import gzip
+import hashlib
+import os
+
+from flask import current_app, request
+
+from backend.metricas import fase
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESION_MINIMO = int(os.getenv('COMPRESION_MINIMO', 1024))
+COMPRESION_NIVEL = int(os.getenv('COMPRESION_NIVEL', 6))
+COMPRESION_NIVEL_BROTLI = int(os.getenv('COMPRESION_NIVEL_BROTLI', 4))
+TIPOS_COMPRIMIBLES = {'application/json', 'text/plain', 'text/csv', 'text/html'}
+
+
+def respuesta_condicional(vista):
+    """Añadir un ETag a las respuestas 200 de la vista y contestar 304 si no cambió"""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        response = current_app.make_response(vista(*args, **kwargs))
+        if request.method != 'GET' or response.status_code != 200 or response.is_streamed:
+            return response
+
+        # Débil: el mismo ETag vale para la versión comprimida y la sin comprimir
+        response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest(), weak=True)
+        # Guardar en el navegador pero revalidar siempre
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    return envoltura
+
+
+def elegir_codificacion(aceptadas):
+    """``br``, ``gzip`` o None según ``Accept-Encoding``"""
+    calidad_gzip = aceptadas.quality('gzip')
+    if brotli is not None and aceptadas.quality('br') >= max(calidad_gzip, 0.001):
+        return 'br'
+    if calidad_gzip > 0:
+        return 'gzip'
+    return None
+
+
+def comprimir_respuesta(response):
+    if (COMPRESION_MINIMO <= 0 or response.direct_passthrough or response.is_streamed
+            or response.status_code != 200 or response.mimetype not in TIPOS_COMPRIMIBLES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    # La respuesta depende de Accept-Encoding aunque esta vez no se comprima
+    response.vary.add('Accept-Encoding')
+
+    datos = response.get_data()
+    codificacion = elegir_codificacion(request.accept_encodings)
+    if codificacion is None or len(datos) < COMPRESION_MINIMO:
+        return response
+
+    with fase('compresion'):
+        if codificacion == 'br':
+            comprimidos = brotli.compress(datos, quality=COMPRESION_NIVEL_BROTLI)
+        else:
+            comprimidos = gzip.compress(datos, compresslevel=COMPRESION_NIVEL, mtime=0)
+
+    response.set_data(comprimidos)
+    response.headers['Content-Encoding'] = codificacion
+    return response
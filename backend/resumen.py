@@ -0,0 +1,134 @@
+"""
+Consolidación del resumen del dashboard
+
+Los triggers de ``productos`` y ``alertas`` no actualizan las filas de
+``resumen_categorias`` ni ``resumen_alertas``: insertan su contribución
+(positiva o negativa) como una fila nueva de ``resumen_categorias_deltas``
+o ``resumen_alertas_deltas``. Una inserción no bloquea ninguna fila que
+necesiten otras escrituras, así que las ventas, movimientos, importaciones
+y ediciones de una misma categoría no se esperan entre sí, ni las alertas
+por un contador global.
+
+``GET /api/dashboard`` suma el resumen y los cambios pendientes. El
+programador de tareas ejecuta ``consolidar_resumen`` cada
+``RESUMEN_INTERVALO`` segundos para pasar los cambios al resumen y mantener
+pequeña la tabla de cambios. Solo esa transacción corta bloquea las filas
+del resumen.
+"""
+
+import os
+
+from database.config import db_config
+
+RESUMEN_INTERVALO = float(os.getenv('RESUMEN_INTERVALO', 10))
+LOTE_RESUMEN = 5000
+LOTES_POR_PASADA = 100
+
+# Lectura con bloqueo: espera a las inserciones aún sin confirmar en lugar
+# de saltárselas, de modo que todo cambio leído se suma y se borra a la vez
+QUERY_CAMBIOS_CATEGORIAS = """
+    SELECT id, categoria_id, total_productos, stock_bajo, agotados, valor_inventario
+    FROM resumen_categorias_deltas
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE
+"""
+QUERY_SUMAR_CATEGORIA = """
+    INSERT INTO resumen_categorias (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_productos = total_productos + VALUES(total_productos),
+        stock_bajo = stock_bajo + VALUES(stock_bajo),
+        agotados = agotados + VALUES(agotados),
+        valor_inventario = valor_inventario + VALUES(valor_inventario)
+"""
+QUERY_BORRAR_CAMBIOS_CATEGORIAS = "DELETE FROM resumen_categorias_deltas WHERE id IN ({marcadores})"
+
+QUERY_CAMBIOS_ALERTAS = """
+    SELECT id, no_leidas FROM resumen_alertas_deltas
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE
+"""
+QUERY_SUMAR_ALERTAS = """
+    INSERT INTO resumen_alertas (id, no_leidas) VALUES (1, %s)
+    ON DUPLICATE KEY UPDATE no_leidas = no_leidas + VALUES(no_leidas)
+"""
+QUERY_BORRAR_CAMBIOS_ALERTAS = "DELETE FROM resumen_alertas_deltas WHERE id IN ({marcadores})"
+
+
+def sumar_cambios_categorias(filas):
+    """Totales por categoría de las filas ``(id, categoria_id, total, bajo, agotados, valor)``"""
+    totales = {}
+    for _, categoria_id, *valores in filas:
+        suma = totales.setdefault(categoria_id, [0, 0, 0, 0])
+        for posicion, valor in enumerate(valores):
+            suma[posicion] += valor
+    return totales
+
+
+def consolidar_resumen(maximo_lotes=LOTES_POR_PASADA):
+    """Pasar los cambios pendientes al resumen; retorna las filas de cambios consolidadas"""
+    try:
+        with db_config.connection() as connection:
+            if not connection:
+                return 0
+
+            total = 0
+            for consolidar in (_consolidar_categorias, _consolidar_alertas):
+                for _ in range(maximo_lotes):
+                    filas = consolidar(connection)
+                    total += filas
+                    if filas < LOTE_RESUMEN:
+                        break
+            return total
+
+    except Exception as e:
+        print(f"Error consolidando el resumen del dashboard: {e}")
+        return 0
+
+
+def _consolidar_categorias(connection):
+    cursor = connection.cursor()
+    connection.start_transaction()
+    try:
+        cursor.execute(QUERY_CAMBIOS_CATEGORIAS, (LOTE_RESUMEN,))
+        filas = cursor.fetchall()
+
+        if filas:
+            totales = sumar_cambios_categorias(filas)
+            # En orden de categoría, como cualquier otra transacción que las bloquee
+            cursor.executemany(QUERY_SUMAR_CATEGORIA, [
+                (categoria_id, *suma) for categoria_id, suma in sorted(totales.items())
+            ])
+            cursor.execute(QUERY_BORRAR_CAMBIOS_CATEGORIAS.format(marcadores=', '.join(['%s'] * len(filas))),
+                           [fila[0] for fila in filas])
+
+        connection.commit()
+        return len(filas)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _consolidar_alertas(connection):
+    cursor = connection.cursor()
+    connection.start_transaction()
+    try:
+        cursor.execute(QUERY_CAMBIOS_ALERTAS, (LOTE_RESUMEN,))
+        filas = cursor.fetchall()
+
+        if filas:
+            cursor.execute(QUERY_SUMAR_ALERTAS, (sum(no_leidas for _, no_leidas in filas),))
+            cursor.execute(QUERY_BORRAR_CAMBIOS_ALERTAS.format(marcadores=', '.join(['%s'] * len(filas))),
+                           [fila[0] for fila in filas])
+
+        connection.commit()
+        return len(filas)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Retención de alertas, movimientos de inventario e historial de stock
+
+El motor de alertas repite cada día el aviso de los productos que siguen
+bajo mínimo y ``movimientos_inventario`` crece con cada venta, así que sin
+retención las tablas que consulta la API no paran de crecer. En cada pasada
+del programador de tareas (``backend/tareas.py``):
+
+- Las alertas leídas más antiguas que ``ALERTAS_RETENCION_DIAS`` se
+  compactan en ``alertas_archivo``: una fila por producto, tipo y mes con
+  el número de alertas y la primera y última fecha.
+- Los movimientos más antiguos que ``MOVIMIENTOS_RETENCION_DIAS`` pasan a
+  ``movimientos_inventario_archivo`` sin cambios (el job de predicción lee
+  las dos tablas).
+- Con ``ARCHIVO_RETENCION_MESES`` se descartan los meses más antiguos del
+  archivo. En MySQL el archivo de movimientos está particionado por mes y
+  se borra con ``DROP PARTITION``; las particiones de los meses nuevos se
+  crean antes de archivar en ellos.
+- Los cambios de ``cambios_stock`` más antiguos que
+  ``STOCK_HISTORICO_RETENCION_DIAS`` se compactan en una fila por producto
+  con su suma y la fecha del último, y se borran los snapshots de stock
+  anteriores a esa fecha. El stock a partir de ella no cambia; antes ya no
+  se puede consultar.
+
+Se trabaja por lotes de ``RETENCION_LOTE`` filas, cada uno en su propia
+transacción corta, con una pausa entre lotes para que las escrituras de la
+API no esperen. Cada pasada procesa como mucho ``LOTES_POR_PASADA`` lotes
+por tabla; lo que quede se archiva en las siguientes.
+
+Uso:
+    python backend/retencion.py            # aplicar la retención completa ahora
+    python backend/retencion.py --estado   # filas en las tablas y en el archivo
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import db_config
+
+# 0 desactiva cada política
+ALERTAS_RETENCION_DIAS = int(os.getenv('ALERTAS_RETENCION_DIAS', 30))
+MOVIMIENTOS_RETENCION_DIAS = int(os.getenv('MOVIMIENTOS_RETENCION_DIAS', 365))
+ARCHIVO_RETENCION_MESES = int(os.getenv('ARCHIVO_RETENCION_MESES', 0))
+HISTORICO_RETENCION_DIAS = int(os.getenv('STOCK_HISTORICO_RETENCION_DIAS', 730))
+LOTE_RETENCION = int(os.getenv('RETENCION_LOTE', 5000))
+PAUSA_ENTRE_LOTES = 0.05
+LOTES_POR_PASADA = 100
+
+QUERY_ALERTAS_ANTIGUAS = """
+SELECT id, producto_id, tipo_alerta, fecha_alerta FROM alertas
+WHERE leida = TRUE AND fecha_alerta < %s
+ORDER BY fecha_alerta
+LIMIT %s
+FOR UPDATE
+"""
+
+QUERY_COMPACTAR_ALERTAS = """
+INSERT INTO alertas_archivo (producto_id, tipo_alerta, mes, alertas, primera, ultima)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    alertas = alertas + VALUES(alertas),
+    primera = LEAST(primera, VALUES(primera)),
+    ultima = GREATEST(ultima, VALUES(ultima))
+"""
+
+QUERY_MOVIMIENTOS_ANTIGUOS = """
+SELECT id FROM movimientos_inventario
+WHERE fecha_movimiento < %s
+ORDER BY fecha_movimiento
+LIMIT %s
+FOR UPDATE
+"""
+
+QUERY_ARCHIVAR_MOVIMIENTOS = """
+INSERT INTO movimientos_inventario_archivo
+    (id, producto_id, tipo_movimiento, cantidad, motivo, usuario_id, fecha_movimiento)
+SELECT id, producto_id, tipo_movimiento, cantidad, motivo, usuario_id, fecha_movimiento
+FROM movimientos_inventario
+WHERE id IN ({marcadores})
+"""
+
+# Productos con más de un cambio anterior al límite, con su suma y su fecha
+QUERY_CAMBIOS_STOCK_ANTIGUOS = """
+SELECT producto_id, SUM(variacion), MAX(fecha) FROM cambios_stock
+WHERE fecha < %s AND producto_id > %s
+GROUP BY producto_id
+HAVING COUNT(*) > 1
+ORDER BY producto_id
+LIMIT %s
+FOR UPDATE
+"""
+
+QUERY_SNAPSHOTS_STOCK_ANTIGUOS = """
+SELECT snapshot_id, producto_id FROM snapshots_stock_productos
+WHERE snapshot_id < %s
+ORDER BY snapshot_id, producto_id
+LIMIT %s
+FOR UPDATE
+"""
+
+QUERY_PARTICIONES = """
+SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'movimientos_inventario_archivo'
+AND PARTITION_NAME IS NOT NULL
+"""
+
+
+def primer_dia_mes(dia, meses=0):
+    """Primer día del mes de ``dia`` desplazado ``meses`` meses"""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _por_lotes(lote, maximo_lotes):
+    """Repetir ``lote(cursor)``, cada vez en su transacción, hasta un lote incompleto o ``maximo_lotes``.
+
+    Retorna el total de filas procesadas.
+    """
+    total = 0
+    with db_config.connection() as connection:
+        if not connection:
+            return 0
+
+        lotes = 0
+        while maximo_lotes is None or lotes < maximo_lotes:
+            procesadas = _en_transaccion(connection, lote)
+            total += procesadas
+            lotes += 1
+            if procesadas < LOTE_RETENCION:
+                break
+            time.sleep(PAUSA_ENTRE_LOTES)
+    return total
+
+
+def _en_transaccion(connection, paso):
+    cursor = connection.cursor()
+    connection.start_transaction()
+    try:
+        procesadas = paso(cursor)
+        connection.commit()
+        return procesadas
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def compactar_alertas(maximo_lotes=None, ahora=None):
+    """Pasar las alertas leídas antiguas a ``alertas_archivo``. Retorna las alertas compactadas"""
+    if ALERTAS_RETENCION_DIAS <= 0:
+        return 0
+    limite = (ahora or datetime.now()) - timedelta(days=ALERTAS_RETENCION_DIAS)
+
+    def lote(cursor):
+        cursor.execute(QUERY_ALERTAS_ANTIGUAS, (limite, LOTE_RETENCION))
+        filas = cursor.fetchall()
+        if not filas:
+            return 0
+
+        grupos = defaultdict(list)
+        for _, producto_id, tipo_alerta, fecha in filas:
+            grupos[(producto_id, tipo_alerta, primer_dia_mes(fecha))].append(fecha)
+        cursor.executemany(QUERY_COMPACTAR_ALERTAS, [
+            (producto_id, tipo_alerta, mes, len(fechas), min(fechas), max(fechas))
+            for (producto_id, tipo_alerta, mes), fechas in grupos.items()
+        ])
+
+        ids = [fila[0] for fila in filas]
+        cursor.execute(f"DELETE FROM alertas WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+        return len(ids)
+
+    try:
+        return _por_lotes(lote, maximo_lotes)
+    except Exception as e:
+        print(f"Error compactando alertas: {e}")
+        return 0
+
+
+def asegurar_particiones(connection, hasta):
+    """Crear las particiones mensuales del archivo de movimientos hasta el mes de ``hasta``.
+
+    Se separan de ``p_futuro``, que está vacía porque solo se archiva el
+    pasado, así que la reorganización no copia filas.
+    """
+    cursor = connection.cursor()
+    cursor.execute(QUERY_PARTICIONES)
+    meses = sorted(nombre for (nombre,) in cursor.fetchall() if nombre[1:].isdigit())
+
+    if meses:
+        mes = primer_dia_mes(datetime.strptime(meses[-1][1:], '%Y%m'), 1)
+    else:
+        cursor.execute("SELECT MIN(fecha_movimiento) FROM movimientos_inventario")
+        mas_antiguo = cursor.fetchone()[0]
+        mes = primer_dia_mes(min(mas_antiguo, hasta) if mas_antiguo else hasta)
+
+    nuevas = []
+    while mes <= hasta.date():
+        siguiente = primer_dia_mes(mes, 1)
+        nuevas.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN (UNIX_TIMESTAMP('{siguiente} 00:00:00'))")
+        mes = siguiente
+
+    if nuevas:
+        cursor.execute(f"""
+            ALTER TABLE movimientos_inventario_archivo REORGANIZE PARTITION p_futuro INTO (
+                {', '.join(nuevas)}, PARTITION p_futuro VALUES LESS THAN MAXVALUE
+            )
+        """)
+    cursor.close()
+    return len(nuevas)
+
+
+def archivar_movimientos(maximo_lotes=None, ahora=None):
+    """Mover los movimientos antiguos a ``movimientos_inventario_archivo``. Retorna los archivados"""
+    if MOVIMIENTOS_RETENCION_DIAS <= 0:
+        return 0
+    limite = (ahora or datetime.now()) - timedelta(days=MOVIMIENTOS_RETENCION_DIAS)
+
+    def lote(cursor):
+        cursor.execute(QUERY_MOVIMIENTOS_ANTIGUOS, (limite, LOTE_RETENCION))
+        ids = [fila[0] for fila in cursor.fetchall()]
+        if not ids:
+            return 0
+
+        marcadores = ', '.join(['%s'] * len(ids))
+        cursor.execute(QUERY_ARCHIVAR_MOVIMIENTOS.format(marcadores=marcadores), ids)
+        cursor.execute(f"DELETE FROM movimientos_inventario WHERE id IN ({marcadores})", ids)
+        return len(ids)
+
+    try:
+        if db_config.motor == 'mysql':
+            with db_config.connection() as connection:
+                if not connection:
+                    return 0
+                asegurar_particiones(connection, limite)
+        return _por_lotes(lote, maximo_lotes)
+    except Exception as e:
+        print(f"Error archivando movimientos: {e}")
+        return 0
+
+
+def purgar_archivo(maximo_lotes=None, hoy=None):
+    """Descartar los meses del archivo más antiguos que ``ARCHIVO_RETENCION_MESES``.
+
+    Retorna las filas descartadas de los dos archivos.
+    """
+    if ARCHIVO_RETENCION_MESES <= 0:
+        return 0
+    limite = primer_dia_mes(hoy or date.today(), -ARCHIVO_RETENCION_MESES)
+
+    def borrar(tabla, columna):
+        def lote(cursor):
+            cursor.execute(f"DELETE FROM {tabla} WHERE {columna} < %s LIMIT %s", (limite, LOTE_RETENCION))
+            return cursor.rowcount
+        return lote
+
+    try:
+        total = _por_lotes(borrar('alertas_archivo', 'mes'), maximo_lotes)
+        if db_config.motor != 'mysql':
+            return total + _por_lotes(borrar('movimientos_inventario_archivo', 'fecha_movimiento'),
+                                      maximo_lotes)
+
+        with db_config.connection() as connection:
+            if not connection:
+                return total
+            cursor = connection.cursor()
+            cursor.execute(QUERY_PARTICIONES)
+            # pAAAAMM contiene el mes AAAAMM (y, la primera, todo lo anterior)
+            caducadas = sorted(nombre for (nombre,) in cursor.fetchall()
+                               if nombre[1:].isdigit() and nombre[1:] < f'{limite:%Y%m}')
+            for nombre in caducadas:
+                cursor.execute(f"SELECT COUNT(*) FROM movimientos_inventario_archivo PARTITION ({nombre})")
+                total += cursor.fetchone()[0]
+                cursor.execute(f"ALTER TABLE movimientos_inventario_archivo DROP PARTITION {nombre}")
+            cursor.close()
+        return total
+
+    except Exception as e:
+        print(f"Error purgando el archivo: {e}")
+        return 0
+
+
+def compactar_cambios_stock(maximo_lotes=None, ahora=None):
+    """Sustituir los cambios de stock antiguos de cada producto por su suma. Retorna los productos compactados"""
+    if HISTORICO_RETENCION_DIAS <= 0:
+        return 0
+    limite = (ahora or datetime.now()) - timedelta(days=HISTORICO_RETENCION_DIAS)
+    # Los productos ya compactados tienen un solo cambio antiguo y no se vuelven a leer
+    ultimo = [0]
+
+    def lote(cursor):
+        cursor.execute(QUERY_CAMBIOS_STOCK_ANTIGUOS, (limite, ultimo[0], LOTE_RETENCION))
+        saldos = cursor.fetchall()
+        if not saldos:
+            return 0
+        ultimo[0] = saldos[-1][0]
+
+        ids = [fila[0] for fila in saldos]
+        cursor.execute(f"DELETE FROM cambios_stock WHERE producto_id IN ({', '.join(['%s'] * len(ids))}) "
+                       "AND fecha < %s", [*ids, limite])
+        # Un saldo 0 no aporta nada a la suma
+        cursor.executemany("INSERT INTO cambios_stock (producto_id, variacion, fecha) VALUES (%s, %s, %s)",
+                           [fila for fila in saldos if fila[1]])
+        return len(saldos)
+
+    try:
+        return _por_lotes(lote, maximo_lotes)
+    except Exception as e:
+        print(f"Error compactando cambios de stock: {e}")
+        return 0
+
+
+def purgar_snapshots_stock(maximo_lotes=None, ahora=None):
+    """Borrar los snapshots de stock anteriores al historial conservado. Retorna las filas borradas"""
+    if HISTORICO_RETENCION_DIAS <= 0:
+        return 0
+    limite = (ahora or datetime.now()) - timedelta(days=HISTORICO_RETENCION_DIAS)
+
+    def cabeceras(cursor):
+        # Primero las cabeceras: ninguna consulta parte de un snapshot a medio borrar
+        cursor.execute("DELETE FROM snapshots_stock WHERE fecha < %s", (limite,))
+        cursor.execute("SELECT MIN(id) FROM snapshots_stock")
+        primero = cursor.fetchone()[0]
+        if primero is None:
+            cursor.execute("SELECT MAX(snapshot_id) + 1 FROM snapshots_stock_productos")
+            primero = cursor.fetchone()[0]
+        return primero
+
+    try:
+        with db_config.connection() as connection:
+            if not connection:
+                return 0
+            # Los ids crecen con la fecha: las filas de ids menores al primer snapshot sobran
+            primero = _en_transaccion(connection, cabeceras)
+        if primero is None:
+            return 0
+
+        def lote(cursor):
+            cursor.execute(QUERY_SNAPSHOTS_STOCK_ANTIGUOS, (primero, LOTE_RETENCION))
+            filas = cursor.fetchall()
+            if not filas:
+                return 0
+            # Hasta la última clave leída, en el orden de la clave primaria
+            snapshot_id, producto_id = filas[-1]
+            cursor.execute("DELETE FROM snapshots_stock_productos WHERE snapshot_id < %s "
+                           "OR (snapshot_id = %s AND producto_id <= %s)",
+                           (snapshot_id, snapshot_id, producto_id))
+            return len(filas)
+
+        return _por_lotes(lote, maximo_lotes)
+    except Exception as e:
+        print(f"Error purgando snapshots de stock: {e}")
+        return 0
+
+
+def aplicar_retencion(maximo_lotes=LOTES_POR_PASADA):
+    """Aplicar todas las políticas de retención; retorna las filas tratadas por cada una"""
+    return {
+        'alertas_compactadas': compactar_alertas(maximo_lotes),
+        'movimientos_archivados': archivar_movimientos(maximo_lotes),
+        'archivo_descartado': purgar_archivo(maximo_lotes),
+        # Los snapshots antes que los cambios: uno anterior al límite ya no sería válido
+        'snapshots_descartados': purgar_snapshots_stock(maximo_lotes),
+        'cambios_stock_compactados': compactar_cambios_stock(maximo_lotes)
+    }
+
+
+def mostrar_estado(connection):
+    cursor = connection.cursor()
+    for tabla in ('alertas', 'alertas_archivo', 'movimientos_inventario', 'movimientos_inventario_archivo',
+                  'cambios_stock', 'snapshots_stock', 'snapshots_stock_productos'):
+        cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+        print(f"{tabla:>32}  {cursor.fetchone()[0]:>10} filas")
+    cursor.close()
+
+    print(f"\nAlertas leídas: {ALERTAS_RETENCION_DIAS or 'sin límite'} días; "
+          f"movimientos: {MOVIMIENTOS_RETENCION_DIAS or 'sin límite'} días; "
+          f"archivo: {ARCHIVO_RETENCION_MESES or 'sin límite'} meses; "
+          f"historial de stock: {HISTORICO_RETENCION_DIAS or 'sin límite'} días")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Retención de alertas, movimientos e historial de stock')
+    parser.add_argument('--estado', action='store_true', help='Mostrar las filas de cada tabla')
+    args = parser.parse_args()
+
+    if args.estado:
+        with db_config.connection() as connection:
+            if not connection:
+                print("❌ No se pudo conectar a la base de datos")
+                sys.exit(1)
+            mostrar_estado(connection)
+        return
+
+    # Sin límite de lotes: se procesa todo lo pendiente
+    resultado = aplicar_retencion(maximo_lotes=None)
+    print(f"✅ {resultado['alertas_compactadas']} alertas compactadas, "
+          f"{resultado['movimientos_archivados']} movimientos archivados, "
+          f"{resultado['archivo_descartado']} filas descartadas del archivo, "
+          f"{resultado['snapshots_descartados']} filas de snapshots borradas, "
+          f"{resultado['cambios_stock_compactados']} productos con el historial de stock compactado")
+
+
+if __name__ == "__main__":
+    main()
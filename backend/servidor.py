@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Servidor de producción del Sistema de Inventario
+
+Arranca la API con Gunicorn: un proceso maestro que crea la aplicación una
+vez (``preload``) y la reparte en varios workers con hilos. Cada worker:
+
+- crea su propio pool de conexiones MySQL tras el fork (nunca usa los
+  sockets del maestro),
+- arranca el programador de tareas periódicas, que solo las ejecuta en el
+  worker que tiene el lock de MySQL,
+- admite como mucho ``--eventos-max-clientes`` clientes de ``/api/eventos``
+  (cada uno ocupa un hilo mientras está conectado; el frontend usa los de la
+  API asíncrona),
+- vuelca sus métricas en la carpeta compartida ``METRICAS_DIR`` (una
+  temporal si no se indica), de modo que ``/api/metrics`` devuelve los
+  totales de todos los workers sea cual sea el que atiende el scrape,
+- se recicla tras ``--max-peticiones`` (con jitter para que no se reinicien
+  todos a la vez),
+- al recibir SIGTERM deja de aceptar conexiones, termina las peticiones en
+  curso durante ``--graceful`` segundos y cierra su pool y sus procesos de
+  imágenes.
+
+Gunicorn solo funciona en sistemas tipo Unix; en Windows usar
+``python backend/app.py`` (servidor de desarrollo).
+
+Uso:
+    python backend/servidor.py
+    python backend/servidor.py --bind 0.0.0.0:8000 --workers 8 --threads 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import db_config
+from backend.tareas import programador_tareas
+from backend.eventos import bus_eventos
+from backend.metricas import METRICAS_ACTIVAS, agregador as agregador_metricas
+from backend.imagenes import procesador_imagenes
+from backend.app import crear_app
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+
+def post_fork(server, worker):
+    # El pool se crea de nuevo en el worker en el primer uso
+    db_config.reiniciar_pool()
+    programador_tareas.iniciar()
+    agregador_metricas.iniciar()
+
+
+def worker_exit(server, worker):
+    # Los totales del worker pasan al acumulado para que los contadores no bajen
+    agregador_metricas.detener()
+    programador_tareas.detener()
+    procesador_imagenes.apagar()
+    db_config.cerrar_pool()
+
+
+def opciones_gunicorn(args):
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'max_requests': args.max_peticiones,
+        'max_requests_jitter': args.max_peticiones_jitter,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful,
+        'keepalive': 5,
+        'accesslog': '-' if args.log_accesos else None,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }
+
+
+if BaseApplication is not None:
+    class ServidorInventario(BaseApplication):
+        """Aplicación de Gunicorn configurada desde Python en lugar de la línea de comandos"""
+
+        def __init__(self, app, opciones):
+            self.application = app
+            self.opciones = opciones
+            super().__init__()
+
+        def load_config(self):
+            for clave, valor in self.opciones.items():
+                if valor is not None:
+                    self.cfg.set(clave, valor)
+
+        def load(self):
+            return self.application
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='Servidor de producción de la API')
+    parser.add_argument('--bind', default=os.getenv('SERVIDOR_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVIDOR_WORKERS', cpus)),
+                        help='Procesos worker (por defecto uno por CPU)')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SERVIDOR_THREADS', 4)),
+                        help='Hilos por worker')
+    parser.add_argument('--eventos-max-clientes', type=int,
+                        default=int(os.getenv('EVENTOS_MAX_CLIENTES', 0)) or None,
+                        help='Clientes de /api/eventos por worker (por defecto la mitad de los hilos)')
+    parser.add_argument('--max-peticiones', type=int,
+                        default=int(os.getenv('SERVIDOR_MAX_PETICIONES', 10000)),
+                        help='Reciclar el worker tras este número de peticiones (0 = nunca)')
+    parser.add_argument('--max-peticiones-jitter', type=int,
+                        default=int(os.getenv('SERVIDOR_MAX_PETICIONES_JITTER', 1000)))
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('SERVIDOR_TIMEOUT', 60)),
+                        help='Segundos sin respuesta tras los que se reinicia un worker')
+    parser.add_argument('--graceful', type=int, default=int(os.getenv('SERVIDOR_GRACEFUL', 30)),
+                        help='Segundos para terminar las peticiones en curso al apagar')
+    parser.add_argument('--log-accesos', action='store_true', help='Registrar cada petición en stdout')
+    args = parser.parse_args()
+
+    if BaseApplication is None:
+        print("❌ Gunicorn no está instalado (pip install gunicorn); en Windows usar python backend/app.py")
+        sys.exit(1)
+
+    # Carpeta de volcados de métricas, vaciada al arrancar (los workers la heredan)
+    if METRICAS_ACTIVAS:
+        agregador_metricas.preparar(os.getenv('METRICAS_DIR') or tempfile.mkdtemp(prefix='inventario-metricas-'))
+
+    # Los workers heredan el límite del maestro (preload)
+    bus_eventos.max_clientes = args.eventos_max_clientes or max(args.threads // 2, 1)
+
+    # Con un pool por worker, el total de conexiones es workers * DB_POOL_SIZE
+    if db_config.pool_size < args.threads:
+        print(f"⚠️ DB_POOL_SIZE ({db_config.pool_size}) es menor que los hilos por worker ({args.threads})")
+    if args.workers > 1 and not os.getenv('CACHE_REDIS_URL'):
+        print("⚠️ Sin CACHE_REDIS_URL cada worker invalida solo su propia caché "
+              "(los demás ven datos de hasta CACHE_TTL segundos)")
+
+    print(f"🚀 Sistema de Inventario en http://{args.bind} "
+          f"({args.workers} workers x {args.threads} hilos)")
+    ServidorInventario(crear_app(), opciones_gunicorn(args)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Programador de tareas periódicas del Sistema de Inventario
+
+Un hilo en segundo plano ejecuta periódicamente la lista ``TAREAS``: la
+pasada completa de alertas, la consolidación del resumen del dashboard y
+el mantenimiento de las tablas auxiliares (eventos SSE, claves de
+idempotencia, snapshots de stock y retención de alertas, movimientos e
+historial de stock).
+Cada tarea vive en su módulo; este solo decide cuándo y dónde se ejecutan.
+
+Con varios workers (o varios servidores) cada uno arranca su hilo, pero
+solo ejecuta las tareas el que tiene el lock ``nombre_lock`` de MySQL.
+"""
+
+import os
+import threading
+import time
+
+from database.config import db_config
+from backend.alertas import generar_alertas_stock
+from backend.resumen import RESUMEN_INTERVALO, consolidar_resumen
+from backend.eventos import purgar_eventos
+from backend.reservas import purgar_claves_idempotencia
+from backend.historico_stock import snapshot_periodico
+from backend.retencion import aplicar_retencion
+
+# (nombre, función, intervalo) en el orden en que se ejecutan; con intervalo
+# None se usa TAREAS_INTERVALO y con 0 la tarea no se ejecuta. Las escrituras
+# de stock ya evalúan sus productos al momento; la pasada de alertas vuelve a
+# avisar de los que siguen bajo mínimo una vez vencida la ventana de un día.
+TAREAS = [
+    ('alertas', generar_alertas_stock, None),
+    # Cuanto más a menudo, menos cambios suma cada lectura del dashboard
+    ('resumen_dashboard', consolidar_resumen, RESUMEN_INTERVALO),
+    ('eventos', purgar_eventos, None),
+    ('claves_idempotencia', purgar_claves_idempotencia, None),
+    ('snapshot_stock', snapshot_periodico, None),
+    ('retencion', aplicar_retencion, None),
+]
+
+
+class ProgramadorTareas:
+    """Hilo que ejecuta ``tareas`` periódicamente en un solo worker.
+
+    ``intervalo`` es el de las tareas que no indican el suyo. El hilo se
+    despierta con el intervalo más corto y ejecuta las tareas vencidas.
+
+    El lock se mantiene en una conexión propia mientras el worker vive; si
+    el worker termina, otro lo toma en la siguiente vuelta. El error de una
+    tarea no impide que se ejecuten las siguientes.
+    """
+
+    def __init__(self, intervalo, tareas, nombre_lock='inventario_programador_tareas'):
+        self.intervalo = intervalo
+        self.tareas = [
+            (nombre, tarea, intervalo if propio is None else propio)
+            for nombre, tarea, propio in tareas
+        ]
+        self.nombre_lock = nombre_lock
+        self._proxima = {}
+        self._detener = threading.Event()
+        self._hilo = None
+        self._conexion_lock = None
+
+    @property
+    def espera(self):
+        """Segundos entre vueltas del hilo: el intervalo activo más corto (0 si no hay ninguno)"""
+        return min((intervalo for _, _, intervalo in self.tareas if intervalo > 0), default=0)
+
+    def iniciar(self):
+        """Arrancar el hilo (no hace nada si ya está corriendo o está desactivado)"""
+        if self.espera <= 0 or (self._hilo and self._hilo.is_alive()):
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name='programador-tareas', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join()
+            self._hilo = None
+        # Cerrar la conexión libera el lock para otro worker
+        self._soltar_lock()
+
+    def ejecutar_pasada(self, ahora=None):
+        """Ejecutar, en orden, las tareas activas cuyo intervalo ha vencido.
+
+        Retorna los nombres de las tareas ejecutadas.
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        ejecutadas = []
+        for nombre, tarea, intervalo in self.tareas:
+            if self._detener.is_set():
+                break
+            if intervalo <= 0 or self._proxima.get(nombre, 0) > ahora:
+                continue
+            self._proxima[nombre] = ahora + intervalo
+            ejecutadas.append(nombre)
+            try:
+                tarea()
+            except Exception as e:
+                print(f"Error en la tarea periódica {nombre}: {e}")
+        return ejecutadas
+
+    def _es_lider(self):
+        if self.nombre_lock is None:
+            return True
+
+        try:
+            if self._conexion_lock is not None:
+                # Seguimos siendo líderes mientras la sesión siga viva
+                self._conexion_lock.ping(reconnect=False)
+                return True
+
+            connection = db_config.conectar()
+            cursor = connection.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (self.nombre_lock,))
+            obtenido = cursor.fetchone()[0] == 1
+            cursor.close()
+
+            if obtenido:
+                self._conexion_lock = connection
+            else:
+                connection.close()
+            return obtenido
+
+        except Exception as e:
+            print(f"Error en el lock del programador de tareas: {e}")
+            self._soltar_lock()
+            return False
+
+    def _soltar_lock(self):
+        connection, self._conexion_lock = self._conexion_lock, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _ejecutar(self):
+        while not self._detener.is_set():
+            if self._es_lider():
+                self.ejecutar_pasada()
+            self._detener.wait(self.espera)
+
+
+# Intervalo en segundos de las tareas sin uno propio; 0 las desactiva.
+# ALERTAS_INTERVALO es el nombre anterior de la variable y se sigue aceptando
+programador_tareas = ProgramadorTareas(
+    float(os.getenv('TAREAS_INTERVALO', os.getenv('ALERTAS_INTERVALO', 300))), TAREAS
+)
@@ -3,38 +3,577 @@
 
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from contextlib import contextmanager
+import itertools
+import threading
+import time
 import os
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
+# Después de load_dotenv: lee sus ajustes (DB_SQLITE_*) al importarse
+from database.sqlite import conectar_sqlite
+
+# Segundos mínimos entre dos avisos de error de conexión
+AVISO_ERROR_CONEXION = float(os.getenv('DB_AVISO_ERROR_INTERVALO', 60))
+
+
+class ConexionPool:
+    """Envoltura de una conexión del pool.
+
+    Delega todo en la conexión real, salvo ``close()``, que la devuelve
+    al pool en lugar de cerrar el socket.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+        self.creada_en = time.monotonic()
+        self.usada_en = self.creada_en
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._connection.cursor(*args, **kwargs)
+        observador = self._pool.observador if self._pool is not None else None
+        if observador is not None:
+            return CursorMedido(cursor, observador)
+        return cursor
+
+    def close(self):
+        """Devolver la conexión al pool"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.devolver(self)
+
+    def descartar(self):
+        """Cerrar la conexión sin devolverla al pool (puede haber quedado inservible)"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.descartar(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CursorMedido:
+    """Cursor que informa al observador de la duración de cada sentencia.
+
+    Solo mide ``execute``/``executemany``; con cursores sin buffer la
+    lectura posterior de filas no se incluye.
+    """
+
+    def __init__(self, cursor, observador):
+        self._cursor = cursor
+        self._observador = observador
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def execute(self, operation, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            self._observador.consulta(operation, time.perf_counter() - inicio)
+
+    def executemany(self, operation, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, *args, **kwargs)
+        finally:
+            self._observador.consulta(operation, time.perf_counter() - inicio)
+
+
+class ConnectionPool:
+    """Pool de conexiones MySQL acotado y seguro entre hilos.
+
+    - ``size``: número máximo de conexiones abiertas a la vez.
+    - ``timeout``: segundos que se espera una conexión libre antes de fallar.
+    - ``recycle``: segundos tras los cuales una conexión se cierra y se reabre.
+    - ``ping_interval``: una conexión ociosa más tiempo que esto se verifica
+      con ``ping`` al entregarla.
+
+    Si se asigna ``observador`` (objeto con ``consulta(sql, segundos)``),
+    los cursores de las conexiones entregadas miden cada sentencia.
+    """
+
+    def __init__(self, factory, size=10, timeout=30, recycle=3600, ping_interval=30):
+        self._factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.observador = None
+        self._libres = []
+        self._abiertas = 0
+        self._cond = threading.Condition()
+
+    def obtener(self, timeout=None):
+        """Obtener una conexión, esperando hasta ``timeout`` segundos si el pool está lleno"""
+        timeout = self.timeout if timeout is None else timeout
+        limite = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._libres:
+                    conexion = self._libres.pop()
+                    break
+                if self._abiertas < self.size:
+                    self._abiertas += 1
+                    conexion = None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise PoolError(f"Pool agotado: {self.size} conexiones en uso")
+                self._cond.wait(restante)
+
+        if conexion is not None:
+            conexion = self._validar(conexion)
+            if conexion is not None:
+                conexion._pool = self
+                conexion.usada_en = time.monotonic()
+                return conexion
+
+        try:
+            return ConexionPool(self, self._factory())
+        except Exception:
+            self._liberar_hueco()
+            raise
+
+    def _validar(self, conexion):
+        """Descartar conexiones caducadas o caídas; devuelve None si no sirve"""
+        ahora = time.monotonic()
+        try:
+            if self.recycle and ahora - conexion.creada_en > self.recycle:
+                raise Error("conexión reciclada")
+            if ahora - conexion.usada_en > self.ping_interval:
+                conexion._connection.ping(reconnect=False)
+            return conexion
+        except Error:
+            self._cerrar(conexion)
+            return None
+
+    def devolver(self, conexion):
+        """Devolver una conexión al pool tras su uso.
+
+        Una conexión con resultados sin leer o que ya no responde se
+        descarta: al entregarla solo se verifican las que llevan más de
+        ``ping_interval`` segundos ociosas.
+        """
+        try:
+            connection = conexion._connection
+            if connection.unread_result or not connection.is_connected():
+                raise Error("conexión inservible")
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            self.descartar(conexion)
+            return
+
+        conexion.usada_en = time.monotonic()
+        with self._cond:
+            self._libres.append(conexion)
+            self._cond.notify()
+
+    def descartar(self, conexion):
+        """Cerrar una conexión entregada y liberar su hueco en el pool"""
+        self._cerrar(conexion)
+        self._liberar_hueco()
+
+    def _cerrar(self, conexion):
+        try:
+            conexion._connection.close()
+        except Error:
+            pass
+
+    def _liberar_hueco(self):
+        with self._cond:
+            self._abiertas -= 1
+            self._cond.notify()
+
+    def cerrar_todas(self):
+        """Cerrar las conexiones ociosas (p. ej. al apagar el servidor)"""
+        with self._cond:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+            self._cond.notify_all()
+        for conexion in libres:
+            self._cerrar(conexion)
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                'tamano': self.size,
+                'abiertas': self._abiertas,
+                'libres': len(self._libres),
+                'en_uso': self._abiertas - len(self._libres),
+            }
+
+
+class Replica:
+    """Réplica de lectura con su propio pool y su estado de salud.
+
+    Se expulsa (deja de recibir lecturas durante ``expulsion`` segundos) si
+    no acepta conexiones, si la replicación está parada o si va más de
+    ``retraso_maximo`` segundos por detrás del primario. El retraso se mide
+    con ``SHOW REPLICA STATUS`` como mucho cada ``intervalo`` segundos, en
+    la propia conexión que se va a entregar.
+    """
+
+    def __init__(self, host, port, pool, retraso_maximo, intervalo, expulsion):
+        self.host = host
+        self.port = port
+        self.pool = pool
+        self.retraso_maximo = retraso_maximo
+        self.intervalo = intervalo
+        self.expulsion = expulsion
+        self.retraso = None
+        self.motivo = None
+        self.expulsada_hasta = 0
+        self.comprobada_en = 0
+        self._comprobando = threading.Lock()
+
+    @property
+    def nombre(self):
+        return f"{self.host}:{self.port}"
+
+    def disponible(self, ahora=None):
+        return (ahora or time.monotonic()) >= self.expulsada_hasta
+
+    def expulsar(self, motivo):
+        if self.motivo != motivo:
+            print(f"Réplica {self.nombre} fuera de servicio: {motivo}")
+        self.motivo = motivo
+        self.expulsada_hasta = time.monotonic() + self.expulsion
+        # Al volver se comprueba el retraso antes de la primera lectura
+        self.comprobada_en = 0
+
+    def obtener(self):
+        """Conexión de la réplica, o None si está caída o retrasada (queda expulsada)"""
+        try:
+            conexion = self.pool.obtener()
+        except PoolError:
+            # Pool lleno: la réplica está sana, solo ocupada
+            return None
+        except Error as e:
+            self.expulsar(f"sin conexión ({e})")
+            return None
+
+        try:
+            self._comprobar(conexion)
+        except Error as e:
+            # La conexión puede haber quedado a medias: no vuelve al pool
+            conexion.descartar()
+            self.expulsar(f"error comprobando la replicación ({e})")
+            return None
+        if not self.disponible():
+            conexion.close()
+            return None
+        return conexion
+
+    def _comprobar(self, conexion):
+        if self.retraso_maximo <= 0:
+            # Sin comprobación de retraso (solo para pruebas): basta con conectar
+            self.motivo = None
+            return
+        if time.monotonic() - self.comprobada_en < self.intervalo:
+            return
+        # Un solo hilo comprueba y los demás usan el último resultado, salvo
+        # si aún no hay ninguno: entonces esperan a que termine
+        if not self._comprobando.acquire(blocking=self.comprobada_en == 0):
+            return
+        if self.comprobada_en and time.monotonic() - self.comprobada_en < self.intervalo:
+            self._comprobando.release()
+            return
+        try:
+            self.retraso = retraso_replicacion(conexion)
+            self.comprobada_en = time.monotonic()
+            if self.retraso is None:
+                self.expulsar("la replicación no está en marcha")
+            elif self.retraso > self.retraso_maximo:
+                self.expulsar(f"retraso de {self.retraso} s (máximo {self.retraso_maximo} s)")
+            else:
+                self.motivo = None
+        finally:
+            self._comprobando.release()
+
+    def estadisticas(self):
+        return {
+            'replica': self.nombre,
+            'disponible': self.disponible(),
+            'retraso': self.retraso,
+            'motivo': self.motivo,
+            **self.pool.estadisticas()
+        }
+
+
+def retraso_replicacion(conexion):
+    """Segundos de retraso de la réplica, o None si la replicación está parada"""
+    cursor = conexion.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Error:
+            # MySQL anterior a 8.0.22 y MariaDB
+            cursor.execute("SHOW SLAVE STATUS")
+        fila = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    if not fila:
+        return None
+    retraso = fila.get('Seconds_Behind_Source', fila.get('Seconds_Behind_Master'))
+    return int(retraso) if retraso is not None else None
+
+
+def interpretar_replicas(valor, puerto_defecto):
+    """``host[:puerto],host[:puerto]`` de ``DB_REPLICAS`` como lista de ``(host, puerto)``"""
+    replicas = []
+    for elemento in (valor or '').split(','):
+        elemento = elemento.strip()
+        if not elemento:
+            continue
+        host, _, puerto = elemento.partition(':')
+        replicas.append((host, int(puerto) if puerto else puerto_defecto))
+    return replicas
+
+
 class DatabaseConfig:
     def __init__(self):
+        # mysql (servidor) o sqlite (archivo local, ver database/sqlite.py)
+        self.motor = os.getenv('DB_MOTOR', 'mysql').lower()
+        if self.motor not in ('mysql', 'sqlite'):
+            raise ValueError(f"DB_MOTOR debe ser mysql o sqlite, no {self.motor}")
+        self.sqlite_ruta = os.getenv('DB_SQLITE_RUTA', os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'inventario.sqlite3'))
         self.host = os.getenv('DB_HOST', 'localhost')
         self.database = os.getenv('DB_NAME', 'inventario_db')
         self.user = os.getenv('DB_USER', 'root')
         self.password = os.getenv('DB_PASSWORD', '')
         self.port = os.getenv('DB_PORT', 3306)
+        self.pool_size = int(os.getenv('DB_POOL_SIZE', 10))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', 30))
+        self.pool_recycle = float(os.getenv('DB_POOL_RECYCLE', 3600))
+        # Réplicas de lectura: mismo usuario y base de datos que el primario
+        self.replicas_config = [] if self.motor == 'sqlite' else \
+            interpretar_replicas(os.getenv('DB_REPLICAS'), self.port)
+        self.replica_pool_size = int(os.getenv('DB_REPLICA_POOL_SIZE', self.pool_size))
+        self.replica_retraso_maximo = float(os.getenv('DB_REPLICA_RETRASO_MAXIMO', 5))
+        self.replica_intervalo = float(os.getenv('DB_REPLICA_INTERVALO', 5))
+        self.replica_expulsion = float(os.getenv('DB_REPLICA_EXPULSION', 30))
+        # Tras una escritura, las lecturas de este proceso van al primario
+        # hasta que cualquier réplica admitida tenga que haberla recibido
+        self.ventana_escritura = self.replica_retraso_maximo + self.replica_intervalo
+        self._pool = None
+        self._replicas = None
+        self._pool_lock = threading.Lock()
+        self._turno = itertools.count()
+        self._ultima_escritura = None
+        self._aviso_lock = threading.Lock()
+        self._ultimo_aviso = None
+        self._errores_omitidos = 0
+        # Instrumentación opcional: ver instrumentar()
+        self.observador = None
+
+    def conectar(self, host=None, port=None):
+        """Abrir una conexión nueva, sin pasar por el pool (al primario por defecto)"""
+        if self.motor == 'sqlite':
+            return conectar_sqlite(self.sqlite_ruta)
+        return mysql.connector.connect(
+            host=host or self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=port or self.port,
+            autocommit=True
+        )
+
+    @property
+    def pool(self):
+        """Pool de conexiones, creado de forma perezosa en el primer uso"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self.conectar,
+                        size=self.pool_size,
+                        timeout=self.pool_timeout,
+                        recycle=self.pool_recycle
+                    )
+                    self._pool.observador = self.observador
+        return self._pool
+
+    @property
+    def replicas(self):
+        """Réplicas de ``DB_REPLICAS`` (lista vacía si no hay), creadas en el primer uso"""
+        if self._replicas is None:
+            with self._pool_lock:
+                if self._replicas is None:
+                    replicas = []
+                    for host, port in self.replicas_config:
+                        pool = ConnectionPool(
+                            lambda host=host, port=port: self.conectar(host, port),
+                            size=self.replica_pool_size,
+                            timeout=0,
+                            recycle=self.pool_recycle
+                        )
+                        pool.observador = self.observador
+                        replicas.append(Replica(host, port, pool, self.replica_retraso_maximo,
+                                                self.replica_intervalo, self.replica_expulsion))
+                    self._replicas = replicas
+        return self._replicas
 
-    def get_connection(self):
-        """Obtener conexión a la base de datos"""
-        try:
-            connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port,
-                autocommit=True
-            )
-            if connection.is_connected():
-                print(f"Conectado a MySQL: {self.database}")
-                return connection
+    def reiniciar_pool(self):
+        """Olvidar los pools heredados tras un fork.
+
+        Las conexiones del proceso padre no se cierran (enviaría QUIT por
+        un socket compartido); el hijo crea sus propios pools en el primer uso.
+        """
+        self._pool_lock = threading.Lock()
+        self._aviso_lock = threading.Lock()
+        self._pool = None
+        self._replicas = None
+        self._ultima_escritura = None
+
+    def cerrar_pool(self):
+        """Cerrar las conexiones de los pools al apagar el proceso"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            replicas, self._replicas = self._replicas or [], None
+        if pool is not None:
+            pool.cerrar_todas()
+        for replica in replicas:
+            replica.pool.cerrar_todas()
+
+    def instrumentar(self, observador):
+        """Activar la medición de consultas y de espera de conexiones.
+
+        ``observador`` debe tener ``consulta(sql, segundos)`` y
+        ``espera_conexion(segundos)``. Con ``None`` se desactiva.
+        """
+        self.observador = observador
+        if self._pool is not None:
+            self._pool.observador = observador
+        for replica in self._replicas or []:
+            replica.pool.observador = observador
+
+    def marcar_escritura(self):
+        """Enviar al primario las lecturas de este proceso durante ``ventana_escritura`` segundos"""
+        self._ultima_escritura = time.monotonic()
+
+    def leer_del_primario(self):
+        """True si no hay réplicas o si hubo una escritura reciente en este proceso"""
+        if not self.replicas_config:
+            return True
+        ultima = self._ultima_escritura
+        return ultima is not None and time.monotonic() - ultima < self.ventana_escritura
+
+    def conexion_replica(self):
+        """Conexión de la réplica disponible menos ocupada, o None si ninguna sirve.
+
+        A igualdad de conexiones en uso se reparte por turnos.
+        """
+        replicas = self.replicas
+        if not replicas:
+            return None
+
+        ahora = time.monotonic()
+        inicio = next(self._turno) % len(replicas)
+        candidatas = [replica for replica in replicas[inicio:] + replicas[:inicio]
+                      if replica.disponible(ahora)]
+        candidatas.sort(key=lambda replica: replica.pool.estadisticas()['en_uso'])
+
+        for replica in candidatas:
+            conexion = replica.obtener()
+            if conexion is not None:
+                return conexion
+        return None
+
+    def get_connection(self, lectura=False):
+        """Obtener conexión del pool (``close()`` la devuelve al pool).
+
+        Con ``lectura=True`` se usa una réplica si hay alguna disponible; si
+        no, el primario.
+        """
+        try:
+            if self.observador is None:
+                return self._obtener(lectura)
+
+            inicio = time.perf_counter()
+            try:
+                return self._obtener(lectura)
+            finally:
+                self.observador.espera_conexion(time.perf_counter() - inicio)
         except Error as e:
-            print(f"Error conectando a MySQL: {e}")
+            self._avisar_error_conexion(e)
             return None
 
+    def _avisar_error_conexion(self, error):
+        """Informar de un error de conexión como mucho una vez cada ``AVISO_ERROR_CONEXION`` segundos.
+
+        Con la base de datos caída fallan todas las peticiones; los errores
+        intermedios solo se cuentan y se resumen en el siguiente aviso.
+        """
+        ahora = time.monotonic()
+        with self._aviso_lock:
+            if self._ultimo_aviso is not None and ahora - self._ultimo_aviso < AVISO_ERROR_CONEXION:
+                self._errores_omitidos += 1
+                return
+            omitidos, self._errores_omitidos = self._errores_omitidos, 0
+            self._ultimo_aviso = ahora
+
+        resumen = f" ({omitidos} errores más desde el aviso anterior)" if omitidos else ""
+        print(f"Error conectando a la base de datos: {error}{resumen}")
+
+    def _obtener(self, lectura):
+        if lectura and not self.leer_del_primario():
+            conexion = self.conexion_replica()
+            if conexion is not None:
+                return conexion
+        return self.pool.obtener()
+
+    @contextmanager
+    def connection(self, lectura=False, escritura=False):
+        """Context manager que devuelve la conexión al pool al salir.
+
+        Entrega ``None`` si no se pudo obtener conexión, igual que
+        ``get_connection``.
+
+        - ``lectura=True``: consultas de solo lectura, que admiten el retraso
+          acotado de una réplica.
+        - ``escritura=True``: al salir se llama a ``marcar_escritura()`` para
+          que las lecturas siguientes vean el cambio.
+        """
+        connection = self.get_connection(lectura)
+        try:
+            yield connection
+        finally:
+            if connection:
+                connection.close()
+            if escritura:
+                self.marcar_escritura()
+
+    def estado_replicas(self):
+        """Estado y pool de cada réplica (lista vacía si no hay réplicas)"""
+        return [replica.estadisticas() for replica in self.replicas]
+
     def test_connection(self):
         """Probar la conexión a la base de datos"""
         connection = self.get_connection()
@@ -44,4 +583,4 @@ class DatabaseConfig:
         return False
 
 # Instancia global de configuración
-db_config = DatabaseConfig() 
\ No newline at end of file
+db_config = DatabaseConfig()
@@ -0,0 +1,111 @@
+# Configuración asíncrona de la Base de Datos
+# Sistema de Gestión de Inventario Inteligente
+#
+# Pool de conexiones aiomysql para backend/app_async.py. Usa los mismos
+# parámetros de conexión que DatabaseConfig (database/config.py). Solo
+# admite MySQL y lee siempre del primario (no usa DB_REPLICAS).
+
+from contextlib import asynccontextmanager
+import asyncio
+import os
+
+import aiomysql
+from pymysql.err import MySQLError
+
+from database.config import db_config
+
+
+class DatabaseConfigAsync:
+    """Pool aiomysql creado de forma perezosa en el event loop que lo usa"""
+
+    def __init__(self, config=db_config):
+        if config.motor != 'mysql':
+            # Sin esto cada petición fallaría al conectar con el MySQL por defecto
+            raise ValueError(
+                f"La API asíncrona (backend/app_async.py) solo admite MySQL y DB_MOTOR es "
+                f"{config.motor}; usar la API síncrona (backend/app.py o backend/servidor.py)"
+            )
+        self.config = config
+        self.pool_size = int(os.getenv('DB_POOL_ASYNC_SIZE', 20))
+        self.pool_recycle = int(config.pool_recycle)
+        self.pool_timeout = config.pool_timeout
+        self._pool = None
+        self._pool_lock = None
+
+    async def pool(self):
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await aiomysql.create_pool(
+                        host=self.config.host,
+                        port=int(self.config.port),
+                        user=self.config.user,
+                        password=self.config.password,
+                        db=self.config.database,
+                        minsize=1,
+                        maxsize=self.pool_size,
+                        pool_recycle=self.pool_recycle,
+                        autocommit=True,
+                        charset='utf8mb4'
+                    )
+        return self._pool
+
+    @asynccontextmanager
+    async def connection(self):
+        """Conexión del pool; entrega ``None`` si no se pudo obtener, como ``db_config.connection()``"""
+        try:
+            pool = await self.pool()
+            connection = await asyncio.wait_for(pool.acquire(), self.pool_timeout)
+        except (MySQLError, OSError, asyncio.TimeoutError) as e:
+            print(f"Error conectando a MySQL: {e}")
+            yield None
+            return
+
+        try:
+            yield connection
+        finally:
+            pool.release(connection)
+
+    async def consultar(self, query, params=None, uno=False):
+        """Ejecutar una consulta en una conexión propia y devolver las filas como dicts"""
+        async with self.connection() as connection:
+            if not connection:
+                raise ConnectionError('Error de conexión a la base de datos')
+
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params)
+                if uno:
+                    return await cursor.fetchone()
+                return await cursor.fetchall()
+
+    async def ejecutar(self, query, params=None):
+        """Ejecutar una sentencia de escritura y devolver las filas afectadas"""
+        async with self.connection() as connection:
+            if not connection:
+                raise ConnectionError('Error de conexión a la base de datos')
+
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, params)
+                return cursor.rowcount
+
+    def estadisticas(self):
+        if self._pool is None:
+            return {'tamano': self.pool_size, 'abiertas': 0, 'libres': 0, 'en_uso': 0}
+        return {
+            'tamano': self._pool.maxsize,
+            'abiertas': self._pool.size,
+            'libres': self._pool.freesize,
+            'en_uso': self._pool.size - self._pool.freesize,
+        }
+
+    async def cerrar(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.close()
+            await pool.wait_closed()
+
+
+# Instancia global de configuración asíncrona
+db_config_async = DatabaseConfigAsync()
@@ -10,6 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.config import db_config
+from database.migrar import aplicar_migraciones
 import mysql.connector
 
 def crear_base_datos():
@@ -38,43 +39,19 @@ def crear_base_datos():
         print(f"❌ Error creando base de datos: {e}")
         return False
 
-def ejecutar_schema():
-    """Ejecutar el archivo schema.sql"""
-    try:
-        connection = db_config.get_connection()
-        if not connection:
-            return False
-            
-        cursor = connection.cursor()
-        
-        # Leer y ejecutar el archivo schema.sql
-        schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-        
-        with open(schema_path, 'r', encoding='utf-8') as file:
-            sql_commands = file.read()
-            
-        # Dividir por comandos SQL (separados por ;)
-        commands = [cmd.strip() for cmd in sql_commands.split(';') if cmd.strip()]
-        
-        for command in commands:
-            if command:
-                cursor.execute(command)
-                print(f"✅ Comando ejecutado: {command[:50]}...")
-        
-        cursor.close()
-        connection.close()
-        print("✅ Esquema de base de datos creado exitosamente")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error ejecutando schema: {e}")
-        return False
-
 def main():
     """Función principal"""
     print("🚀 Inicializando Sistema de Inventario...")
     print("=" * 50)
     
+    if db_config.motor == 'sqlite':
+        # El esquema se crea al abrir por primera vez el archivo
+        if db_config.test_connection():
+            print(f"✅ Base de datos SQLite lista en {db_config.sqlite_ruta}")
+        else:
+            print(f"❌ No se pudo abrir {db_config.sqlite_ruta}")
+        return
+    
     # Probar conexión
     print("📡 Probando conexión a MySQL...")
     if not db_config.test_connection():
@@ -92,9 +69,16 @@ def main():
     if not crear_base_datos():
         return
     
-    # Ejecutar schema
-    print("\n📋 Creando tablas...")
-    if not ejecutar_schema():
+    # Aplicar schema.sql y las migraciones pendientes
+    print("\n📋 Aplicando migraciones...")
+    try:
+        connection = db_config.conectar()
+        try:
+            aplicar_migraciones(connection)
+        finally:
+            connection.close()
+    except Exception as e:
+        print(f"❌ Error aplicando migraciones: {e}")
         return
     
     print("\n🎉 ¡Base de datos inicializada exitosamente!")
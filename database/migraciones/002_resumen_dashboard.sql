@@ -0,0 +1,102 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Resumen del dashboard mantenido de forma incremental
+--
+-- Los triggers suman y restan la contribución de cada fila modificada, de
+-- modo que GET /api/dashboard lee unas pocas filas en lugar de recorrer
+-- todo el catálogo. Es idempotente: se puede volver a ejecutar sobre una
+-- base de datos existente para reinstalar los triggers y reconstruir los
+-- totales.
+--
+-- Cada trigger es una única sentencia (sin BEGIN ... END) para que el
+-- archivo se pueda ejecutar sin cambiar el delimitador.
+
+-- Totales por categoría (categoria_id = 0 agrupa los productos sin categoría)
+CREATE TABLE IF NOT EXISTS resumen_categorias (
+    categoria_id INT PRIMARY KEY,
+    total_productos INT NOT NULL DEFAULT 0,
+    stock_bajo INT NOT NULL DEFAULT 0,
+    agotados INT NOT NULL DEFAULT 0,
+    valor_inventario DECIMAL(16,2) NOT NULL DEFAULT 0
+);
+
+-- Contador de alertas sin leer (una sola fila, id = 1)
+CREATE TABLE IF NOT EXISTS resumen_alertas (
+    id TINYINT PRIMARY KEY,
+    no_leidas INT NOT NULL DEFAULT 0
+);
+
+DROP TRIGGER IF EXISTS productos_resumen_insert;
+DROP TRIGGER IF EXISTS productos_resumen_update;
+DROP TRIGGER IF EXISTS productos_resumen_delete;
+DROP TRIGGER IF EXISTS alertas_resumen_insert;
+DROP TRIGGER IF EXISTS alertas_resumen_update;
+DROP TRIGGER IF EXISTS alertas_resumen_delete;
+
+CREATE TRIGGER productos_resumen_insert AFTER INSERT ON productos FOR EACH ROW
+INSERT INTO resumen_categorias (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+VALUES (
+    IFNULL(NEW.categoria_id, 0),
+    IF(NEW.activo, 1, 0),
+    IF(NEW.activo AND IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+    IF(NEW.activo AND IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+    IF(NEW.activo, NEW.precio * IFNULL(NEW.stock_actual, 0), 0)
+)
+ON DUPLICATE KEY UPDATE
+    total_productos = total_productos + VALUES(total_productos),
+    stock_bajo = stock_bajo + VALUES(stock_bajo),
+    agotados = agotados + VALUES(agotados),
+    valor_inventario = valor_inventario + VALUES(valor_inventario);
+
+-- Resta la contribución anterior y suma la nueva (pueden ser categorías distintas)
+CREATE TRIGGER productos_resumen_update AFTER UPDATE ON productos FOR EACH ROW
+INSERT INTO resumen_categorias (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+VALUES (
+    IFNULL(OLD.categoria_id, 0),
+    -IF(OLD.activo, 1, 0),
+    -IF(OLD.activo AND IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+    -IF(OLD.activo AND IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+    -IF(OLD.activo, OLD.precio * IFNULL(OLD.stock_actual, 0), 0)
+), (
+    IFNULL(NEW.categoria_id, 0),
+    IF(NEW.activo, 1, 0),
+    IF(NEW.activo AND IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+    IF(NEW.activo AND IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+    IF(NEW.activo, NEW.precio * IFNULL(NEW.stock_actual, 0), 0)
+)
+ON DUPLICATE KEY UPDATE
+    total_productos = total_productos + VALUES(total_productos),
+    stock_bajo = stock_bajo + VALUES(stock_bajo),
+    agotados = agotados + VALUES(agotados),
+    valor_inventario = valor_inventario + VALUES(valor_inventario);
+
+CREATE TRIGGER productos_resumen_delete AFTER DELETE ON productos FOR EACH ROW
+UPDATE resumen_categorias SET
+    total_productos = total_productos - IF(OLD.activo, 1, 0),
+    stock_bajo = stock_bajo - IF(OLD.activo AND IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+    agotados = agotados - IF(OLD.activo AND IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+    valor_inventario = valor_inventario - IF(OLD.activo, OLD.precio * IFNULL(OLD.stock_actual, 0), 0)
+WHERE categoria_id = IFNULL(OLD.categoria_id, 0);
+
+CREATE TRIGGER alertas_resumen_insert AFTER INSERT ON alertas FOR EACH ROW
+UPDATE resumen_alertas SET no_leidas = no_leidas + IF(NEW.leida, 0, 1) WHERE id = 1;
+
+CREATE TRIGGER alertas_resumen_update AFTER UPDATE ON alertas FOR EACH ROW
+UPDATE resumen_alertas SET no_leidas = no_leidas + IF(NEW.leida, 0, 1) - IF(OLD.leida, 0, 1) WHERE id = 1;
+
+CREATE TRIGGER alertas_resumen_delete AFTER DELETE ON alertas FOR EACH ROW
+UPDATE resumen_alertas SET no_leidas = no_leidas - IF(OLD.leida, 0, 1) WHERE id = 1;
+
+-- Reconstruir los totales a partir de los datos actuales
+DELETE FROM resumen_categorias;
+
+INSERT INTO resumen_categorias (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+SELECT IFNULL(categoria_id, 0),
+       SUM(IF(activo, 1, 0)),
+       SUM(IF(activo AND IFNULL(stock_actual, 0) <= IFNULL(stock_minimo, 0), 1, 0)),
+       SUM(IF(activo AND IFNULL(stock_actual, 0) = 0, 1, 0)),
+       SUM(IF(activo, precio * IFNULL(stock_actual, 0), 0))
+FROM productos
+GROUP BY IFNULL(categoria_id, 0);
+
+REPLACE INTO resumen_alertas (id, no_leidas)
+SELECT 1, COUNT(*) FROM alertas WHERE leida = FALSE;
@@ -0,0 +1,9 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Índice de búsqueda de productos para bases de datos creadas antes de
+-- que schema.sql lo incluyera (en las nuevas ya existe y se omite).
+--
+-- La búsqueda por código usa el índice UNIQUE de productos.codigo.
+-- Con la colación por defecto de MySQL 8 (utf8mb4_0900_ai_ci) las
+-- coincidencias no distinguen mayúsculas ni acentos.
+
+ALTER TABLE productos ADD FULLTEXT INDEX ft_productos_busqueda (nombre, descripcion);
@@ -0,0 +1,27 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Índices para los predicados más frecuentes de la API
+--
+-- InnoDB añade la clave primaria al final de cada índice secundario, así
+-- que (activo, nombre) también sirve para el orden (nombre, id) del
+-- listado paginado.
+
+-- Listado y paginación por cursor de GET /api/productos
+CREATE INDEX idx_productos_activo_nombre ON productos (activo, nombre);
+
+-- Productos agotados / con stock bajo (motor de alertas y búsqueda)
+CREATE INDEX idx_productos_activo_stock ON productos (activo, stock_actual);
+
+-- Comprobación de alertas duplicadas en las últimas 24 horas
+CREATE INDEX idx_alertas_producto_tipo_fecha ON alertas (producto_id, tipo_alerta, fecha_alerta);
+
+-- Alertas recientes de GET /api/alertas
+CREATE INDEX idx_alertas_fecha ON alertas (fecha_alerta);
+
+-- Historial de un producto
+CREATE INDEX idx_movimientos_producto_fecha ON movimientos_inventario (producto_id, fecha_movimiento);
+
+-- Carga del historial por rango de fechas del job de predicción
+CREATE INDEX idx_movimientos_fecha ON movimientos_inventario (fecha_movimiento);
+
+-- Última ejecución de GET /api/predicciones
+CREATE INDEX idx_predicciones_fecha ON predicciones_demanda (fecha_prediccion);
@@ -0,0 +1,88 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Registro de eventos para GET /api/eventos (Server-Sent Events)
+--
+-- Los triggers anotan cada alta/cambio de producto y cada alerta creada o
+-- leída, así que se capturan todas las escrituras (API, importación CSV,
+-- movimientos, scripts) sin importar qué proceso o worker las haga. El id
+-- autoincremental es el ``id`` del evento SSE con el que el cliente reanuda
+-- (``Last-Event-ID``).
+--
+-- Los datos llevan el mismo formato que devuelve la API: el precio como
+-- texto y las fechas en formato HTTP, como las serializa Flask.
+--
+-- Cada trigger es una única sentencia (sin BEGIN ... END) para que el
+-- archivo se pueda ejecutar sin cambiar el delimitador.
+
+CREATE TABLE IF NOT EXISTS eventos (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    tipo VARCHAR(40) NOT NULL,
+    entidad_id INT NOT NULL,
+    datos JSON NOT NULL,
+    creado_en TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_eventos_creado (creado_en)
+);
+
+DROP TRIGGER IF EXISTS productos_eventos_insert;
+DROP TRIGGER IF EXISTS productos_eventos_update;
+DROP TRIGGER IF EXISTS alertas_eventos_insert;
+DROP TRIGGER IF EXISTS alertas_eventos_update;
+
+CREATE TRIGGER productos_eventos_insert AFTER INSERT ON productos FOR EACH ROW
+INSERT INTO eventos (tipo, entidad_id, datos)
+VALUES ('producto_creado', NEW.id, JSON_OBJECT(
+    'id', NEW.id,
+    'codigo', NEW.codigo,
+    'nombre', NEW.nombre,
+    'descripcion', NEW.descripcion,
+    'precio', CAST(NEW.precio AS CHAR),
+    'stock_actual', NEW.stock_actual,
+    'stock_minimo', NEW.stock_minimo,
+    'categoria_id', NEW.categoria_id,
+    'categoria_nombre', (SELECT nombre FROM categorias WHERE id = NEW.categoria_id),
+    'imagen_url', NEW.imagen_url,
+    'activo', NEW.activo
+));
+
+-- Un cambio de stock se publica como stock_cambiado con el valor anterior
+CREATE TRIGGER productos_eventos_update AFTER UPDATE ON productos FOR EACH ROW
+INSERT INTO eventos (tipo, entidad_id, datos)
+VALUES (
+    IF(NEW.stock_actual <=> OLD.stock_actual, 'producto_actualizado', 'stock_cambiado'),
+    NEW.id,
+    JSON_OBJECT(
+        'id', NEW.id,
+        'codigo', NEW.codigo,
+        'nombre', NEW.nombre,
+        'descripcion', NEW.descripcion,
+        'precio', CAST(NEW.precio AS CHAR),
+        'stock_actual', NEW.stock_actual,
+        'stock_anterior', OLD.stock_actual,
+        'stock_minimo', NEW.stock_minimo,
+        'categoria_id', NEW.categoria_id,
+        'categoria_nombre', (SELECT nombre FROM categorias WHERE id = NEW.categoria_id),
+        'imagen_url', NEW.imagen_url,
+        'activo', NEW.activo
+    )
+);
+
+CREATE TRIGGER alertas_eventos_insert AFTER INSERT ON alertas FOR EACH ROW
+INSERT INTO eventos (tipo, entidad_id, datos)
+SELECT 'alerta_creada', NEW.id, JSON_OBJECT(
+    'id', NEW.id,
+    'producto_id', NEW.producto_id,
+    'tipo_alerta', NEW.tipo_alerta,
+    'mensaje', NEW.mensaje,
+    'leida', NEW.leida,
+    'fecha_alerta', DATE_FORMAT(NEW.fecha_alerta, '%a, %d %b %Y %H:%i:%s GMT'),
+    'producto_nombre', p.nombre,
+    'producto_codigo', p.codigo
+)
+FROM productos p
+WHERE p.id = NEW.producto_id;
+
+-- Solo publica cuando cambia el estado de lectura
+CREATE TRIGGER alertas_eventos_update AFTER UPDATE ON alertas FOR EACH ROW
+INSERT INTO eventos (tipo, entidad_id, datos)
+SELECT 'alerta_leida', NEW.id, JSON_OBJECT('id', NEW.id, 'leida', NEW.leida)
+FROM DUAL
+WHERE NOT (NEW.leida <=> OLD.leida);
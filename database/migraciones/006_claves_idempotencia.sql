@@ -0,0 +1,14 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Claves de idempotencia de POST /api/stock/descontar
+--
+-- Un pedido guarda su clave y su respuesta en la misma transacción que
+-- descuenta el stock; un reintento con la misma clave devuelve la respuesta
+-- guardada. Las claves se purgan tras IDEMPOTENCIA_RETENCION_HORAS.
+
+CREATE TABLE IF NOT EXISTS claves_idempotencia (
+    clave VARCHAR(100) PRIMARY KEY,
+    huella CHAR(64) NOT NULL,
+    respuesta JSON NULL,
+    creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_claves_idempotencia_creado (creado_en)
+);
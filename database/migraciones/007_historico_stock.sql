@@ -0,0 +1,75 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Stock histórico: libro de cambios de stock y snapshots periódicos
+--
+-- movimientos_inventario solo recoge lo que pasa por la API de movimientos
+-- y de pedidos; el alta de productos, la edición manual y la importación CSV
+-- cambian stock_actual sin dejar movimiento. Por eso los triggers anotan en
+-- cambios_stock toda variación de stock_actual, venga de donde venga, y el
+-- stock de un producto en la fecha T es la suma de sus cambios hasta T.
+--
+-- snapshots_stock guarda esa suma para todo el catálogo cada
+-- SNAPSHOT_INTERVALO_HORAS; GET /api/stock/historico parte del snapshot más
+-- cercano y suma o resta solo los cambios entre ambas fechas.
+--
+-- Cada trigger es una única sentencia (sin BEGIN ... END) para que el
+-- archivo se pueda ejecutar sin cambiar el delimitador.
+
+CREATE TABLE IF NOT EXISTS cambios_stock (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    producto_id INT NOT NULL,
+    variacion INT NOT NULL,
+    fecha TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    INDEX idx_cambios_stock_producto_fecha (producto_id, fecha),
+    INDEX idx_cambios_stock_fecha (fecha)
+);
+
+CREATE TABLE IF NOT EXISTS snapshots_stock (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    fecha TIMESTAMP(3) NOT NULL,
+    productos INT NOT NULL,
+    creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX idx_snapshots_stock_fecha (fecha)
+);
+
+-- Solo filas con stock distinto de 0; un producto ausente tenía stock 0
+CREATE TABLE IF NOT EXISTS snapshots_stock_productos (
+    snapshot_id INT NOT NULL,
+    producto_id INT NOT NULL,
+    stock INT NOT NULL,
+    PRIMARY KEY (snapshot_id, producto_id)
+);
+
+-- Historia previa: los movimientos registrados más un saldo de apertura por
+-- producto, de modo que la suma de todos los cambios sea el stock actual
+INSERT INTO cambios_stock (producto_id, variacion, fecha)
+SELECT historia.producto_id, historia.variacion, historia.fecha
+FROM (
+    SELECT m.producto_id,
+           IF(m.tipo_movimiento = 'salida', -m.cantidad, m.cantidad) AS variacion,
+           m.fecha_movimiento AS fecha
+    FROM movimientos_inventario m
+    UNION ALL
+    SELECT p.id,
+           IFNULL(p.stock_actual, 0) - IFNULL(SUM(IF(m.tipo_movimiento = 'salida', -m.cantidad, m.cantidad)), 0),
+           LEAST(p.created_at, IFNULL(MIN(m.fecha_movimiento), p.created_at))
+    FROM productos p
+    LEFT JOIN movimientos_inventario m ON m.producto_id = p.id
+    GROUP BY p.id, p.stock_actual, p.created_at
+) historia
+WHERE historia.variacion <> 0
+AND NOT EXISTS (SELECT 1 FROM cambios_stock);
+
+DROP TRIGGER IF EXISTS productos_stock_insert;
+DROP TRIGGER IF EXISTS productos_stock_update;
+
+CREATE TRIGGER productos_stock_insert AFTER INSERT ON productos FOR EACH ROW
+INSERT INTO cambios_stock (producto_id, variacion)
+SELECT NEW.id, NEW.stock_actual
+FROM DUAL
+WHERE IFNULL(NEW.stock_actual, 0) <> 0;
+
+CREATE TRIGGER productos_stock_update AFTER UPDATE ON productos FOR EACH ROW
+INSERT INTO cambios_stock (producto_id, variacion)
+SELECT NEW.id, IFNULL(NEW.stock_actual, 0) - IFNULL(OLD.stock_actual, 0)
+FROM DUAL
+WHERE NOT (NEW.stock_actual <=> OLD.stock_actual);
@@ -0,0 +1,50 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Retención: archivo de movimientos y compactación de alertas leídas
+--
+-- El motor de alertas vuelve a avisar cada día de los productos que siguen
+-- bajo mínimo y el libro de movimientos solo crece, así que las tablas que
+-- consulta la API acumulan filas que ya nadie lee. backend/retencion.py
+-- mueve por lotes:
+-- - los movimientos más antiguos que MOVIMIENTOS_RETENCION_DIAS a
+--   movimientos_inventario_archivo, con las mismas columnas;
+-- - las alertas leídas más antiguas que ALERTAS_RETENCION_DIAS a
+--   alertas_archivo, compactadas en una fila por producto, tipo y mes.
+--
+-- movimientos_inventario y alertas no se particionan: InnoDB no admite
+-- claves foráneas en tablas particionadas y la columna de partición tendría
+-- que formar parte de la clave primaria. El archivo sí se particiona por
+-- mes (retencion.py crea las particiones que faltan), de modo que descartar
+-- los meses más antiguos que ARCHIVO_RETENCION_MESES es un DROP PARTITION y
+-- no un DELETE.
+
+CREATE TABLE IF NOT EXISTS movimientos_inventario_archivo (
+    id INT NOT NULL,
+    producto_id INT NOT NULL,
+    tipo_movimiento ENUM('entrada', 'salida', 'ajuste') NOT NULL,
+    cantidad INT NOT NULL,
+    motivo VARCHAR(200),
+    usuario_id INT,
+    fecha_movimiento TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, fecha_movimiento),
+    INDEX idx_movimientos_archivo_producto_fecha (producto_id, fecha_movimiento),
+    INDEX idx_movimientos_archivo_fecha (fecha_movimiento)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(fecha_movimiento)) (
+    PARTITION p_inicial VALUES LESS THAN (UNIX_TIMESTAMP('2000-01-01 00:00:00')),
+    PARTITION p_futuro VALUES LESS THAN MAXVALUE
+);
+
+-- mes es el primer día del mes de las alertas compactadas
+CREATE TABLE IF NOT EXISTS alertas_archivo (
+    producto_id INT NOT NULL,
+    tipo_alerta ENUM('stock_bajo', 'stock_agotado', 'prediccion_demanda') NOT NULL,
+    mes DATE NOT NULL,
+    alertas INT NOT NULL,
+    primera TIMESTAMP NOT NULL,
+    ultima TIMESTAMP NOT NULL,
+    PRIMARY KEY (producto_id, tipo_alerta, mes),
+    INDEX idx_alertas_archivo_mes (mes)
+);
+
+-- Selección de alertas leídas antiguas por lotes
+CREATE INDEX idx_alertas_leida_fecha ON alertas (leida, fecha_alerta);
@@ -0,0 +1,115 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Resumen del dashboard con filas de cambios en lugar de contadores compartidos
+--
+-- Con los triggers de 002_resumen_dashboard.sql cada escritura de stock
+-- actualizaba la fila de su categoría en resumen_categorias, y cada alerta
+-- la única fila de resumen_alertas, dentro de la transacción de quien
+-- escribía: las ventas, movimientos, importaciones y ediciones de una
+-- categoría se esperaban unas a otras en esa fila hasta el commit.
+--
+-- Ahora los triggers solo insertan su contribución (positiva o negativa)
+-- como una fila nueva de resumen_categorias_deltas o resumen_alertas_deltas,
+-- que no bloquea a nadie. GET /api/dashboard suma el resumen y los cambios
+-- pendientes, y backend/resumen.py los consolida en el resumen cada
+-- RESUMEN_INTERVALO segundos.
+--
+-- Cada trigger es una única sentencia (sin BEGIN ... END) para que el
+-- archivo se pueda ejecutar sin cambiar el delimitador.
+
+CREATE TABLE IF NOT EXISTS resumen_categorias_deltas (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    categoria_id INT NOT NULL,
+    total_productos INT NOT NULL,
+    stock_bajo INT NOT NULL,
+    agotados INT NOT NULL,
+    valor_inventario DECIMAL(16,2) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS resumen_alertas_deltas (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    no_leidas INT NOT NULL
+);
+
+DROP TRIGGER IF EXISTS productos_resumen_insert;
+DROP TRIGGER IF EXISTS productos_resumen_update;
+DROP TRIGGER IF EXISTS productos_resumen_delete;
+DROP TRIGGER IF EXISTS alertas_resumen_insert;
+DROP TRIGGER IF EXISTS alertas_resumen_update;
+DROP TRIGGER IF EXISTS alertas_resumen_delete;
+
+-- Los productos inactivos no cuentan: no generan fila
+CREATE TRIGGER productos_resumen_insert AFTER INSERT ON productos FOR EACH ROW
+INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+SELECT IFNULL(NEW.categoria_id, 0), 1,
+       IF(IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+       IF(IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+       NEW.precio * IFNULL(NEW.stock_actual, 0)
+FROM DUAL
+WHERE NEW.activo;
+
+-- Resta la contribución anterior y suma la nueva (pueden ser categorías
+-- distintas), solo si cambió alguna columna que cuenta en el resumen
+CREATE TRIGGER productos_resumen_update AFTER UPDATE ON productos FOR EACH ROW
+INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+SELECT IFNULL(OLD.categoria_id, 0), -1,
+       -IF(IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+       -IF(IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+       -(OLD.precio * IFNULL(OLD.stock_actual, 0))
+FROM DUAL
+WHERE OLD.activo AND NOT (
+    OLD.categoria_id <=> NEW.categoria_id AND OLD.activo <=> NEW.activo
+    AND OLD.stock_actual <=> NEW.stock_actual AND OLD.stock_minimo <=> NEW.stock_minimo
+    AND OLD.precio <=> NEW.precio
+)
+UNION ALL
+SELECT IFNULL(NEW.categoria_id, 0), 1,
+       IF(IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+       IF(IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+       NEW.precio * IFNULL(NEW.stock_actual, 0)
+FROM DUAL
+WHERE NEW.activo AND NOT (
+    OLD.categoria_id <=> NEW.categoria_id AND OLD.activo <=> NEW.activo
+    AND OLD.stock_actual <=> NEW.stock_actual AND OLD.stock_minimo <=> NEW.stock_minimo
+    AND OLD.precio <=> NEW.precio
+);
+
+CREATE TRIGGER productos_resumen_delete AFTER DELETE ON productos FOR EACH ROW
+INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+SELECT IFNULL(OLD.categoria_id, 0), -1,
+       -IF(IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+       -IF(IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+       -(OLD.precio * IFNULL(OLD.stock_actual, 0))
+FROM DUAL
+WHERE OLD.activo;
+
+CREATE TRIGGER alertas_resumen_insert AFTER INSERT ON alertas FOR EACH ROW
+INSERT INTO resumen_alertas_deltas (no_leidas)
+SELECT 1 FROM DUAL WHERE NOT IFNULL(NEW.leida, FALSE);
+
+CREATE TRIGGER alertas_resumen_update AFTER UPDATE ON alertas FOR EACH ROW
+INSERT INTO resumen_alertas_deltas (no_leidas)
+SELECT IF(IFNULL(NEW.leida, FALSE), 0, 1) - IF(IFNULL(OLD.leida, FALSE), 0, 1)
+FROM DUAL
+WHERE NOT (IFNULL(NEW.leida, FALSE) <=> IFNULL(OLD.leida, FALSE));
+
+CREATE TRIGGER alertas_resumen_delete AFTER DELETE ON alertas FOR EACH ROW
+INSERT INTO resumen_alertas_deltas (no_leidas)
+SELECT -1 FROM DUAL WHERE NOT IFNULL(OLD.leida, FALSE);
+
+-- Reconstruir los totales: las escrituras entre el DROP y el CREATE de los
+-- triggers no quedaron registradas
+DELETE FROM resumen_categorias_deltas;
+DELETE FROM resumen_alertas_deltas;
+DELETE FROM resumen_categorias;
+
+INSERT INTO resumen_categorias (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+SELECT IFNULL(categoria_id, 0),
+       SUM(IF(activo, 1, 0)),
+       SUM(IF(activo AND IFNULL(stock_actual, 0) <= IFNULL(stock_minimo, 0), 1, 0)),
+       SUM(IF(activo AND IFNULL(stock_actual, 0) = 0, 1, 0)),
+       SUM(IF(activo, precio * IFNULL(stock_actual, 0), 0))
+FROM productos
+GROUP BY IFNULL(categoria_id, 0);
+
+REPLACE INTO resumen_alertas (id, no_leidas)
+SELECT 1, COUNT(*) FROM alertas WHERE NOT IFNULL(leida, FALSE);
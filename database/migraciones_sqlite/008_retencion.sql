@@ -0,0 +1,30 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- SQLite: tablas de archivo de la migración 008_retencion.sql de MySQL
+--
+-- Sin particiones: el archivo se recorta con DELETE por lotes.
+
+CREATE TABLE movimientos_inventario_archivo (
+    id INTEGER PRIMARY KEY,
+    producto_id INT NOT NULL,
+    tipo_movimiento TEXT NOT NULL CHECK (tipo_movimiento IN ('entrada', 'salida', 'ajuste')),
+    cantidad INT NOT NULL,
+    motivo VARCHAR(200),
+    usuario_id INT,
+    fecha_movimiento TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_movimientos_archivo_producto_fecha ON movimientos_inventario_archivo (producto_id, fecha_movimiento);
+CREATE INDEX idx_movimientos_archivo_fecha ON movimientos_inventario_archivo (fecha_movimiento);
+
+CREATE TABLE alertas_archivo (
+    producto_id INT NOT NULL,
+    tipo_alerta TEXT NOT NULL CHECK (tipo_alerta IN ('stock_bajo', 'stock_agotado', 'prediccion_demanda')),
+    mes DATE NOT NULL,
+    alertas INT NOT NULL,
+    primera TIMESTAMP NOT NULL,
+    ultima TIMESTAMP NOT NULL,
+    PRIMARY KEY (producto_id, tipo_alerta, mes)
+);
+
+CREATE INDEX idx_alertas_archivo_mes ON alertas_archivo (mes);
+CREATE INDEX idx_alertas_leida_fecha ON alertas (leida, fecha_alerta);
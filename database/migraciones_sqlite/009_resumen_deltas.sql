@@ -0,0 +1,92 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- SQLite: filas de cambios del resumen del dashboard (009_resumen_deltas.sql de MySQL)
+--
+-- Sustituye los triggers que actualizaban resumen_categorias y
+-- resumen_alertas por otros que insertan su contribución en las tablas de
+-- cambios. Se aplica con el bloqueo de escritura tomado, así que no hay
+-- escrituras entre el DROP y el CREATE y no hace falta reconstruir totales.
+
+DROP TRIGGER productos_resumen_insert;
+DROP TRIGGER productos_resumen_update;
+DROP TRIGGER productos_resumen_delete;
+DROP TRIGGER alertas_resumen_insert;
+DROP TRIGGER alertas_resumen_update;
+DROP TRIGGER alertas_resumen_delete;
+
+CREATE TABLE resumen_categorias_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    categoria_id INT NOT NULL,
+    total_productos INT NOT NULL,
+    stock_bajo INT NOT NULL,
+    agotados INT NOT NULL,
+    valor_inventario DECIMAL(16,2) NOT NULL
+);
+
+CREATE TABLE resumen_alertas_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    no_leidas INT NOT NULL
+);
+
+CREATE TRIGGER productos_resumen_insert AFTER INSERT ON productos FOR EACH ROW
+WHEN NEW.activo
+BEGIN
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    VALUES (
+        IFNULL(NEW.categoria_id, 0), 1,
+        IIF(IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+        IIF(IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+        NEW.precio * IFNULL(NEW.stock_actual, 0)
+    );
+END;
+
+CREATE TRIGGER productos_resumen_update AFTER UPDATE ON productos FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at AND NOT (
+    NEW.categoria_id IS OLD.categoria_id AND NEW.activo IS OLD.activo
+    AND NEW.stock_actual IS OLD.stock_actual AND NEW.stock_minimo IS OLD.stock_minimo
+    AND NEW.precio IS OLD.precio
+)
+BEGIN
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    SELECT IFNULL(OLD.categoria_id, 0), -1,
+           -IIF(IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+           -IIF(IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+           -(OLD.precio * IFNULL(OLD.stock_actual, 0))
+    WHERE OLD.activo;
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    SELECT IFNULL(NEW.categoria_id, 0), 1,
+           IIF(IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+           IIF(IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+           NEW.precio * IFNULL(NEW.stock_actual, 0)
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER productos_resumen_delete AFTER DELETE ON productos FOR EACH ROW
+WHEN OLD.activo
+BEGIN
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    VALUES (
+        IFNULL(OLD.categoria_id, 0), -1,
+        -IIF(IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+        -IIF(IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+        -(OLD.precio * IFNULL(OLD.stock_actual, 0))
+    );
+END;
+
+CREATE TRIGGER alertas_resumen_insert AFTER INSERT ON alertas FOR EACH ROW
+WHEN NOT IFNULL(NEW.leida, FALSE)
+BEGIN
+    INSERT INTO resumen_alertas_deltas (no_leidas) VALUES (1);
+END;
+
+CREATE TRIGGER alertas_resumen_update AFTER UPDATE ON alertas FOR EACH ROW
+WHEN NOT (IFNULL(NEW.leida, FALSE) IS IFNULL(OLD.leida, FALSE))
+BEGIN
+    INSERT INTO resumen_alertas_deltas (no_leidas)
+    VALUES (IIF(IFNULL(NEW.leida, FALSE), 0, 1) - IIF(IFNULL(OLD.leida, FALSE), 0, 1));
+END;
+
+CREATE TRIGGER alertas_resumen_delete AFTER DELETE ON alertas FOR EACH ROW
+WHEN NOT IFNULL(OLD.leida, FALSE)
+BEGIN
+    INSERT INTO resumen_alertas_deltas (no_leidas) VALUES (-1);
+END;
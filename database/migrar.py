@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Migraciones versionadas de la base de datos del Sistema de Inventario
+
+La versión 1 es ``schema.sql`` (esquema inicial con datos de ejemplo); las
+siguientes son los archivos ``database/migraciones/NNN_descripcion.sql``.
+Las versiones aplicadas se registran en ``schema_migraciones``, así que
+ejecutar el script varias veces solo aplica las pendientes.
+
+En una base de datos creada antes de existir este registro (tiene tablas
+pero no ``schema_migraciones``) la versión 1 se marca como aplicada sin
+ejecutarla. Crear un índice o columna que ya existe no se considera un
+error, de modo que las migraciones se pueden aplicar sobre bases de datos
+que ya tenían parte de los cambios.
+
+Uso:
+    python database/migrar.py            # aplicar migraciones pendientes
+    python database/migrar.py --estado   # listar versiones y su estado
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+# Agregar el directorio padre al path para importar config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import db_config
+import mysql.connector
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+CARPETA_MIGRACIONES = os.path.join(DIRECTORIO, 'migraciones')
+NOMBRE_LOCK = 'inventario_migraciones'
+
+# Errores que indican que el cambio ya estaba aplicado
+ER_DUP_FIELDNAME = 1060
+ER_DUP_KEYNAME = 1061
+YA_APLICADO = {ER_DUP_FIELDNAME, ER_DUP_KEYNAME}
+
+# Sentencias de schema.sql que no aplican: la conexión ya apunta a DB_NAME
+OMITIR = re.compile(r'^\s*(CREATE\s+DATABASE|USE)\b', re.IGNORECASE)
+
+
+def dividir_sentencias(sql):
+    """Dividir un script SQL por ';' respetando cadenas, identificadores y comentarios"""
+    sentencias = []
+    actual = []
+    i = 0
+    n = len(sql)
+
+    while i < n:
+        c = sql[i]
+
+        if c in ("'", '"', '`'):
+            fin = i + 1
+            while fin < n:
+                if sql[fin] == '\\' and c != '`':
+                    fin += 2
+                    continue
+                if sql[fin] == c:
+                    # Comilla duplicada = comilla escapada
+                    if fin + 1 < n and sql[fin + 1] == c:
+                        fin += 2
+                        continue
+                    break
+                fin += 1
+            actual.append(sql[i:fin + 1])
+            i = fin + 1
+        elif sql.startswith('--', i) or c == '#':
+            fin = sql.find('\n', i)
+            i = n if fin == -1 else fin + 1
+            actual.append('\n')
+        elif sql.startswith('/*', i):
+            fin = sql.find('*/', i + 2)
+            i = n if fin == -1 else fin + 2
+            actual.append(' ')
+        elif c == ';':
+            sentencias.append(''.join(actual).strip())
+            actual = []
+            i += 1
+        else:
+            actual.append(c)
+            i += 1
+
+    sentencias.append(''.join(actual).strip())
+    return [sentencia for sentencia in sentencias if sentencia]
+
+
+def listar_migraciones():
+    """Lista ordenada de (version, nombre, ruta), incluida la versión 1"""
+    migraciones = [(1, 'esquema_inicial', os.path.join(DIRECTORIO, 'schema.sql'))]
+
+    for archivo in sorted(os.listdir(CARPETA_MIGRACIONES)):
+        coincidencia = re.match(r'^(\d+)_(\w+)\.sql$', archivo)
+        if coincidencia:
+            migraciones.append((int(coincidencia.group(1)), coincidencia.group(2),
+                                os.path.join(CARPETA_MIGRACIONES, archivo)))
+
+    versiones = [version for version, _, _ in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise ValueError('Hay números de versión de migración repetidos')
+
+    return sorted(migraciones)
+
+
+def _checksum(ruta):
+    with open(ruta, 'rb') as archivo:
+        return hashlib.sha256(archivo.read()).hexdigest()
+
+
+def _versiones_aplicadas(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migraciones (
+            version INT PRIMARY KEY,
+            nombre VARCHAR(200) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version, checksum FROM schema_migraciones")
+    return dict(cursor.fetchall())
+
+
+def _registrar(cursor, version, nombre, ruta):
+    cursor.execute(
+        "INSERT INTO schema_migraciones (version, nombre, checksum) VALUES (%s, %s, %s)",
+        (version, nombre, _checksum(ruta))
+    )
+
+
+def _ejecutar_migracion(cursor, ruta):
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        sentencias = dividir_sentencias(archivo.read())
+
+    for sentencia in sentencias:
+        if OMITIR.match(sentencia):
+            continue
+        try:
+            cursor.execute(sentencia)
+            if cursor.with_rows:
+                cursor.fetchall()
+        except mysql.connector.Error as e:
+            if e.errno not in YA_APLICADO:
+                raise
+            print(f"   ↪ ya existía, se omite: {sentencia.splitlines()[0][:60]}")
+
+
+def aplicar_migraciones(connection):
+    """Aplicar las migraciones pendientes. Retorna la lista de versiones aplicadas"""
+    cursor = connection.cursor()
+
+    # Evitar que dos procesos migren a la vez
+    cursor.execute("SELECT GET_LOCK(%s, 60)", (NOMBRE_LOCK,))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError('Otro proceso está aplicando migraciones')
+
+    try:
+        cursor.execute("SHOW TABLES LIKE 'schema_migraciones'")
+        registro_nuevo = cursor.fetchone() is None
+        aplicadas = _versiones_aplicadas(cursor)
+        nuevas = []
+
+        migraciones = listar_migraciones()
+        if registro_nuevo:
+            cursor.execute("SHOW TABLES LIKE 'productos'")
+            if cursor.fetchone():
+                # Base de datos previa a las migraciones: el esquema inicial ya está
+                version, nombre, ruta = migraciones[0]
+                _registrar(cursor, version, nombre, ruta)
+                aplicadas[version] = _checksum(ruta)
+                print(f"📌 Esquema existente registrado como versión {version}")
+
+        for version, nombre, ruta in migraciones:
+            if version in aplicadas:
+                if aplicadas[version] != _checksum(ruta):
+                    print(f"⚠️ La migración {version} ({nombre}) cambió después de aplicarse")
+                continue
+
+            print(f"⏳ Aplicando migración {version}: {nombre}")
+            _ejecutar_migracion(cursor, ruta)
+            _registrar(cursor, version, nombre, ruta)
+            nuevas.append(version)
+            print(f"✅ Migración {version} aplicada")
+
+        return nuevas
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (NOMBRE_LOCK,))
+        cursor.fetchall()
+        cursor.close()
+
+
+def mostrar_estado(connection):
+    cursor = connection.cursor()
+    cursor.execute("SHOW TABLES LIKE 'schema_migraciones'")
+    aplicadas = _versiones_aplicadas(cursor) if cursor.fetchone() else {}
+    cursor.close()
+
+    for version, nombre, _ in listar_migraciones():
+        estado = '✅ aplicada ' if version in aplicadas else '⏳ pendiente'
+        print(f"{estado}  {version:03d}  {nombre}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aplicar migraciones de la base de datos')
+    parser.add_argument('--estado', action='store_true', help='Mostrar el estado sin aplicar nada')
+    args = parser.parse_args()
+
+    if db_config.motor == 'sqlite':
+        # schema_sqlite.sql ya incluye todas las migraciones y se aplica al conectar
+        db_config.conectar().close()
+        print(f"✅ Esquema SQLite al día en {db_config.sqlite_ruta}")
+        return
+
+    try:
+        connection = db_config.conectar()
+    except mysql.connector.Error as e:
+        print(f"❌ Error conectando a MySQL: {e}")
+        sys.exit(1)
+
+    try:
+        if args.estado:
+            mostrar_estado(connection)
+            return
+
+        nuevas = aplicar_migraciones(connection)
+        if nuevas:
+            print(f"🎉 {len(nuevas)} migraciones aplicadas")
+        else:
+            print("✅ La base de datos ya está al día")
+    except Exception as e:
+        print(f"❌ Error aplicando migraciones: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
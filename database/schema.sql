@@ -27,7 +27,8 @@ CREATE TABLE productos (
     activo BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    FOREIGN KEY (categoria_id) REFERENCES categorias(id)
+    FOREIGN KEY (categoria_id) REFERENCES categorias(id),
+    FULLTEXT INDEX ft_productos_busqueda (nombre, descripcion)
 );
 
 -- Tabla de Movimientos de Inventario
@@ -0,0 +1,380 @@
+-- Sistema de Gestión de Inventario Inteligente
+-- Esquema SQLite (DB_MOTOR=sqlite)
+--
+-- Equivale a schema.sql más las migraciones 002-009 de MySQL en un solo
+-- archivo; database/sqlite.py lo aplica al abrir una base de datos vacía y
+-- guarda la versión en PRAGMA user_version. Un cambio de esquema nuevo se
+-- añade aquí además de como migración de MySQL, y en
+-- database/migraciones_sqlite/NNN_descripcion.sql para las bases de datos
+-- SQLite ya creadas.
+--
+-- Diferencias con MySQL:
+-- - Las fechas son texto 'AAAA-MM-DD HH:MM:SS.mmm' en hora local.
+-- - nombre usa COLLATE NOCASE para ordenar sin distinguir mayúsculas, como
+--   la colación por defecto de MySQL.
+-- - La búsqueda por palabras usa la tabla FTS5 productos_fts en lugar del
+--   índice FULLTEXT.
+-- - updated_at lo actualiza un trigger; los triggers AFTER UPDATE de
+--   productos ignoran esa segunda actualización (WHEN NEW.updated_at IS
+--   OLD.updated_at).
+
+CREATE TABLE categorias (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL COLLATE NOCASE,
+    descripcion TEXT,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE productos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    codigo VARCHAR(50) UNIQUE NOT NULL COLLATE NOCASE,
+    nombre VARCHAR(200) NOT NULL COLLATE NOCASE,
+    descripcion TEXT,
+    precio DECIMAL(10,2) NOT NULL,
+    stock_actual INT DEFAULT 0,
+    stock_minimo INT DEFAULT 5,
+    categoria_id INT REFERENCES categorias(id),
+    imagen_url VARCHAR(255),
+    activo BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE movimientos_inventario (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    producto_id INT NOT NULL REFERENCES productos(id),
+    tipo_movimiento TEXT NOT NULL CHECK (tipo_movimiento IN ('entrada', 'salida', 'ajuste')),
+    cantidad INT NOT NULL,
+    motivo VARCHAR(200),
+    usuario_id INT,
+    fecha_movimiento TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE alertas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    producto_id INT NOT NULL REFERENCES productos(id),
+    tipo_alerta TEXT NOT NULL CHECK (tipo_alerta IN ('stock_bajo', 'stock_agotado', 'prediccion_demanda')),
+    mensaje TEXT NOT NULL,
+    leida BOOLEAN DEFAULT FALSE,
+    fecha_alerta TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE predicciones_demanda (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    producto_id INT NOT NULL REFERENCES productos(id),
+    cantidad_predicha INT NOT NULL,
+    fecha_prediccion DATE NOT NULL,
+    confianza DECIMAL(5,2),
+    created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+-- 004: índices de la API
+CREATE INDEX idx_productos_activo_nombre ON productos (activo, nombre);
+CREATE INDEX idx_productos_activo_stock ON productos (activo, stock_actual);
+CREATE INDEX idx_alertas_producto_tipo_fecha ON alertas (producto_id, tipo_alerta, fecha_alerta);
+CREATE INDEX idx_alertas_fecha ON alertas (fecha_alerta);
+CREATE INDEX idx_movimientos_producto_fecha ON movimientos_inventario (producto_id, fecha_movimiento);
+CREATE INDEX idx_movimientos_fecha ON movimientos_inventario (fecha_movimiento);
+CREATE INDEX idx_predicciones_fecha ON predicciones_demanda (fecha_prediccion);
+
+CREATE TRIGGER categorias_updated_at AFTER UPDATE ON categorias FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE categorias SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER productos_updated_at AFTER UPDATE ON productos FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE productos SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime') WHERE id = NEW.id;
+END;
+
+-- 003: búsqueda por palabras (sin acentos ni mayúsculas)
+CREATE VIRTUAL TABLE productos_fts USING fts5(
+    nombre, descripcion,
+    content='productos', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER productos_fts_insert AFTER INSERT ON productos FOR EACH ROW
+BEGIN
+    INSERT INTO productos_fts (rowid, nombre, descripcion) VALUES (NEW.id, NEW.nombre, NEW.descripcion);
+END;
+
+CREATE TRIGGER productos_fts_update AFTER UPDATE OF nombre, descripcion ON productos FOR EACH ROW
+BEGIN
+    INSERT INTO productos_fts (productos_fts, rowid, nombre, descripcion)
+    VALUES ('delete', OLD.id, OLD.nombre, OLD.descripcion);
+    INSERT INTO productos_fts (rowid, nombre, descripcion) VALUES (NEW.id, NEW.nombre, NEW.descripcion);
+END;
+
+CREATE TRIGGER productos_fts_delete AFTER DELETE ON productos FOR EACH ROW
+BEGIN
+    INSERT INTO productos_fts (productos_fts, rowid, nombre, descripcion)
+    VALUES ('delete', OLD.id, OLD.nombre, OLD.descripcion);
+END;
+
+-- 002: resumen del dashboard
+CREATE TABLE resumen_categorias (
+    categoria_id INTEGER PRIMARY KEY,
+    total_productos INT NOT NULL DEFAULT 0,
+    stock_bajo INT NOT NULL DEFAULT 0,
+    agotados INT NOT NULL DEFAULT 0,
+    valor_inventario DECIMAL(16,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE resumen_alertas (
+    id INTEGER PRIMARY KEY,
+    no_leidas INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO resumen_alertas (id, no_leidas) VALUES (1, 0);
+
+-- 009: los triggers insertan filas de cambios; backend/resumen.py las consolida
+CREATE TABLE resumen_categorias_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    categoria_id INT NOT NULL,
+    total_productos INT NOT NULL,
+    stock_bajo INT NOT NULL,
+    agotados INT NOT NULL,
+    valor_inventario DECIMAL(16,2) NOT NULL
+);
+
+CREATE TABLE resumen_alertas_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    no_leidas INT NOT NULL
+);
+
+CREATE TRIGGER productos_resumen_insert AFTER INSERT ON productos FOR EACH ROW
+WHEN NEW.activo
+BEGIN
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    VALUES (
+        IFNULL(NEW.categoria_id, 0), 1,
+        IIF(IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+        IIF(IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+        NEW.precio * IFNULL(NEW.stock_actual, 0)
+    );
+END;
+
+CREATE TRIGGER productos_resumen_update AFTER UPDATE ON productos FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at AND NOT (
+    NEW.categoria_id IS OLD.categoria_id AND NEW.activo IS OLD.activo
+    AND NEW.stock_actual IS OLD.stock_actual AND NEW.stock_minimo IS OLD.stock_minimo
+    AND NEW.precio IS OLD.precio
+)
+BEGIN
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    SELECT IFNULL(OLD.categoria_id, 0), -1,
+           -IIF(IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+           -IIF(IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+           -(OLD.precio * IFNULL(OLD.stock_actual, 0))
+    WHERE OLD.activo;
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    SELECT IFNULL(NEW.categoria_id, 0), 1,
+           IIF(IFNULL(NEW.stock_actual, 0) <= IFNULL(NEW.stock_minimo, 0), 1, 0),
+           IIF(IFNULL(NEW.stock_actual, 0) = 0, 1, 0),
+           NEW.precio * IFNULL(NEW.stock_actual, 0)
+    WHERE NEW.activo;
+END;
+
+CREATE TRIGGER productos_resumen_delete AFTER DELETE ON productos FOR EACH ROW
+WHEN OLD.activo
+BEGIN
+    INSERT INTO resumen_categorias_deltas (categoria_id, total_productos, stock_bajo, agotados, valor_inventario)
+    VALUES (
+        IFNULL(OLD.categoria_id, 0), -1,
+        -IIF(IFNULL(OLD.stock_actual, 0) <= IFNULL(OLD.stock_minimo, 0), 1, 0),
+        -IIF(IFNULL(OLD.stock_actual, 0) = 0, 1, 0),
+        -(OLD.precio * IFNULL(OLD.stock_actual, 0))
+    );
+END;
+
+CREATE TRIGGER alertas_resumen_insert AFTER INSERT ON alertas FOR EACH ROW
+WHEN NOT IFNULL(NEW.leida, FALSE)
+BEGIN
+    INSERT INTO resumen_alertas_deltas (no_leidas) VALUES (1);
+END;
+
+CREATE TRIGGER alertas_resumen_update AFTER UPDATE ON alertas FOR EACH ROW
+WHEN NOT (IFNULL(NEW.leida, FALSE) IS IFNULL(OLD.leida, FALSE))
+BEGIN
+    INSERT INTO resumen_alertas_deltas (no_leidas)
+    VALUES (IIF(IFNULL(NEW.leida, FALSE), 0, 1) - IIF(IFNULL(OLD.leida, FALSE), 0, 1));
+END;
+
+CREATE TRIGGER alertas_resumen_delete AFTER DELETE ON alertas FOR EACH ROW
+WHEN NOT IFNULL(OLD.leida, FALSE)
+BEGIN
+    INSERT INTO resumen_alertas_deltas (no_leidas) VALUES (-1);
+END;
+
+-- 005: eventos para GET /api/eventos, con las fechas en formato HTTP
+CREATE TABLE eventos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo VARCHAR(40) NOT NULL,
+    entidad_id INT NOT NULL,
+    datos TEXT NOT NULL,
+    creado_en TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE INDEX idx_eventos_creado ON eventos (creado_en);
+
+CREATE TRIGGER productos_eventos_insert AFTER INSERT ON productos FOR EACH ROW
+BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('producto_creado', NEW.id, json_object(
+        'id', NEW.id,
+        'codigo', NEW.codigo,
+        'nombre', NEW.nombre,
+        'descripcion', NEW.descripcion,
+        'precio', printf('%.2f', NEW.precio),
+        'stock_actual', NEW.stock_actual,
+        'stock_minimo', NEW.stock_minimo,
+        'categoria_id', NEW.categoria_id,
+        'categoria_nombre', (SELECT nombre FROM categorias WHERE id = NEW.categoria_id),
+        'imagen_url', NEW.imagen_url,
+        'activo', NEW.activo
+    ));
+END;
+
+CREATE TRIGGER productos_eventos_update AFTER UPDATE ON productos FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES (
+        IIF(NEW.stock_actual IS OLD.stock_actual, 'producto_actualizado', 'stock_cambiado'),
+        NEW.id,
+        json_object(
+            'id', NEW.id,
+            'codigo', NEW.codigo,
+            'nombre', NEW.nombre,
+            'descripcion', NEW.descripcion,
+            'precio', printf('%.2f', NEW.precio),
+            'stock_actual', NEW.stock_actual,
+            'stock_anterior', OLD.stock_actual,
+            'stock_minimo', NEW.stock_minimo,
+            'categoria_id', NEW.categoria_id,
+            'categoria_nombre', (SELECT nombre FROM categorias WHERE id = NEW.categoria_id),
+            'imagen_url', NEW.imagen_url,
+            'activo', NEW.activo
+        )
+    );
+END;
+
+CREATE TRIGGER alertas_eventos_insert AFTER INSERT ON alertas FOR EACH ROW
+BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    SELECT 'alerta_creada', NEW.id, json_object(
+        'id', NEW.id,
+        'producto_id', NEW.producto_id,
+        'tipo_alerta', NEW.tipo_alerta,
+        'mensaje', NEW.mensaje,
+        'leida', NEW.leida,
+        'fecha_alerta', substr('SunMonTueWedThuFriSat', 1 + 3 * strftime('%w', NEW.fecha_alerta), 3)
+            || strftime(', %d ', NEW.fecha_alerta)
+            || substr('JanFebMarAprMayJunJulAugSepOctNovDec', 3 * strftime('%m', NEW.fecha_alerta) - 2, 3)
+            || strftime(' %Y %H:%M:%S GMT', NEW.fecha_alerta),
+        'producto_nombre', p.nombre,
+        'producto_codigo', p.codigo
+    )
+    FROM productos p
+    WHERE p.id = NEW.producto_id;
+END;
+
+CREATE TRIGGER alertas_eventos_update AFTER UPDATE ON alertas FOR EACH ROW
+WHEN NOT (NEW.leida IS OLD.leida)
+BEGIN
+    INSERT INTO eventos (tipo, entidad_id, datos)
+    VALUES ('alerta_leida', NEW.id, json_object('id', NEW.id, 'leida', NEW.leida));
+END;
+
+-- 006: claves de idempotencia de POST /api/stock/descontar
+CREATE TABLE claves_idempotencia (
+    clave VARCHAR(100) PRIMARY KEY,
+    huella CHAR(64) NOT NULL,
+    respuesta TEXT NULL,
+    creado_en TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE INDEX idx_claves_idempotencia_creado ON claves_idempotencia (creado_en);
+
+-- 007: stock histórico
+CREATE TABLE cambios_stock (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    producto_id INT NOT NULL,
+    variacion INT NOT NULL,
+    fecha TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE INDEX idx_cambios_stock_producto_fecha ON cambios_stock (producto_id, fecha);
+CREATE INDEX idx_cambios_stock_fecha ON cambios_stock (fecha);
+
+CREATE TABLE snapshots_stock (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha TIMESTAMP NOT NULL UNIQUE,
+    productos INT NOT NULL,
+    creado_en TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+);
+
+CREATE TABLE snapshots_stock_productos (
+    snapshot_id INT NOT NULL,
+    producto_id INT NOT NULL,
+    stock INT NOT NULL,
+    PRIMARY KEY (snapshot_id, producto_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER productos_stock_insert AFTER INSERT ON productos FOR EACH ROW
+WHEN IFNULL(NEW.stock_actual, 0) <> 0
+BEGIN
+    INSERT INTO cambios_stock (producto_id, variacion) VALUES (NEW.id, NEW.stock_actual);
+END;
+
+CREATE TRIGGER productos_stock_update AFTER UPDATE OF stock_actual ON productos FOR EACH ROW
+WHEN NOT (NEW.stock_actual IS OLD.stock_actual)
+BEGIN
+    INSERT INTO cambios_stock (producto_id, variacion)
+    VALUES (NEW.id, IFNULL(NEW.stock_actual, 0) - IFNULL(OLD.stock_actual, 0));
+END;
+
+-- 008: archivo de movimientos y alertas compactadas (sin particiones)
+CREATE TABLE movimientos_inventario_archivo (
+    id INTEGER PRIMARY KEY,
+    producto_id INT NOT NULL,
+    tipo_movimiento TEXT NOT NULL CHECK (tipo_movimiento IN ('entrada', 'salida', 'ajuste')),
+    cantidad INT NOT NULL,
+    motivo VARCHAR(200),
+    usuario_id INT,
+    fecha_movimiento TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_movimientos_archivo_producto_fecha ON movimientos_inventario_archivo (producto_id, fecha_movimiento);
+CREATE INDEX idx_movimientos_archivo_fecha ON movimientos_inventario_archivo (fecha_movimiento);
+
+CREATE TABLE alertas_archivo (
+    producto_id INT NOT NULL,
+    tipo_alerta TEXT NOT NULL CHECK (tipo_alerta IN ('stock_bajo', 'stock_agotado', 'prediccion_demanda')),
+    mes DATE NOT NULL,
+    alertas INT NOT NULL,
+    primera TIMESTAMP NOT NULL,
+    ultima TIMESTAMP NOT NULL,
+    PRIMARY KEY (producto_id, tipo_alerta, mes)
+);
+
+CREATE INDEX idx_alertas_archivo_mes ON alertas_archivo (mes);
+CREATE INDEX idx_alertas_leida_fecha ON alertas (leida, fecha_alerta);
+
+-- Datos de ejemplo (después de los triggers, que llenan resumen, eventos y cambios)
+INSERT INTO categorias (nombre, descripcion) VALUES
+('Electrónicos', 'Productos electrónicos y tecnología'),
+('Ropa', 'Vestimenta y accesorios'),
+('Hogar', 'Artículos para el hogar'),
+('Alimentos', 'Productos alimenticios'),
+('Otros', 'Otras categorías');
+
+INSERT INTO productos (codigo, nombre, descripcion, precio, stock_actual, stock_minimo, categoria_id) VALUES
+('PROD001', 'Laptop HP Pavilion', 'Laptop de 15 pulgadas, 8GB RAM, 256GB SSD', 899.99, 10, 3, 1),
+('PROD002', 'Mouse Inalámbrico', 'Mouse óptico inalámbrico con batería recargable', 25.50, 50, 10, 1),
+('PROD003', 'Camiseta Básica', 'Camiseta de algodón 100%, talla M', 15.00, 100, 20, 2),
+('PROD004', 'Café Colombiano', 'Café premium de origen colombiano, 500g', 12.99, 30, 5, 4);
@@ -0,0 +1,395 @@
+# Motor SQLite de la Base de Datos
+# Sistema de Gestión de Inventario Inteligente
+#
+# Alternativa embebida a MySQL para nodos de tienda con un solo servidor
+# (DB_MOTOR=sqlite). La base de datos es un archivo local: sin proceso
+# aparte ni viaje de red por consulta.
+#
+# ConexionSQLite y CursorSQLite exponen la parte de la API de
+# mysql-connector que usa la aplicación (cursor(dictionary=True),
+# start_transaction, in_transaction, lastrowid, rowcount...) y traducen los
+# errores a las excepciones de mysql.connector con su errno, así que el
+# resto del código y el pool de database/config.py no distinguen el motor.
+#
+# traducir() es la capa de dialecto: reescribe las construcciones de MySQL
+# que usan las consultas de la aplicación (%s, NOW() - INTERVAL, IF,
+# ON DUPLICATE KEY UPDATE, DELETE ... LIMIT, FOR UPDATE...) a SQLite. El
+# resultado se cachea por texto de la consulta, y sqlite3 guarda la sentencia
+# preparada de cada texto en la caché de la conexión (SQLITE_SENTENCIAS_CACHE),
+# de modo que una consulta repetida no se vuelve a traducir ni a compilar.
+#
+# La búsqueda FULLTEXT no tiene traducción textual: backend/busqueda.py
+# genera la rama FTS5 cuando el motor es SQLite.
+
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+import os
+import re
+import sqlite3
+import threading
+
+import mysql.connector
+from mysql.connector import errorcode
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+ESQUEMA_SQLITE = os.path.join(DIRECTORIO, 'schema_sqlite.sql')
+# Cambios para bases de datos creadas con una versión anterior del esquema
+CARPETA_MIGRACIONES_SQLITE = os.path.join(DIRECTORIO, 'migraciones_sqlite')
+# Versión de database/migraciones a la que equivale schema_sqlite.sql
+VERSION_ESQUEMA = 9
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%f'
+AHORA = f"strftime('{FORMATO_FECHA}', 'now', 'localtime')"
+CENTIMOS = Decimal('0.01')
+
+SQLITE_ESPERA_BLOQUEO = float(os.getenv('DB_SQLITE_ESPERA', 5))
+SQLITE_SENTENCIAS_CACHE = int(os.getenv('DB_SQLITE_SENTENCIAS_CACHE', 256))
+
+PRAGMAS = [
+    # WAL: los lectores no bloquean al escritor ni al revés
+    'PRAGMA journal_mode = WAL',
+    # Con WAL, NORMAL no pierde la integridad ante un corte de luz, solo
+    # las últimas transacciones confirmadas; evita un fsync por commit
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA foreign_keys = ON',
+    'PRAGMA temp_store = MEMORY',
+    # Caché de páginas por conexión (negativo: en KiB)
+    f"PRAGMA cache_size = -{int(os.getenv('DB_SQLITE_CACHE_MB', 16)) * 1024}",
+    # Lecturas sobre el archivo mapeado en memoria, sin copiarlo a la caché
+    f"PRAGMA mmap_size = {int(os.getenv('DB_SQLITE_MMAP_MB', 256)) * 1024 * 1024}",
+]
+
+# Las fechas se guardan como texto 'AAAA-MM-DD HH:MM:SS.mmm' en hora local,
+# igual que las escriben los DEFAULT del esquema, para que se comparen bien
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(' ', 'milliseconds'))
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(bool, int)
+
+# Tipos de columna que se devuelven como en mysql-connector
+sqlite3.register_converter('TIMESTAMP', lambda valor: datetime.fromisoformat(valor.decode()))
+sqlite3.register_converter('DATE', lambda valor: date.fromisoformat(valor.decode()[:10]))
+sqlite3.register_converter('DECIMAL', lambda valor: Decimal(valor.decode()).quantize(CENTIMOS))
+
+
+def _intervalo(coincidencia):
+    cantidad, unidad = coincidencia.group('cantidad'), coincidencia.group('unidad').lower()
+    if cantidad == '?':
+        return f"strftime('{FORMATO_FECHA}', 'now', 'localtime', '-' || ? || ' {unidad}')"
+    return f"strftime('{FORMATO_FECHA}', 'now', 'localtime', '-{cantidad} {unidad}')"
+
+
+def _delete_limitado(coincidencia):
+    tabla, condicion, limite = coincidencia.groups()
+    return (f"DELETE FROM {tabla} WHERE rowid IN "
+            f"(SELECT rowid FROM {tabla} WHERE {condicion.strip()} LIMIT {limite})")
+
+
+def _upsert(coincidencia):
+    asignaciones = re.sub(r'\bVALUES\((\w+)\)', r'excluded.\1', coincidencia.group(1))
+    return f"ON CONFLICT DO UPDATE SET {asignaciones}"
+
+
+INTERVALO = r'INTERVAL\s+(?P<cantidad>\d+|\?)\s+(?P<unidad>DAY|HOUR|MINUTE|SECOND)'
+
+# (patrón, reemplazo) en orden; los marcadores %s se convierten primero
+REGLAS = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'DATE_SUB\(\s*NOW\(\d?\)\s*,\s*' + INTERVALO + r'\s*\)', re.I), _intervalo),
+    (re.compile(r'NOW\(\d?\)\s*-\s*' + INTERVALO, re.I), _intervalo),
+    (re.compile(r'\bNOW\(\d?\)', re.I), AHORA),
+    (re.compile(r'\bIF\(', re.I), 'IIF('),
+    # MIN/MAX con varios argumentos son escalares en SQLite
+    (re.compile(r'\bLEAST\(', re.I), 'MIN('),
+    (re.compile(r'\bGREATEST\(', re.I), 'MAX('),
+    (re.compile(r'<=>'), ' IS '),
+    (re.compile(r'\s+FROM\s+DUAL\b', re.I), ''),
+    (re.compile(r'\s+FOR\s+UPDATE\b', re.I), ''),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE\s+(.*)$', re.I | re.S), _upsert),
+    (re.compile(r'DELETE\s+FROM\s+(\w+)\s+WHERE\s+(.*?)\s+LIMIT\s+(\?|\d+)\s*$', re.I | re.S),
+     _delete_limitado),
+    # MySQL escapa con \ en LIKE por defecto; SQLite necesita ESCAPE
+    (re.compile(r"\bLIKE\s+\?(?!\s+ESCAPE)", re.I), r"LIKE ? ESCAPE '\\'"),
+    # DATE(x) AS alias: sqlite3 aplica el conversor DATE por el nombre de columna
+    (re.compile(r'\bDATE\(([^()]+)\)\s+AS\s+(\w+)', re.I), r'DATE(\1) AS "\2 [DATE]"'),
+    (re.compile(r'^\s*ANALYZE\s+TABLE\b.*$', re.I | re.S), 'ANALYZE'),
+]
+
+
+@lru_cache(maxsize=1024)
+def traducir(sql):
+    """Consulta de MySQL equivalente en SQLite"""
+    for patron, reemplazo in REGLAS:
+        sql = patron.sub(reemplazo, sql)
+    return sql
+
+
+def _concat(*valores):
+    # Como en MySQL: NULL si algún argumento es NULL
+    if any(valor is None for valor in valores):
+        return None
+    return ''.join(str(valor) for valor in valores)
+
+
+def _error_mysql(error):
+    """Excepción de mysql.connector equivalente a un error de sqlite3"""
+    mensaje = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        errno = errorcode.ER_DUP_ENTRY if 'UNIQUE' in mensaje or 'PRIMARY KEY' in mensaje \
+            else errorcode.ER_NO_REFERENCED_ROW_2
+        return mysql.connector.IntegrityError(msg=mensaje, errno=errno)
+    if isinstance(error, sqlite3.OperationalError) and 'locked' in mensaje:
+        return mysql.connector.OperationalError(msg=mensaje, errno=errorcode.ER_LOCK_WAIT_TIMEOUT)
+    if isinstance(error, sqlite3.OperationalError):
+        return mysql.connector.ProgrammingError(msg=mensaje, errno=errorcode.ER_PARSE_ERROR)
+    return mysql.connector.DatabaseError(msg=mensaje)
+
+
+class CursorSQLite:
+    """Cursor con la interfaz de mysql-connector (tuplas o dicts)"""
+
+    def __init__(self, conexion, dictionary=False):
+        self._conexion = conexion
+        self._cursor = conexion._sqlite.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(columna[0] for columna in self._cursor.description or ())
+
+    def execute(self, operation, params=None):
+        try:
+            self._cursor.execute(traducir(operation), tuple(params) if params is not None else ())
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def executemany(self, operation, seq_params):
+        try:
+            self._cursor.executemany(traducir(operation), [tuple(params) for params in seq_params])
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def _fila(self, fila):
+        if fila is None or not self._dictionary:
+            return fila
+        return dict(zip(self.column_names, fila))
+
+    def fetchone(self):
+        return self._fila(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        filas = self._cursor.fetchmany(size)
+        if not self._dictionary:
+            return filas
+        columnas = self.column_names
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        if not self._dictionary:
+            return filas
+        columnas = self.column_names
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConexionSQLite:
+    """Conexión SQLite en modo autocommit con la interfaz de mysql-connector"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        # Un archivo de lock por nombre de GET_LOCK, liberado al cerrar
+        self._locks = {}
+        self._sqlite = sqlite3.connect(
+            ruta,
+            timeout=SQLITE_ESPERA_BLOQUEO,
+            # Autocommit como en MySQL; las transacciones con start_transaction()
+            isolation_level=None,
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            # La conexión pasa entre hilos a través del pool, nunca a la vez
+            check_same_thread=False,
+            cached_statements=SQLITE_SENTENCIAS_CACHE
+        )
+        self._sqlite.create_function('CONCAT', -1, _concat, deterministic=True)
+        self._sqlite.create_function('GET_LOCK', 2, self._get_lock)
+        self._sqlite.create_function('RELEASE_LOCK', 1, self._release_lock)
+        for pragma in PRAGMAS:
+            self._sqlite.execute(pragma)
+
+    def cursor(self, dictionary=False, buffered=None):
+        return CursorSQLite(self, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._sqlite.in_transaction
+
+    # Los cursores de SQLite no dejan resultados pendientes en un socket
+    unread_result = False
+
+    def consume_results(self):
+        pass
+
+    def start_transaction(self, isolation_level=None, readonly=None):
+        """Abrir una transacción que toma el bloqueo de escritura desde el principio.
+
+        SQLite solo admite un escritor a la vez, así que equivale a
+        ``SELECT ... FOR UPDATE`` sobre toda la base de datos; el nivel de
+        aislamiento se ignora (siempre es serializable).
+        """
+        try:
+            self._sqlite.execute('BEGIN IMMEDIATE')
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def commit(self):
+        try:
+            self._sqlite.commit()
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def rollback(self):
+        self._sqlite.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        try:
+            self._sqlite.execute('SELECT 1')
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def _get_lock(self, nombre, espera):
+        """GET_LOCK de MySQL con un lock de archivo: exclusivo entre procesos del mismo nodo"""
+        if nombre in self._locks:
+            return 1
+        if fcntl is None:
+            # Sin fcntl (Windows) solo corre el servidor de desarrollo, un proceso
+            self._locks[nombre] = None
+            return 1
+
+        archivo = open(f"{self.ruta}.{re.sub(r'[^0-9A-Za-z_.-]', '_', nombre)}.lock", 'a')
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return 0
+        self._locks[nombre] = archivo
+        return 1
+
+    def _release_lock(self, nombre):
+        archivo = self._locks.pop(nombre, None)
+        if archivo is not None:
+            archivo.close()
+        return 1
+
+    def close(self):
+        for nombre in list(self._locks):
+            self._release_lock(nombre)
+        self._sqlite.close()
+
+
+_esquema_lock = threading.Lock()
+
+
+def sentencias_esquema(ruta=ESQUEMA_SQLITE):
+    """Sentencias de ``ruta`` una a una (los triggers llevan ``;`` dentro)"""
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        pendiente = ''
+        for linea in archivo:
+            if not pendiente and (not linea.strip() or linea.lstrip().startswith('--')):
+                continue
+            pendiente += linea
+            if sqlite3.complete_statement(pendiente):
+                yield pendiente.strip()
+                pendiente = ''
+
+
+def migraciones_pendientes(version):
+    """Archivos de ``migraciones_sqlite`` posteriores a ``version``, en orden"""
+    pendientes = []
+    for nombre in sorted(os.listdir(CARPETA_MIGRACIONES_SQLITE)):
+        coincidencia = re.match(r'^(\d{3})_\w+\.sql$', nombre)
+        if coincidencia and version < int(coincidencia.group(1)) <= VERSION_ESQUEMA:
+            pendientes.append(os.path.join(CARPETA_MIGRACIONES_SQLITE, nombre))
+    return pendientes
+
+
+def crear_esquema(conexion):
+    """Crear las tablas, triggers y datos de ejemplo si la base de datos está vacía.
+
+    Una base de datos de una versión anterior recibe solo las migraciones
+    de ``migraciones_sqlite`` que le faltan.
+
+    Se ejecuta dentro de una transacción con el bloqueo de escritura, así
+    que varios workers que arrancan a la vez no lo aplican dos veces.
+    """
+    if conexion.execute('PRAGMA user_version').fetchone()[0] >= VERSION_ESQUEMA:
+        return False
+
+    with _esquema_lock:
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            version = conexion.execute('PRAGMA user_version').fetchone()[0]
+            if version >= VERSION_ESQUEMA:
+                conexion.rollback()
+                return False
+            archivos = migraciones_pendientes(version) if version else [ESQUEMA_SQLITE]
+            for ruta in archivos:
+                for sentencia in sentencias_esquema(ruta):
+                    conexion.execute(sentencia)
+            conexion.execute(f'PRAGMA user_version = {VERSION_ESQUEMA}')
+            conexion.commit()
+        except Exception:
+            conexion.rollback()
+            raise
+    return True
+
+
+def conectar_sqlite(ruta):
+    """Abrir una conexión al archivo ``ruta``, creando el esquema la primera vez"""
+    conexion = ConexionSQLite(ruta)
+    try:
+        if crear_esquema(conexion._sqlite):
+            print(f"✅ Esquema SQLite (versión {VERSION_ESQUEMA}) aplicado en {ruta}")
+    except sqlite3.Error as e:
+        conexion.close()
+        raise _error_mysql(e) from e
+    except Exception:
+        conexion.close()
+        raise
+    return conexion
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Comprobación de índices de las consultas de la API
+
+Ejecuta ``EXPLAIN`` sobre las consultas del backend (construidas con las
+mismas constantes ``QUERY_*`` y funciones que usa el código) y falla si
+alguna recorre una tabla completa (``type = ALL``). Los recorridos completos
+esperados se declaran en ``ESCANEOS_PERMITIDOS`` con su motivo.
+
+También falla si alguna constante ``QUERY_*`` de ``MODULOS_CONSULTAS`` no
+aparece en ``consultas()``: una consulta nueva se verifica o se declara en
+``SIN_EXPLAIN`` con el motivo. Las consultas que una función construye (y
+las que siguen escritas dentro de las funciones) hay que añadirlas a mano.
+
+Conviene ejecutarlo sobre una base de datos con datos realistas: con
+tablas casi vacías el optimizador puede preferir un recorrido completo.
+
+Uso:
+    python database/verificar_indices.py
+"""
+
+import os
+import re
+import sys
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.config import db_config
+from backend import (
+    alertas, app, catalogo_csv, eventos, historico_stock, movimientos, reservas, resumen, retencion
+)
+from backend.app import (
+    QUERY_PRODUCTO, QUERY_CATEGORIAS, QUERY_DASHBOARD_CATEGORIAS, QUERY_DASHBOARD_ALERTAS,
+    QUERY_TOTAL_CATEGORIAS, QUERY_ALERTAS_RECIENTES, QUERY_MARCAR_ALERTA,
+    query_productos, query_predicciones, columnas_producto
+)
+from backend.alertas import QUERY_GENERAR_ALERTAS
+from backend.busqueda import construir_busqueda
+from backend.catalogo_csv import QUERY_IDS_CATEGORIAS, QUERY_EXPORTAR, COLUMNAS_CSV, sentencia_upsert
+from backend.edicion_masiva import construir_filtro, sentencia_lista
+from backend.eventos import (
+    QUERY_RANGO_EVENTOS, QUERY_EVENTOS_DESDE, QUERY_EVENTOS_IDS, QUERY_PURGAR_EVENTOS
+)
+from backend.historico_stock import (
+    QUERY_SNAPSHOT_ANTERIOR, QUERY_SNAPSHOT_POSTERIOR, QUERY_STOCK_PRODUCTO, QUERY_STOCK_CATALOGO,
+    QUERY_CREAR_SNAPSHOT, QUERY_VACIAR_SNAPSHOT
+)
+from backend.movimientos import (
+    QUERY_BLOQUEAR_PRODUCTOS, QUERY_INSERTAR_MOVIMIENTO, QUERY_FIJAR_STOCK
+)
+from backend.reservas import (
+    QUERY_RESERVAR_CLAVE, QUERY_DESCONTAR_STOCK, QUERY_INSERTAR_SALIDA, QUERY_STOCK_PEDIDO,
+    QUERY_STOCK_ACTIVOS, QUERY_GUARDAR_RESPUESTA, QUERY_RESPUESTA_GUARDADA, QUERY_PURGAR_CLAVES
+)
+from backend.resumen import (
+    QUERY_CAMBIOS_CATEGORIAS, QUERY_SUMAR_CATEGORIA, QUERY_BORRAR_CAMBIOS_CATEGORIAS,
+    QUERY_CAMBIOS_ALERTAS, QUERY_SUMAR_ALERTAS, QUERY_BORRAR_CAMBIOS_ALERTAS, LOTE_RESUMEN
+)
+from backend.retencion import (
+    QUERY_ALERTAS_ANTIGUAS, QUERY_COMPACTAR_ALERTAS, QUERY_MOVIMIENTOS_ANTIGUOS,
+    QUERY_ARCHIVAR_MOVIMIENTOS, QUERY_CAMBIOS_STOCK_ANTIGUOS, QUERY_SNAPSHOTS_STOCK_ANTIGUOS,
+    LOTE_RETENCION
+)
+
+PRODUCTO_EJEMPLO = 1
+CLAVE_EJEMPLO = 'pedido-ejemplo'
+INTERVALO_EJEMPLO = ('2024-01-01 00:00:00', '2024-01-02 00:00:00')
+
+# Módulos cuyas constantes QUERY_* deben aparecer en consultas()
+MODULOS_CONSULTAS = (
+    alertas, app, catalogo_csv, eventos, historico_stock, movimientos, reservas, resumen, retencion
+)
+
+# (módulo, constante) -> motivo por el que no se verifica con EXPLAIN
+SIN_EXPLAIN = {
+    ('retencion', 'QUERY_PARTICIONES'): 'lee information_schema, no tablas de la aplicación',
+}
+
+# (consulta, alias de tabla) -> motivo
+ESCANEOS_PERMITIDOS = {
+    ('categorias', 'categorias'): 'tabla pequeña, se lista completa',
+    ('csv_categorias', 'categorias'): 'tabla pequeña, la importación valida contra todas',
+    ('csv_exportar', 'productos'): 'la exportación recorre todo el catálogo',
+    ('dashboard_categorias', 'resumen_categorias'): 'una fila por categoría',
+    ('dashboard_categorias', 'resumen_categorias_deltas'):
+        'solo los cambios sin consolidar (backend/resumen.py la vacía cada RESUMEN_INTERVALO)',
+    ('dashboard_alertas', 'resumen_alertas_deltas'): 'solo los cambios sin consolidar',
+    ('alertas_generar_todas', 'p'): 'la pasada periódica evalúa todos los productos activos',
+    ('historico_catalogo', 'p'): 'el modo masivo devuelve todo el catálogo',
+    ('historico_crear_snapshot', 'cambios_stock'):
+        'el snapshot suma todo el historial conservado (STOCK_HISTORICO_RETENCION_DIAS)',
+}
+
+
+def consultas():
+    """Lista de (nombre, query, params) con las consultas de la API"""
+    columnas = columnas_producto(None)
+    listado = query_productos(columnas, limite=50)
+    pagina = query_productos(columnas, ('M', PRODUCTO_EJEMPLO), 50)
+    busqueda = construir_busqueda('lapto', stock='bajo')
+    marcadores = ', '.join(['%s'] * 2)
+    ids = [PRODUCTO_EJEMPLO, PRODUCTO_EJEMPLO + 1]
+    casos = ' '.join(['WHEN %s THEN %s'] * 2)
+    cantidades = [PRODUCTO_EJEMPLO, 1, PRODUCTO_EJEMPLO + 1, 1]
+    filtro_edicion, params_edicion = construir_filtro({'categoria_id': 1}, 1)
+    fila_csv = ['LAP001', 'Laptop', '', '999.99', 10, 2, 1, '']
+
+    return [
+        ('productos_listado', *listado),
+        ('productos_pagina', *pagina),
+        ('productos_busqueda', *busqueda),
+        ('producto_detalle', QUERY_PRODUCTO, [PRODUCTO_EJEMPLO]),
+        ('producto_codigo', "SELECT id FROM productos WHERE codigo = %s", ['LAP001']),
+        ('producto_codigo_otro', "SELECT id FROM productos WHERE codigo = %s AND id != %s",
+         ['LAP001', PRODUCTO_EJEMPLO]),
+        ('categorias', QUERY_CATEGORIAS, []),
+        ('predicciones', *query_predicciones(None, 100)),
+        ('predicciones_producto', *query_predicciones(PRODUCTO_EJEMPLO, 100)),
+        ('dashboard_categorias', QUERY_DASHBOARD_CATEGORIAS, []),
+        ('dashboard_alertas', QUERY_DASHBOARD_ALERTAS, []),
+        ('dashboard_total_categorias', QUERY_TOTAL_CATEGORIAS, []),
+        ('alertas_recientes', QUERY_ALERTAS_RECIENTES, []),
+        ('alertas_marcar', QUERY_MARCAR_ALERTA, [1]),
+        ('alertas_generar_producto',
+         QUERY_GENERAR_ALERTAS.format(filtro=f"AND p.id IN ({marcadores})"),
+         [PRODUCTO_EJEMPLO, PRODUCTO_EJEMPLO + 1] * 2),
+        ('alertas_generar_todas', QUERY_GENERAR_ALERTAS.format(filtro=''), []),
+        ('historico_snapshot', QUERY_SNAPSHOT_ANTERIOR, [INTERVALO_EJEMPLO[1]]),
+        ('historico_producto', QUERY_STOCK_PRODUCTO,
+         [1, PRODUCTO_EJEMPLO, 1, PRODUCTO_EJEMPLO, *INTERVALO_EJEMPLO]),
+        ('historico_catalogo', QUERY_STOCK_CATALOGO, [1, 1, *INTERVALO_EJEMPLO, INTERVALO_EJEMPLO[1]]),
+        ('edicion_filtro', f"SELECT id FROM productos WHERE {filtro_edicion} ORDER BY id FOR UPDATE",
+         params_edicion),
+        ('edicion_lista', *sentencia_lista({PRODUCTO_EJEMPLO: {'precio': 10},
+                                            PRODUCTO_EJEMPLO + 1: {'categoria_id': None}}, ids)),
+        ('historico_snapshot_posterior', QUERY_SNAPSHOT_POSTERIOR, [INTERVALO_EJEMPLO[0]]),
+        ('historico_crear_snapshot', QUERY_CREAR_SNAPSHOT, [2, INTERVALO_EJEMPLO[1]]),
+        ('historico_vaciar_snapshot', QUERY_VACIAR_SNAPSHOT, [2]),
+        ('retencion_alertas', QUERY_ALERTAS_ANTIGUAS, [INTERVALO_EJEMPLO[0], LOTE_RETENCION]),
+        ('retencion_compactar', QUERY_COMPACTAR_ALERTAS,
+         [PRODUCTO_EJEMPLO, 'stock_bajo', '2024-01-01', 1, *INTERVALO_EJEMPLO]),
+        ('retencion_movimientos', QUERY_MOVIMIENTOS_ANTIGUOS, [INTERVALO_EJEMPLO[0], LOTE_RETENCION]),
+        ('retencion_archivar', QUERY_ARCHIVAR_MOVIMIENTOS.format(marcadores=marcadores), [1, 2]),
+        ('retencion_cambios_stock', QUERY_CAMBIOS_STOCK_ANTIGUOS, [INTERVALO_EJEMPLO[0], 0, LOTE_RETENCION]),
+        ('retencion_snapshots_stock', QUERY_SNAPSHOTS_STOCK_ANTIGUOS, [1, LOTE_RETENCION]),
+        ('movimientos_bloquear', QUERY_BLOQUEAR_PRODUCTOS.format(marcadores=marcadores), ids),
+        ('movimientos_insertar', QUERY_INSERTAR_MOVIMIENTO,
+         [PRODUCTO_EJEMPLO, 'entrada', 1, 'verificación', 1]),
+        ('movimientos_fijar_stock', QUERY_FIJAR_STOCK.format(casos=casos, marcadores=marcadores),
+         cantidades + ids),
+        ('reservas_clave', QUERY_RESERVAR_CLAVE, [CLAVE_EJEMPLO, 'huella']),
+        ('reservas_descontar', QUERY_DESCONTAR_STOCK.format(casos=casos, marcadores=marcadores),
+         cantidades + ids + cantidades),
+        ('reservas_insertar', QUERY_INSERTAR_SALIDA, [PRODUCTO_EJEMPLO, 1, 'verificación', 1]),
+        ('reservas_stock', QUERY_STOCK_PEDIDO.format(marcadores=marcadores), ids),
+        ('reservas_stock_activos', QUERY_STOCK_ACTIVOS.format(marcadores=marcadores), ids),
+        ('reservas_guardar_respuesta', QUERY_GUARDAR_RESPUESTA, ['{}', CLAVE_EJEMPLO]),
+        ('reservas_respuesta', QUERY_RESPUESTA_GUARDADA, [CLAVE_EJEMPLO]),
+        ('reservas_purgar', QUERY_PURGAR_CLAVES, [48, 10000]),
+        ('csv_categorias', QUERY_IDS_CATEGORIAS, []),
+        ('csv_upsert', sentencia_upsert(COLUMNAS_CSV), fila_csv),
+        ('csv_exportar', QUERY_EXPORTAR, []),
+        ('eventos_rango', QUERY_RANGO_EVENTOS, []),
+        ('eventos_desde', QUERY_EVENTOS_DESDE, [0, 100]),
+        ('eventos_ids', QUERY_EVENTOS_IDS.format(marcadores=marcadores), [1, 2]),
+        ('eventos_purgar', QUERY_PURGAR_EVENTOS, [24, 1, 10000]),
+        ('resumen_cambios_categorias', QUERY_CAMBIOS_CATEGORIAS, [LOTE_RESUMEN]),
+        ('resumen_sumar_categoria', QUERY_SUMAR_CATEGORIA, [1, 1, 0, 0, 10]),
+        ('resumen_borrar_categorias', QUERY_BORRAR_CAMBIOS_CATEGORIAS.format(marcadores=marcadores), [1, 2]),
+        ('resumen_cambios_alertas', QUERY_CAMBIOS_ALERTAS, [LOTE_RESUMEN]),
+        ('resumen_sumar_alertas', QUERY_SUMAR_ALERTAS, [1]),
+        ('resumen_borrar_alertas', QUERY_BORRAR_CAMBIOS_ALERTAS.format(marcadores=marcadores), [1, 2]),
+    ]
+
+
+def patron_plantilla(plantilla):
+    """Regex que reconoce ``plantilla`` con sus ``{marcadores}`` ya sustituidos"""
+    partes = re.split(r'\{\w+\}', plantilla.strip())
+    return re.compile('.*?'.join(re.escape(parte) for parte in partes), re.DOTALL)
+
+
+def constantes_sin_verificar(lista):
+    """Constantes QUERY_* de MODULOS_CONSULTAS que no aparecen en ``lista``"""
+    textos = [query.strip() for _, query, _ in lista]
+    faltantes = []
+    for modulo in MODULOS_CONSULTAS:
+        nombre_modulo = modulo.__name__.rsplit('.', 1)[-1]
+        for nombre, plantilla in vars(modulo).items():
+            if not nombre.startswith('QUERY_') or not isinstance(plantilla, str):
+                continue
+            if (nombre_modulo, nombre) in SIN_EXPLAIN:
+                continue
+            patron = patron_plantilla(plantilla)
+            # Los constructores añaden filtros y ORDER BY detrás de la constante
+            if not any(patron.match(texto) for texto in textos):
+                faltantes.append(f'{nombre_modulo}.{nombre}')
+    return faltantes
+
+
+def escaneos_completos(connection, nombre, query, params):
+    """Filas del plan que recorren una tabla completa sin estar permitidas"""
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute('EXPLAIN ' + query, params)
+    plan = cursor.fetchall()
+    cursor.close()
+
+    return [
+        fila for fila in plan
+        if fila['type'] == 'ALL'
+        # <derivedN>/<unionN,M> son tablas temporales de la propia consulta
+        and not (fila['table'] or '').startswith('<')
+        and (nombre, fila['table']) not in ESCANEOS_PERMITIDOS
+    ]
+
+
+def main():
+    with db_config.connection() as connection:
+        if not connection:
+            print("❌ No se pudo conectar a MySQL")
+            sys.exit(1)
+
+        lista = consultas()
+        errores = 0
+        for faltante in constantes_sin_verificar(lista):
+            print(f"❌ {faltante}: no está en consultas() ni en SIN_EXPLAIN")
+            errores += 1
+
+        for nombre, query, params in lista:
+            try:
+                escaneos = escaneos_completos(connection, nombre, query, params)
+            except Exception as e:
+                print(f"❌ {nombre}: error en EXPLAIN: {e}")
+                errores += 1
+                continue
+
+            if escaneos:
+                errores += 1
+                tablas = ', '.join(f"{fila['table']} (~{fila['rows']} filas)" for fila in escaneos)
+                print(f"❌ {nombre}: recorrido completo de {tablas}")
+            else:
+                print(f"✅ {nombre}")
+
+    for (nombre, tabla), motivo in ESCANEOS_PERMITIDOS.items():
+        print(f"ℹ️ {nombre}/{tabla}: recorrido permitido ({motivo})")
+    for (modulo, nombre), motivo in SIN_EXPLAIN.items():
+        print(f"ℹ️ {modulo}.{nombre}: sin EXPLAIN ({motivo})")
+
+    if errores:
+        print(f"\n❌ {errores} consultas sin índice o sin verificar")
+        sys.exit(1)
+    print("\n✅ Todas las consultas usan índices")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,22 @@
 
 // Configuración de la API
 const API_BASE_URL = 'http://localhost:5000/api';
+// /api/eventos de la API asíncrona (backend/app_async.py, solo con MySQL),
+// donde un cliente conectado no ocupa un hilo; null si no está desplegada,
+// p. ej. 'http://localhost:5001/api/eventos'
+const EVENTOS_ASYNC_URL = null;
+// Primero la API síncrona; si rechaza el cliente (503, sin plazas en el
+// worker) o no responde, la asíncrona
+const EVENTOS_URLS = [`${API_BASE_URL}/eventos`, EVENTOS_ASYNC_URL].filter(Boolean);
+const RECONEXION_EVENTOS_MS = 3000;
 
 // Variables globales
 let productos = [];
 let categorias = [];
+let alertas = [];
+let productosCargados = false;
+let alertasCargadas = false;
+let temporizadorResumen = null;
 
 // Inicialización cuando se carga la página
 document.addEventListener('DOMContentLoaded', function() {
@@ -20,6 +32,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Cargar datos iniciales
     cargarDashboard();
     
+    // Recibir los cambios en tiempo real
+    conectarEventos();
+    
     // Verificar estado del sistema
     verificarEstadoSistema();
 });
@@ -102,27 +117,30 @@ async function verificarEstadoSistema() {
 // Cargar dashboard con estadísticas
 async function cargarDashboard() {
     try {
-        // Cargar productos, categorías y alertas en paralelo
-        const [productosResponse, categoriasResponse, alertasResponse] = await Promise.all([
-            fetch(`${API_BASE_URL}/productos`),
+        // Cargar resumen, categorías y alertas en paralelo (el resumen
+        // lo calcula el servidor, sin descargar el catálogo completo)
+        const [dashboardResponse, categoriasResponse, alertasResponse] = await Promise.all([
+            fetch(`${API_BASE_URL}/dashboard`),
             fetch(`${API_BASE_URL}/categorias`),
             fetch(`${API_BASE_URL}/alertas`)
         ]);
         
-        const productosData = await productosResponse.json();
+        const dashboardData = await dashboardResponse.json();
         const categoriasData = await categoriasResponse.json();
         const alertasData = await alertasResponse.json();
         
-        if (productosData.success && categoriasData.success) {
-            productos = productosData.productos;
+        if (categoriasData.success) {
             categorias = categoriasData.categorias;
-            
+        }
+        
+        if (dashboardData.success) {
             // Actualizar estadísticas
-            actualizarEstadisticas();
+            actualizarEstadisticas(dashboardData);
         }
         
         if (alertasData.success) {
-            mostrarAlertasRecientes(alertasData.alertas);
+            alertas = alertasData.alertas;
+            mostrarAlertasRecientes(alertas);
         }
     } catch (error) {
         console.error('Error cargando dashboard:', error);
@@ -130,22 +148,18 @@ async function cargarDashboard() {
 }
 
 // Actualizar estadísticas del dashboard
-function actualizarEstadisticas() {
+function actualizarEstadisticas(resumen) {
     // Total productos
-    document.getElementById('total-productos').textContent = productos.length;
+    document.getElementById('total-productos').textContent = resumen.total_productos;
     
     // Productos con stock bajo
-    const stockBajo = productos.filter(p => p.stock_actual <= p.stock_minimo).length;
-    document.getElementById('stock-bajo').textContent = stockBajo;
+    document.getElementById('stock-bajo').textContent = resumen.stock_bajo;
     
     // Total categorías
-    document.getElementById('total-categorias').textContent = categorias.length;
+    document.getElementById('total-categorias').textContent = resumen.total_categorias;
     
     // Valor total del inventario
-    const valorTotal = productos.reduce((total, producto) => {
-        return total + (producto.precio * producto.stock_actual);
-    }, 0);
-    document.getElementById('valor-inventario').textContent = `$${valorTotal.toFixed(2)}`;
+    document.getElementById('valor-inventario').textContent = `$${resumen.valor_inventario.toFixed(2)}`;
 }
 
 // Mostrar alertas recientes en el dashboard
@@ -208,13 +222,8 @@ async function marcarAlertaLeida(alertaId) {
         const data = await response.json();
         
         if (data.success) {
-            // Recargar alertas
-            const alertasResponse = await fetch(`${API_BASE_URL}/alertas`);
-            const alertasData = await alertasResponse.json();
-            
-            if (alertasData.success) {
-                mostrarAlertasRecientes(alertasData.alertas);
-            }
+            // Actualizar solo esa alerta (el evento alerta_leida llega también)
+            aplicarAlertaLeida({ id: alertaId, leida: 1 });
         }
     } catch (error) {
         console.error('Error marcando alerta como leída:', error);
@@ -229,6 +238,7 @@ async function cargarProductos() {
         
         if (data.success) {
             productos = data.productos;
+            productosCargados = true;
             mostrarProductos(productos);
         } else {
             mostrarError('Error cargando productos');
@@ -270,16 +280,14 @@ function mostrarProductos(productos) {
         const stockClass = producto.stock_actual <= producto.stock_minimo ? 'stock-bajo' : 'stock-normal';
         const stockText = producto.stock_actual === 0 ? 'Agotado' : producto.stock_actual;
         
-        // Imagen del producto
-        let imagenUrl = producto.imagen_url;
-        
-        // Si es una imagen local (empieza con /uploads), agregar la URL del servidor
-        if (imagenUrl && imagenUrl.startsWith('/uploads/')) {
-            imagenUrl = `http://localhost:5000${imagenUrl}`;
-        }
+        // Imagen del producto: en la tabla, la variante de 300px (WebP si el navegador la admite)
+        const imagen = imagenesProducto(producto.imagen_url);
         
-        const imagenHtml = imagenUrl ? 
-            `<img src="${imagenUrl}" alt="${producto.nombre}" class="producto-imagen" onclick="ampliarImagen('${imagenUrl}', '${producto.nombre}')">` :
+        const imagenHtml = imagen ? 
+            `<picture>
+                ${imagen.listaWebp ? `<source srcset="${imagen.listaWebp}" type="image/webp">` : ''}
+                <img src="${imagen.lista}" alt="${producto.nombre}" class="producto-imagen" loading="lazy" onclick="ampliarImagen('${imagen.detalle}', '${producto.nombre}')">
+             </picture>` :
             `<div class="producto-sin-imagen">
                 <i class="fas fa-image"></i>
                 <small>Sin imagen</small>
@@ -392,7 +400,9 @@ async function cargarAlertas() {
         const data = await response.json();
         
         if (data.success) {
-            mostrarTodasLasAlertas(data.alertas);
+            alertas = data.alertas;
+            alertasCargadas = true;
+            mostrarTodasLasAlertas(alertas);
         } else {
             mostrarError('Error cargando alertas');
         }
@@ -516,11 +526,8 @@ async function guardarProducto() {
                 // Mostrar mensaje de éxito
                 mostrarNotificacion('Producto creado exitosamente', 'success');
                 
-                // Recargar productos
-                await cargarProductos();
-                
-                // Actualizar dashboard
-                await cargarDashboard();
+                // Añadir o actualizar el producto sin recargar la lista
+                aplicarProducto(data.producto);
             } else {
                 mostrarNotificacion(data.error || 'Error creando producto', 'error');
             }
@@ -558,11 +565,8 @@ async function guardarProducto() {
                 // Mostrar mensaje de éxito
                 mostrarNotificacion('Producto creado exitosamente', 'success');
                 
-                // Recargar productos
-                await cargarProductos();
-                
-                // Actualizar dashboard
-                await cargarDashboard();
+                // Añadir o actualizar el producto sin recargar la lista
+                aplicarProducto(data.producto);
             } else {
                 mostrarNotificacion(data.error || 'Error creando producto', 'error');
             }
@@ -574,15 +578,35 @@ async function guardarProducto() {
     }
 }
 
+// URLs de la imagen de un producto. Las imágenes subidas guardan en
+// imagen_url la variante `detalle` (800px); las de `lista` y las WebP se
+// derivan de su nombre. Mientras se generan, el servidor sirve el original.
+function imagenesProducto(imagenUrl) {
+    if (!imagenUrl) {
+        return null;
+    }
+    if (!imagenUrl.startsWith('/uploads/')) {
+        return { detalle: imagenUrl, lista: imagenUrl, listaWebp: null };
+    }
+    
+    // Si es una imagen local, agregar la URL del servidor
+    const url = `http://localhost:5000${imagenUrl}`;
+    const partes = url.match(/^(.*\/[0-9a-f]{64})_detalle(\.\w+)$/);
+    if (!partes) {
+        return { detalle: url, lista: url, listaWebp: null };
+    }
+    return {
+        detalle: url,
+        lista: `${partes[1]}_lista${partes[2]}`,
+        listaWebp: `${partes[1]}_lista.webp`
+    };
+}
+
 function verProducto(id) {
     const producto = productos.find(p => p.id === id);
     if (producto) {
-        let imagenUrl = producto.imagen_url;
-        
-        // Si es una imagen local, agregar la URL del servidor
-        if (imagenUrl && imagenUrl.startsWith('/uploads/')) {
-            imagenUrl = `http://localhost:5000${imagenUrl}`;
-        }
+        const imagen = imagenesProducto(producto.imagen_url);
+        const imagenUrl = imagen ? imagen.detalle : null;
         
         const mensaje = `
 Producto: ${producto.nombre}
@@ -653,11 +677,8 @@ async function actualizarProducto(id) {
                 // Mostrar mensaje de éxito
                 mostrarNotificacion('Producto actualizado exitosamente', 'success');
                 
-                // Recargar productos
-                await cargarProductos();
-                
-                // Actualizar dashboard
-                await cargarDashboard();
+                // Añadir o actualizar el producto sin recargar la lista
+                aplicarProducto(data.producto);
                 
                 // Restaurar función original del botón
                 document.querySelector('#productoModal .btn-primary').onclick = guardarProducto;
@@ -692,11 +713,8 @@ async function actualizarProducto(id) {
                 // Mostrar mensaje de éxito
                 mostrarNotificacion('Producto actualizado exitosamente', 'success');
                 
-                // Recargar productos
-                await cargarProductos();
-                
-                // Actualizar dashboard
-                await cargarDashboard();
+                // Añadir o actualizar el producto sin recargar la lista
+                aplicarProducto(data.producto);
                 
                 // Restaurar función original del botón
                 document.querySelector('#productoModal .btn-primary').onclick = guardarProducto;
@@ -815,4 +833,129 @@ function ampliarImagen(src, nombre) {
     document.getElementById('imagenModal').addEventListener('hidden.bs.modal', function() {
         this.remove();
     });
-} 
\ No newline at end of file
+} 
+
+// Eventos en tiempo real (Server-Sent Events). El navegador se reconecta
+// solo y envía Last-Event-ID, así que el servidor reenvía lo que se perdió.
+// Si una URL no llega a abrir el flujo (503 sin plazas o servidor parado) se
+// prueba la siguiente de EVENTOS_URLS; EventSource no reintenta tras un 503,
+// así que se reconecta aquí con ?ultimo_id=.
+let ultimoIdEvento = null;
+
+function conectarEventos(indice = 0) {
+    if (!window.EventSource) {
+        return;
+    }
+    
+    const parametros = ultimoIdEvento ? `?ultimo_id=${encodeURIComponent(ultimoIdEvento)}` : '';
+    const eventos = new EventSource(`${EVENTOS_URLS[indice]}${parametros}`);
+    let abierto = false;
+    const conId = manejador => e => {
+        if (e.lastEventId) {
+            ultimoIdEvento = e.lastEventId;
+        }
+        manejador(e);
+    };
+    const alProducto = conId(e => aplicarProducto(JSON.parse(e.data)));
+    
+    eventos.addEventListener('open', () => { abierto = true; });
+    eventos.addEventListener('conectado', conId(() => {}));
+    eventos.addEventListener('producto_creado', alProducto);
+    eventos.addEventListener('producto_actualizado', alProducto);
+    eventos.addEventListener('stock_cambiado', alProducto);
+    eventos.addEventListener('alerta_creada', conId(e => aplicarAlertaCreada(JSON.parse(e.data))));
+    eventos.addEventListener('alerta_leida', conId(e => aplicarAlertaLeida(JSON.parse(e.data))));
+    
+    // El servidor ya no tiene todos los eventos perdidos: recargar las listas
+    eventos.addEventListener('reiniciar', conId(() => {
+        cargarDashboard();
+        if (productosCargados) {
+            cargarProductos();
+        }
+        if (alertasCargadas) {
+            cargarAlertas();
+        }
+    }));
+    
+    // También se dispara al perder la conexión (sin datos); EventSource reintenta
+    eventos.addEventListener('error', e => {
+        if (e.data) {
+            console.error('Error en eventos:', JSON.parse(e.data).error);
+            return;
+        }
+        if (!abierto || eventos.readyState === EventSource.CLOSED) {
+            eventos.close();
+            const siguiente = abierto ? indice : (indice + 1) % EVENTOS_URLS.length;
+            setTimeout(() => conectarEventos(siguiente), RECONEXION_EVENTOS_MS);
+        }
+    });
+}
+
+// Aplicar un producto creado o modificado a la lista cargada
+function aplicarProducto(producto) {
+    if (productosCargados) {
+        const indice = productos.findIndex(p => p.id === producto.id);
+        // Conservar los campos que el evento no trae
+        const actualizado = indice !== -1 ? { ...productos[indice], ...producto } : producto;
+        
+        if (indice !== -1) {
+            productos.splice(indice, 1);
+        }
+        
+        // Los inactivos no se listan; el resto va en su sitio por nombre
+        if (actualizado.activo) {
+            const posicion = productos.findIndex(p => p.nombre.localeCompare(actualizado.nombre) > 0);
+            productos.splice(posicion === -1 ? productos.length : posicion, 0, actualizado);
+        }
+        
+        mostrarProductos(productos);
+    }
+    
+    programarResumen();
+}
+
+// Aplicar una alerta nueva a las listas de alertas
+function aplicarAlertaCreada(alerta) {
+    if (alertas.some(a => a.id === alerta.id)) {
+        return;
+    }
+    
+    // Igual que GET /api/alertas: las 20 más recientes
+    alertas = [alerta, ...alertas].slice(0, 20);
+    mostrarAlertasRecientes(alertas);
+    if (alertasCargadas) {
+        mostrarTodasLasAlertas(alertas);
+    }
+}
+
+// Marcar una alerta como leída en las listas de alertas
+function aplicarAlertaLeida(cambio) {
+    const alerta = alertas.find(a => a.id === cambio.id);
+    if (!alerta) {
+        return;
+    }
+    
+    alerta.leida = cambio.leida;
+    mostrarAlertasRecientes(alertas);
+    if (alertasCargadas) {
+        mostrarTodasLasAlertas(alertas);
+    }
+}
+
+// Agrupar las actualizaciones de estadísticas de una ráfaga de eventos en
+// una sola petición del resumen (no descarga ninguna lista)
+function programarResumen() {
+    clearTimeout(temporizadorResumen);
+    temporizadorResumen = setTimeout(async () => {
+        try {
+            const response = await fetch(`${API_BASE_URL}/dashboard`);
+            const data = await response.json();
+            
+            if (data.success) {
+                actualizarEstadisticas(data);
+            }
+        } catch (error) {
+            console.error('Error actualizando estadísticas:', error);
+        }
+    }, 1000);
+}
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de predicción de demanda
+
+Mide el tiempo de ``predecir`` frente al número de productos con historial
+sintético (no necesita base de datos), en un proceso y en paralelo. El
+paralelo se mide con cualquier tamaño, aunque esté por debajo de
+``MIN_FILAS_PARALELO``, para ver dónde empieza a compensar en cada máquina.
+
+Uso:
+    python ml_models/benchmark_prediccion.py --productos 1000 10000 100000 --dias 90
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_models.prediccion_demanda import MIN_FILAS_PARALELO, predecir
+
+
+def historial_sintetico(productos, dias, semilla=42):
+    """Demanda diaria con tendencia lineal y ruido de Poisson por producto"""
+    rng = np.random.default_rng(semilla)
+    base = rng.uniform(0, 50, size=(productos, 1))
+    tendencia = rng.normal(0, 0.2, size=(productos, 1))
+    media = np.clip(base + tendencia * np.arange(dias), 0, None)
+    return rng.poisson(media).astype(np.float64)
+
+
+def medir(demanda, horizonte, workers, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        predecir(demanda, horizonte, workers, min_filas=0)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de predicción de demanda')
+    parser.add_argument('--productos', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--dias', type=int, default=90)
+    parser.add_argument('--horizonte', type=int, default=7)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'productos':>10} {'1 proceso (s)':>14} {f'{args.workers} procesos (s)':>16} {'productos/s':>12}")
+    for productos in args.productos:
+        demanda = historial_sintetico(productos, args.dias)
+        serie = medir(demanda, args.horizonte, 1, args.repeticiones)
+
+        paralelo = None
+        if args.workers > 1:
+            paralelo = medir(demanda, args.horizonte, args.workers, args.repeticiones)
+
+        mejor = min(serie, paralelo or serie)
+        texto_paralelo = f"{paralelo:16.4f}" if paralelo is not None else f"{'-':>16}"
+        print(f"{productos:>10} {serie:14.4f} {texto_paralelo} {productos / mejor:12.0f}")
+    print(f"predecir usa el pool a partir de {MIN_FILAS_PARALELO} productos (MIN_FILAS_PARALELO)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Raíz del repositorio en el path para importar backend, database y ml_models
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,140 @@
+"""Pruebas de CacheCatalogo: TTL, expulsión LRU e invalidación por generación"""
+
+import pytest
+
+from backend import cache
+from backend.cache import BackendMemoria, CacheCatalogo
+
+
+class Reloj:
+    """Sustituto de ``time`` con un ``monotonic()`` que solo avanza a mano"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+class Cargador:
+    """``cargar()`` que cuenta sus llamadas y devuelve un valor nuevo cada vez"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self):
+        self.llamadas += 1
+        return self.llamadas
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache, 'time', reloj)
+    return reloj
+
+
+def test_acierto_dentro_del_ttl(reloj):
+    catalogo = CacheCatalogo(ttl=60)
+    cargar = Cargador()
+
+    assert catalogo.obtener('productos', 'lista', cargar) == 1
+    reloj.avanzar(59)
+    assert catalogo.obtener('productos', 'lista', cargar) == 1
+    assert cargar.llamadas == 1
+    assert (catalogo.aciertos, catalogo.fallos) == (1, 1)
+
+
+def test_entrada_caducada_se_recarga(reloj):
+    catalogo = CacheCatalogo(ttl=60)
+    cargar = Cargador()
+
+    catalogo.obtener('productos', 'lista', cargar)
+    reloj.avanzar(61)
+    assert catalogo.obtener('productos', 'lista', cargar) == 2
+
+
+def test_ttl_propio_de_la_llamada(reloj):
+    catalogo = CacheCatalogo(ttl=60)
+    cargar = Cargador()
+
+    catalogo.obtener('productos', 'lista', cargar, ttl=5)
+    reloj.avanzar(6)
+    assert catalogo.obtener('productos', 'lista', cargar, ttl=5) == 2
+
+
+def test_lru_expulsa_la_menos_usada(reloj):
+    catalogo = CacheCatalogo(max_entradas=2, ttl=60)
+    cargas = {clave: Cargador() for clave in 'abc'}
+
+    catalogo.obtener('productos', 'a', cargas['a'])
+    catalogo.obtener('productos', 'b', cargas['b'])
+    # Usar 'a' la deja como la más reciente: al entrar 'c' sale 'b'
+    catalogo.obtener('productos', 'a', cargas['a'])
+    catalogo.obtener('productos', 'c', cargas['c'])
+
+    assert catalogo.expulsiones == 1
+    catalogo.obtener('productos', 'a', cargas['a'])
+    catalogo.obtener('productos', 'b', cargas['b'])
+    assert cargas['a'].llamadas == 1
+    assert cargas['b'].llamadas == 2
+
+
+def test_error_de_carga_no_se_cachea(reloj):
+    catalogo = CacheCatalogo(ttl=60)
+
+    def fallar():
+        raise RuntimeError('sin base de datos')
+
+    with pytest.raises(RuntimeError):
+        catalogo.obtener('productos', 'lista', fallar)
+    assert catalogo.obtener('productos', 'lista', Cargador()) == 1
+
+
+def test_invalidar_solo_afecta_a_su_espacio(reloj):
+    catalogo = CacheCatalogo(ttl=60)
+    productos, categorias = Cargador(), Cargador()
+
+    catalogo.obtener('productos', 'lista', productos)
+    catalogo.obtener('categorias', 'lista', categorias)
+    catalogo.invalidar('productos')
+
+    assert catalogo.obtener('productos', 'lista', productos) == 2
+    assert catalogo.obtener('categorias', 'lista', categorias) == 1
+    assert catalogo.invalidaciones == 1
+
+
+def test_generacion_compartida_entre_workers(reloj):
+    compartido = BackendMemoria()
+    worker_a = CacheCatalogo(ttl=60, compartido=compartido, intervalo_sync=1.0)
+    worker_b = CacheCatalogo(ttl=60, compartido=compartido, intervalo_sync=1.0)
+    cargar = Cargador()
+
+    worker_a.obtener('productos', 'lista', cargar)
+    worker_b.invalidar('productos')
+    assert compartido.get('cache:gen:productos') == 1
+
+    # Hasta la siguiente sincronización, A sigue con su generación
+    reloj.avanzar(0.5)
+    assert worker_a.obtener('productos', 'lista', cargar) == 1
+    reloj.avanzar(1)
+    assert worker_a.obtener('productos', 'lista', cargar) == 2
+
+
+def test_ttl_corto_tras_una_invalidacion_remota(reloj):
+    compartido = BackendMemoria()
+    worker_a = CacheCatalogo(ttl=60, compartido=compartido, intervalo_sync=0, ttl_tras_invalidar=5)
+    worker_b = CacheCatalogo(ttl=60, compartido=compartido, intervalo_sync=0)
+    cargar = Cargador()
+
+    worker_b.invalidar('productos')
+    # Lo que A carga justo después puede venir de una réplica atrasada
+    worker_a.obtener('productos', 'lista', cargar)
+    reloj.avanzar(6)
+    assert worker_a.obtener('productos', 'lista', cargar) == 2
+    # Pasada la ventana, la entrada vuelve a durar el TTL normal
+    reloj.avanzar(30)
+    assert worker_a.obtener('productos', 'lista', cargar) == 2
@@ -0,0 +1,53 @@
+"""Pruebas de la importación del catálogo en CSV"""
+
+from decimal import Decimal
+import io
+
+import pytest
+
+from backend.catalogo_csv import importar_csv, validar_fila
+from database.sqlite import conectar_sqlite
+
+COLUMNAS = ['codigo', 'nombre', 'precio', 'stock_actual', 'categoria_id']
+
+
+def test_fila_valida():
+    fila = {'codigo': ' A-1 ', 'nombre': 'Laptop', 'precio': '899.90', 'stock_actual': '', 'categoria_id': '2'}
+    assert validar_fila(fila, COLUMNAS, {2}) == ('A-1', 'Laptop', Decimal('899.90'), 0, 2)
+
+
+@pytest.mark.parametrize('cambios, error', [
+    ({'nombre': ''}, 'Campo requerido: nombre'),
+    ({'precio': 'barato'}, 'precio no es un número'),
+    ({'precio': 'NaN'}, 'precio no es un número'),
+    ({'precio': 'sNaN'}, 'precio no es un número'),
+    ({'precio': 'Infinity'}, 'precio no es un número'),
+    ({'precio': '-1'}, 'no puede ser negativo'),
+    ({'stock_actual': '1.5'}, 'stock_actual no es un entero'),
+    ({'categoria_id': '9'}, 'La categoría 9 no existe'),
+])
+def test_fila_invalida(cambios, error):
+    fila = {'codigo': 'A-1', 'nombre': 'Laptop', 'precio': '10', 'stock_actual': '1', 'categoria_id': '2'}
+    fila.update(cambios)
+    with pytest.raises(ValueError, match=error):
+        validar_fila(fila, COLUMNAS, {2})
+
+
+def test_lectura_interrumpida_conserva_lo_guardado(tmp_path):
+    filas = ''.join(f'CSV-{i:04d},Producto {i},{i}.50\n' for i in range(400))
+    cuerpo = ('codigo,nombre,precio\n' + filas).encode() + b'CSV-X,Caf\xe9,1\n'
+    texto = io.TextIOWrapper(io.BytesIO(cuerpo), encoding='utf-8', newline='')
+
+    connection = conectar_sqlite(str(tmp_path / 'inventario.db'))
+    try:
+        resultado = importar_csv(connection, texto, tamano_lote=100)
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM productos WHERE codigo LIKE 'CSV-%'")
+        (importados,) = cursor.fetchone()
+        cursor.close()
+    finally:
+        connection.close()
+
+    assert resultado['guardadas'] == resultado['procesadas'] == importados > 0
+    assert resultado['interrumpida']['linea'] == resultado['procesadas'] + 1
+    assert 'utf-8' in resultado['interrumpida']['error']
@@ -0,0 +1,126 @@
+"""Pruebas de la edición masiva: validación y UPDATE por conjuntos del modo lista"""
+
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from backend.edicion_masiva import aplicar_edicion, sentencia_lista, validar_edicion
+from database.sqlite import conectar_sqlite, traducir
+
+
+@pytest.fixture
+def conexion():
+    conexion = sqlite3.connect(':memory:')
+    conexion.execute("""
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, nombre TEXT, descripcion TEXT,
+                                precio REAL, stock_actual INT, stock_minimo INT,
+                                categoria_id INT, activo INT)
+    """)
+    conexion.executemany('INSERT INTO productos VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [
+        (1, 'Laptop', 'Portátil', 900, 10, 3, 1, 1),
+        (2, 'Mouse', 'Inalámbrico', 25, 50, 10, 1, 1),
+        (3, 'Camiseta', 'Algodón', 15, 100, 20, 2, 1),
+    ])
+    yield conexion
+    conexion.close()
+
+
+def _sqlite(sentencia):
+    sql, params = sentencia
+    return traducir(sql), params
+
+
+def productos(conexion):
+    return {fila[0]: fila[1:] for fila in conexion.execute('SELECT * FROM productos ORDER BY id')}
+
+
+def test_campos_no_indicados_conservan_su_valor(conexion):
+    cambios = {
+        1: {'precio': Decimal('850.00'), 'descripcion': None},
+        2: {'categoria_id': None, 'nombre': 'Ratón'},
+    }
+    conexion.execute(*_sqlite(sentencia_lista(cambios, [1, 2], 'sqlite')))
+
+    assert productos(conexion) == {
+        1: ('Laptop', None, 850.0, 10, 3, 1, 1),
+        2: ('Ratón', 'Inalámbrico', 25.0, 50, 10, None, 1),
+        3: ('Camiseta', 'Algodón', 15.0, 100, 20, 2, 1),
+    }
+
+
+def test_una_fila_por_producto_en_mysql():
+    sql, params = sentencia_lista({1: {'activo': False}, 2: {'activo': True}, 3: {'stock_minimo': 5}},
+                                  [1, 2, 3])
+    assert sql.count('UNION ALL') == 2
+    assert 'UPDATE productos p' in sql and 'JOIN (' in sql
+    # id, nuevo_stock_minimo y nuevo_activo por producto, en orden de CAMPOS_EDITABLES
+    assert params == [1, None, False, 2, None, True, 3, 5, None]
+
+
+def test_edicion_en_lista_acumula_cambios_y_errores():
+    edicion = validar_edicion({'productos': [
+        {'id': 1, 'precio': '10.005'},
+        {'id': 2, 'codigo': 'NUEVO'},
+        {'id': 1, 'stock_minimo': 4, 'descripcion': None},
+        {'precio': 1},
+    ]}, maximo=10)
+
+    assert edicion['modo'] == 'lista'
+    assert edicion['cambios'] == {1: {'precio': Decimal('10.01'), 'stock_minimo': 4, 'descripcion': None}}
+    assert edicion['indices'] == {1: 2}
+    assert [error['indice'] for error in edicion['errores']] == [1, 3]
+    assert 'PUT /api/productos' in edicion['errores'][0]['error']
+    assert edicion['campos'] == {'precio', 'stock_minimo', 'descripcion'}
+
+
+def test_edicion_con_filtro():
+    edicion = validar_edicion({
+        'filtro': {'categoria_id': 2, 'activo': True},
+        'cambios': {'precio': {'porcentaje': 5}, 'stock_minimo': 3}
+    }, maximo=10)
+
+    assert edicion['modo'] == 'filtro'
+    assert edicion['where'] == 'categoria_id = %s AND activo = %s'
+    assert edicion['params'] == [2, True]
+    assert edicion['asignaciones'] == [
+        ('precio = GREATEST(ROUND(precio * %s, 2), 0)', [Decimal('1.05')]),
+        ('stock_minimo = %s', [3]),
+    ]
+
+
+@pytest.mark.parametrize('data, error', [
+    ({}, 'Se requiere productos'),
+    ({'productos': []}, 'lista no vacía'),
+    ({'productos': [{'id': i, 'activo': True} for i in range(3)]}, 'supera el máximo de 2'),
+    ({'filtro': {}, 'cambios': {'activo': False}}, 'al menos una condición'),
+    ({'filtro': {'codigo': 'X'}, 'cambios': {'activo': False}}, 'Filtro no admitido'),
+    ({'filtro': {'ids': [1, 2, 3]}, 'cambios': {'activo': False}}, 'como máximo 2 ids'),
+    ({'filtro': {'activo': True}, 'cambios': {}}, 'al menos un campo'),
+    ({'filtro': {'activo': True}, 'cambios': {'nombre': {'sumar': 1}}}, 'solo admite un valor'),
+    ({'filtro': {'activo': True}, 'cambios': {'stock_actual': {'porcentaje': 5}}}, 'operación no admitida'),
+    ({'filtro': {'activo': True}, 'cambios': {'precio': -1}}, 'no puede ser negativo'),
+])
+def test_edicion_invalida(data, error):
+    with pytest.raises(ValueError, match=error):
+        validar_edicion(data, maximo=2)
+
+
+def test_filtro_que_supera_el_maximo_no_modifica_nada(tmp_path):
+    connection = conectar_sqlite(str(tmp_path / 'inventario.db'))
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT COUNT(*), SUM(stock_minimo) FROM productos WHERE activo = TRUE')
+        activos, stock_minimo = cursor.fetchone()
+        cambios = {'filtro': {'activo': True}, 'cambios': {'stock_minimo': {'sumar': 1}}}
+
+        with pytest.raises(ValueError, match=f'más de {activos - 1} productos'):
+            aplicar_edicion(connection, validar_edicion(cambios, maximo=activos - 1), 'sqlite')
+        cursor.execute('SELECT SUM(stock_minimo) FROM productos WHERE activo = TRUE')
+        assert cursor.fetchone()[0] == stock_minimo
+
+        ids, _ = aplicar_edicion(connection, validar_edicion(cambios, maximo=activos), 'sqlite')
+        assert len(ids) == activos
+        cursor.close()
+    finally:
+        connection.close()
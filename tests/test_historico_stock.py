@@ -0,0 +1,35 @@
+"""Pruebas de interpretar_fecha (parámetro ?fecha= de /api/stock/historico)"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend import historico_stock
+from backend.historico_stock import interpretar_fecha
+
+
+def test_fecha_sin_hora_es_el_cierre_del_dia():
+    ayer = (datetime.now() - timedelta(days=1)).date()
+    assert interpretar_fecha(ayer.isoformat()) == datetime.combine(ayer, datetime.max.time()).replace(
+        microsecond=999000)
+
+
+def test_fecha_con_zona_se_convierte_a_hora_local():
+    momento = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=1)
+    valor = momento.astimezone(timezone(timedelta(hours=9))).isoformat()
+    assert interpretar_fecha(valor) == momento.astimezone().replace(tzinfo=None)
+
+
+@pytest.mark.parametrize('valor', [None, '', '15/01/2024', 'ayer'])
+def test_fecha_invalida(valor):
+    with pytest.raises(ValueError):
+        interpretar_fecha(valor)
+
+
+def test_fecha_anterior_al_historial_conservado(monkeypatch):
+    monkeypatch.setattr(historico_stock, 'HISTORICO_RETENCION_DIAS', 30)
+    with pytest.raises(ValueError, match='30 días'):
+        interpretar_fecha((datetime.now() - timedelta(days=31)).isoformat())
+
+    monkeypatch.setattr(historico_stock, 'HISTORICO_RETENCION_DIAS', 0)
+    assert interpretar_fecha('2001-01-01') == datetime(2001, 1, 1, 23, 59, 59, 999000)
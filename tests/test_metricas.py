@@ -0,0 +1,24 @@
+"""Pruebas de huella_sql: forma de una sentencia sin sus valores"""
+
+from backend.metricas import huella_sql
+
+
+def test_valores_distintos_misma_huella():
+    assert huella_sql("SELECT * FROM productos WHERE id = 1 AND codigo = 'A'") == \
+        huella_sql("SELECT * FROM productos WHERE id = 2 AND codigo = 'B'")
+
+
+def test_listas_de_cualquier_longitud():
+    assert huella_sql('SELECT id FROM productos WHERE id IN (%s, %s)') == \
+        huella_sql('SELECT id FROM productos WHERE id IN (%s, %s, %s, %s)')
+    assert huella_sql('INSERT INTO t (a, b) VALUES (%s, %s)') == \
+        huella_sql('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)')
+    assert huella_sql('UPDATE p SET s = CASE id WHEN %s THEN %s END') == \
+        huella_sql('UPDATE p SET s = CASE id WHEN %s THEN %s WHEN %s THEN %s END')
+    assert huella_sql('SELECT %s AS id, %s AS n UNION ALL SELECT %s, %s') == \
+        huella_sql('SELECT %s AS id, %s AS n UNION ALL SELECT %s, %s UNION ALL SELECT %s, %s')
+
+
+def test_formas_distintas_huellas_distintas():
+    assert huella_sql('SELECT id FROM productos WHERE id = %s') != \
+        huella_sql('SELECT id FROM categorias WHERE id = %s')
@@ -0,0 +1,48 @@
+"""Pruebas de dividir_sentencias: scripts SQL de las migraciones"""
+
+from database.migrar import dividir_sentencias, listar_migraciones
+
+
+def test_divide_por_punto_y_coma():
+    assert dividir_sentencias('SELECT 1; SELECT 2;\n\nSELECT 3') == ['SELECT 1', 'SELECT 2', 'SELECT 3']
+
+
+def test_sentencias_vacias_se_omiten():
+    assert dividir_sentencias(';;\n SELECT 1 ;  ;') == ['SELECT 1']
+
+
+def test_punto_y_coma_dentro_de_cadenas_e_identificadores():
+    sql = """INSERT INTO t (`a;b`, c) VALUES ('x;y', "z;w"); SELECT 1"""
+    assert dividir_sentencias(sql) == ["""INSERT INTO t (`a;b`, c) VALUES ('x;y', "z;w")""", 'SELECT 1']
+
+
+def test_comillas_escapadas():
+    sql = r"SELECT 'it''s; ok', 'barra \'; sigue'; SELECT 2"
+    assert dividir_sentencias(sql) == [r"SELECT 'it''s; ok', 'barra \'; sigue'", 'SELECT 2']
+
+
+def test_comentarios_se_eliminan():
+    sql = """
+        -- cabecera; con punto y coma
+        CREATE TABLE t (id INT); # otro comentario; aquí
+        /* bloque;
+           de varias líneas */ DROP TABLE t;
+    """
+    assert [' '.join(s.split()) for s in dividir_sentencias(sql)] == ['CREATE TABLE t (id INT)', 'DROP TABLE t']
+
+
+def test_comentario_dentro_de_cadena_se_conserva():
+    assert dividir_sentencias("SELECT '-- no es comentario'; SELECT 2") == [
+        "SELECT '-- no es comentario'", 'SELECT 2'
+    ]
+
+
+def test_triggers_de_las_migraciones_quedan_enteros():
+    # Los triggers no usan BEGIN ... END: cada uno debe ser una única sentencia
+    for _, nombre, ruta in listar_migraciones():
+        with open(ruta, encoding='utf-8') as archivo:
+            sentencias = dividir_sentencias(archivo.read())
+        triggers = [sentencia for sentencia in sentencias if sentencia.upper().startswith('CREATE TRIGGER')]
+        assert all('INSERT INTO' in trigger.upper() or 'UPDATE' in trigger.upper() for trigger in triggers), nombre
+        assert not any(sentencia.upper().startswith(('SELECT', 'FROM', 'WHERE', 'UNION'))
+                       for sentencia in sentencias if sentencia not in triggers), nombre
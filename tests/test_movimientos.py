@@ -0,0 +1,29 @@
+"""Pruebas de la validación de movimientos de inventario"""
+
+import pytest
+
+from backend.movimientos import validar_movimiento
+
+
+def test_movimiento_normalizado():
+    movimiento = validar_movimiento({'producto_id': '1', 'tipo_movimiento': 'entrada', 'cantidad': '5',
+                                     'motivo': 'Compra', 'usuario_id': ''})
+    assert movimiento == {'producto_id': 1, 'tipo_movimiento': 'entrada', 'cantidad': 5,
+                          'motivo': 'Compra', 'usuario_id': None}
+
+
+def test_ajuste_admite_cantidad_negativa():
+    assert validar_movimiento({'producto_id': 1, 'tipo_movimiento': 'ajuste', 'cantidad': -3})['cantidad'] == -3
+
+
+@pytest.mark.parametrize('item, error', [
+    ('x', 'debe ser un objeto'),
+    ({'producto_id': 1, 'tipo_movimiento': 'robo', 'cantidad': 1}, 'tipo_movimiento debe ser uno de'),
+    ({'tipo_movimiento': 'entrada', 'cantidad': 1}, 'Campo requerido: producto_id'),
+    ({'producto_id': 1, 'tipo_movimiento': 'salida', 'cantidad': 'dos'}, 'deben ser enteros'),
+    ({'producto_id': 1, 'tipo_movimiento': 'salida', 'cantidad': -1}, 'mayor que 0'),
+    ({'producto_id': 1, 'tipo_movimiento': 'ajuste', 'cantidad': 0}, 'no puede ser 0'),
+])
+def test_movimiento_invalido(item, error):
+    with pytest.raises(ValueError, match=error):
+        validar_movimiento(item)
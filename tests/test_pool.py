@@ -0,0 +1,57 @@
+"""Pruebas de ConnectionPool: reutilización y descarte al devolver"""
+
+import pytest
+
+from database.config import ConnectionPool
+
+
+class Conexion:
+    """Conexión MySQL falsa con el estado que mira el pool"""
+
+    def __init__(self):
+        self.unread_result = False
+        self.in_transaction = False
+        self.conectada = True
+        self.cerrada = False
+        self.deshechas = 0
+
+    def is_connected(self):
+        return self.conectada
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        self.deshechas += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.cerrada = True
+
+
+@pytest.fixture
+def pool():
+    return ConnectionPool(Conexion, size=2, timeout=0)
+
+
+def test_conexion_sana_se_reutiliza(pool):
+    conexion = pool.obtener()
+    original = conexion._connection
+    original.in_transaction = True
+    conexion.close()
+
+    assert original.deshechas == 1
+    assert pool.obtener()._connection is original
+
+
+@pytest.mark.parametrize('estado', [{'unread_result': True}, {'conectada': False}])
+def test_conexion_inservible_se_descarta(pool, estado):
+    conexion = pool.obtener()
+    original = conexion._connection
+    for atributo, valor in estado.items():
+        setattr(original, atributo, valor)
+    conexion.close()
+
+    assert original.cerrada
+    assert pool.estadisticas() == {'tamano': 2, 'abiertas': 0, 'libres': 0, 'en_uso': 0}
+    assert pool.obtener()._connection is not original
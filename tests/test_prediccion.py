@@ -0,0 +1,51 @@
+"""Pruebas de predecir_bloque: regresión ponderada vectorizada por producto"""
+
+import numpy as np
+import pytest
+
+from ml_models.prediccion_demanda import predecir_bloque
+
+
+def test_demanda_constante():
+    cantidad, confianza = predecir_bloque(np.full((2, 30), 4.0), horizonte=7)
+    assert cantidad == pytest.approx([28.0, 28.0])
+    assert confianza == pytest.approx([100.0, 100.0])
+
+
+def test_tendencia_lineal_se_extrapola():
+    # 1, 2, ..., 10 unidades: los 3 días siguientes serán 11 + 12 + 13
+    cantidad, confianza = predecir_bloque([np.arange(1, 11, dtype=float)], horizonte=3)
+    assert cantidad[0] == pytest.approx(36.0)
+    assert confianza[0] == pytest.approx(100.0)
+
+
+def test_prevision_nunca_negativa():
+    # 13, 12, ..., 4: los días siguientes serían 3, 2, 1, 0, -1...; los negativos cuentan 0
+    cantidad, _ = predecir_bloque([np.arange(13, 3, -1, dtype=float)], horizonte=30)
+    assert cantidad[0] == pytest.approx(6.0)
+
+
+def test_filas_independientes():
+    bloque = np.array([[0.0] * 14, [2.0, 6.0] * 7])
+    cantidad, confianza = predecir_bloque(bloque, horizonte=7)
+    solo, confianza_sola = predecir_bloque(bloque[1:], horizonte=7)
+
+    assert cantidad[0] == 0
+    assert confianza[0] == pytest.approx(100.0)
+    assert cantidad[1] == pytest.approx(solo[0])
+    # La demanda irregular reduce la confianza
+    assert confianza[1] == pytest.approx(confianza_sola[0])
+    assert confianza[1] < 100
+
+
+def test_dias_recientes_pesan_mas():
+    historial = np.array([[10.0] * 30 + [2.0] * 5])
+    reciente, _ = predecir_bloque(historial, horizonte=1, vida_media=2)
+    lenta, _ = predecir_bloque(historial, horizonte=1, vida_media=60)
+    assert abs(reciente[0] - 2.0) < abs(lenta[0] - 2.0)
+
+
+def test_sin_historial():
+    cantidad, confianza = predecir_bloque(np.zeros((3, 0)), horizonte=7)
+    assert list(cantidad) == [0, 0, 0]
+    assert list(confianza) == [0, 0, 0]
@@ -0,0 +1,143 @@
+"""Pruebas de las réplicas de lectura: expulsión por retraso y leer lo escrito"""
+
+import time
+
+import pytest
+from mysql.connector import Error
+
+from database import config
+from database.config import DatabaseConfig, Replica
+
+
+class Conexion:
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.cerrada = False
+        self.descartada = False
+
+    def close(self):
+        self.cerrada = True
+
+    def descartar(self):
+        self.descartada = True
+
+
+class Pool:
+    """Pool que entrega siempre conexiones nuevas con el mismo nombre"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.entregadas = []
+
+    def obtener(self, timeout=None):
+        conexion = Conexion(self.nombre)
+        self.entregadas.append(conexion)
+        return conexion
+
+    def estadisticas(self):
+        return {'en_uso': 0}
+
+
+def retraso_fijo(monkeypatch, retraso):
+    monkeypatch.setattr(config, 'retraso_replicacion', lambda conexion: retraso)
+
+
+def replica(retraso_maximo=5):
+    return Replica('replica', 3306, Pool('replica'), retraso_maximo, intervalo=5, expulsion=30)
+
+
+def test_replica_al_dia_entrega_la_conexion(monkeypatch):
+    retraso_fijo(monkeypatch, 2)
+    sana = replica()
+
+    conexion = sana.obtener()
+    assert conexion.nombre == 'replica'
+    assert sana.disponible()
+    assert sana.retraso == 2
+
+
+def test_replica_retrasada_queda_expulsada(monkeypatch):
+    retraso_fijo(monkeypatch, 10)
+    retrasada = replica()
+
+    assert retrasada.obtener() is None
+    assert not retrasada.disponible()
+    assert 'retraso de 10 s' in retrasada.motivo
+    # La conexión está sana: vuelve al pool
+    assert retrasada.pool.entregadas[0].cerrada
+    # Pasada la expulsión vuelve a estar disponible
+    assert retrasada.disponible(time.monotonic() + 31)
+
+
+def test_replicacion_parada_queda_expulsada(monkeypatch):
+    retraso_fijo(monkeypatch, None)
+    parada = replica()
+
+    assert parada.obtener() is None
+    assert parada.motivo == 'la replicación no está en marcha'
+
+
+def test_error_al_comprobar_descarta_la_conexion(monkeypatch):
+    def fallar(conexion):
+        raise Error(msg='Lost connection')
+
+    monkeypatch.setattr(config, 'retraso_replicacion', fallar)
+    rota = replica()
+
+    assert rota.obtener() is None
+    assert not rota.disponible()
+    assert rota.pool.entregadas[0].descartada
+    assert not rota.pool.entregadas[0].cerrada
+
+
+def test_retraso_se_comprueba_como_mucho_cada_intervalo(monkeypatch):
+    comprobaciones = []
+    monkeypatch.setattr(config, 'retraso_replicacion', lambda conexion: comprobaciones.append(1) or 0)
+    sana = replica()
+
+    sana.obtener()
+    sana.obtener()
+    assert len(comprobaciones) == 1
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """DatabaseConfig con un primario y una réplica al día, sin servidor"""
+    monkeypatch.delenv('DB_MOTOR', raising=False)
+    retraso_fijo(monkeypatch, 0)
+    db = DatabaseConfig()
+    db.replicas_config = [('replica', 3306)]
+    db._pool = Pool('primario')
+    db._replicas = [replica()]
+    return db
+
+
+def test_lecturas_van_a_la_replica(db):
+    assert db.get_connection(lectura=True).nombre == 'replica'
+    assert db.get_connection().nombre == 'primario'
+
+
+def test_lectura_tras_escritura_va_al_primario(db):
+    db.marcar_escritura()
+    assert db.leer_del_primario()
+    assert db.get_connection(lectura=True).nombre == 'primario'
+
+    # Pasada la ventana, cualquier réplica admitida ya tiene el cambio
+    db._ultima_escritura = time.monotonic() - db.ventana_escritura - 1
+    assert not db.leer_del_primario()
+    assert db.get_connection(lectura=True).nombre == 'replica'
+
+
+def test_connection_de_escritura_marca_la_escritura(db):
+    with db.connection(escritura=True) as conexion:
+        assert conexion.nombre == 'primario'
+
+    with db.connection(lectura=True) as conexion:
+        assert conexion.nombre == 'primario'
+    assert conexion.cerrada
+
+
+def test_sin_replica_disponible_se_lee_del_primario(db, monkeypatch):
+    retraso_fijo(monkeypatch, 60)
+    assert db.get_connection(lectura=True).nombre == 'primario'
+    assert not db.replicas[0].disponible()
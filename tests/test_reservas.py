@@ -0,0 +1,33 @@
+"""Pruebas de la validación de pedidos"""
+
+import pytest
+
+from backend.reservas import validar_pedido
+
+
+def test_pedido_suma_y_ordena_las_lineas():
+    pedido = validar_pedido({
+        'lineas': [
+            {'producto_id': 7, 'cantidad': 2},
+            {'producto_id': '3', 'cantidad': '1'},
+            {'producto_id': 7, 'cantidad': 3},
+        ],
+        'motivo': 'Venta web',
+        'usuario_id': '4'
+    })
+    assert pedido == {'lineas': {3: 1, 7: 5}, 'motivo': 'Venta web', 'usuario_id': 4}
+    assert list(pedido['lineas']) == [3, 7]
+
+
+@pytest.mark.parametrize('data, error', [
+    ({}, 'Campo requerido: lineas'),
+    ({'lineas': []}, 'Campo requerido: lineas'),
+    ({'lineas': ['x']}, 'Cada línea debe ser un objeto'),
+    ({'lineas': [{'producto_id': 1}]}, 'Campo requerido en la línea: cantidad'),
+    ({'lineas': [{'producto_id': 'uno', 'cantidad': 1}]}, 'deben ser enteros'),
+    ({'lineas': [{'producto_id': 1, 'cantidad': 0}]}, 'mayor que 0'),
+    ({'lineas': [{'producto_id': 1, 'cantidad': 1}], 'usuario_id': 'ana'}, 'usuario_id debe ser un entero'),
+])
+def test_pedido_invalido(data, error):
+    with pytest.raises(ValueError, match=error):
+        validar_pedido(data)
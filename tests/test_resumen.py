@@ -0,0 +1,22 @@
+"""Pruebas de sumar_cambios_categorias (consolidación del dashboard)"""
+
+from decimal import Decimal
+
+from backend.resumen import sumar_cambios_categorias
+
+
+def test_suma_por_categoria():
+    filas = [
+        (1, 5, 1, 1, 0, Decimal('100.00')),
+        (2, 5, -1, -1, 0, Decimal('-100.00')),
+        (3, 5, 1, 0, 1, Decimal('0.00')),
+        (4, 0, 1, 1, 1, Decimal('0.00')),
+    ]
+    assert sumar_cambios_categorias(filas) == {
+        5: [1, 0, 1, Decimal('0.00')],
+        0: [1, 1, 1, Decimal('0.00')],
+    }
+
+
+def test_sin_cambios():
+    assert sumar_cambios_categorias([]) == {}
@@ -0,0 +1,63 @@
+"""Pruebas de traducir(): dialecto de MySQL a SQLite"""
+
+import sqlite3
+
+import pytest
+
+from database.sqlite import traducir
+
+
+@pytest.mark.parametrize('mysql, sqlite', [
+    ('SELECT * FROM productos WHERE id = %s FOR UPDATE', 'SELECT * FROM productos WHERE id = ?'),
+    ('SELECT IF(activo, 1, 0) FROM DUAL', 'SELECT IIF(activo, 1, 0)'),
+    ('SELECT LEAST(a, b), GREATEST(a, b) FROM t', 'SELECT MIN(a, b), MAX(a, b) FROM t'),
+    ('INSERT IGNORE INTO t (a) VALUES (%s)', 'INSERT OR IGNORE INTO t (a) VALUES (?)'),
+    ('SELECT id FROM productos WHERE codigo LIKE %s', "SELECT id FROM productos WHERE codigo LIKE ? ESCAPE '\\'"),
+    ('SELECT DATE(fecha) AS dia FROM t', 'SELECT DATE(fecha) AS "dia [DATE]" FROM t'),
+    ('ANALYZE TABLE productos, categorias', 'ANALYZE'),
+])
+def test_traduccion(mysql, sqlite):
+    assert traducir(mysql) == sqlite
+
+
+def test_comparacion_segura_con_null():
+    assert ' IS ' in traducir('SELECT 1 FROM t WHERE a <=> b')
+    assert '<=>' not in traducir('SELECT 1 FROM t WHERE a <=> b')
+
+
+def test_intervalo_relativo_a_ahora():
+    sql = traducir('SELECT * FROM eventos WHERE creado < NOW() - INTERVAL %s HOUR')
+    assert "'now', 'localtime', '-' || ? || ' hour'" in sql
+    assert 'INTERVAL' not in sql
+
+
+@pytest.fixture
+def conexion():
+    conexion = sqlite3.connect(':memory:')
+    conexion.execute('CREATE TABLE resumen (id INTEGER PRIMARY KEY, total INT NOT NULL)')
+    yield conexion
+    conexion.close()
+
+
+def test_upsert_suma_con_excluded(conexion):
+    sql = traducir('INSERT INTO resumen (id, total) VALUES (%s, %s) '
+                   'ON DUPLICATE KEY UPDATE total = total + VALUES(total)')
+    assert 'ON CONFLICT DO UPDATE SET total = total + excluded.total' in sql
+
+    conexion.execute(sql, (1, 5))
+    conexion.execute(sql, (1, 3))
+    assert conexion.execute('SELECT total FROM resumen WHERE id = 1').fetchone() == (8,)
+
+
+def test_delete_con_limit(conexion):
+    conexion.executemany('INSERT INTO resumen (id, total) VALUES (?, 0)', [(i,) for i in range(10)])
+    sql = traducir('DELETE FROM resumen WHERE total = %s LIMIT %s')
+    assert sql.startswith('DELETE FROM resumen WHERE rowid IN (SELECT rowid FROM resumen WHERE')
+
+    conexion.execute(sql, (0, 4))
+    assert conexion.execute('SELECT COUNT(*) FROM resumen').fetchone() == (6,)
+
+
+def test_traduccion_cacheada():
+    sql = 'SELECT id FROM productos WHERE id = %s'
+    assert traducir(sql) is traducir(sql)
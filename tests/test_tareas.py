@@ -0,0 +1,42 @@
+"""Pruebas de ProgramadorTareas.ejecutar_pasada"""
+
+from backend.tareas import ProgramadorTareas
+
+
+def programador(tareas, intervalo=60):
+    # Sin lock de MySQL: siempre es el líder
+    return ProgramadorTareas(intervalo, tareas, nombre_lock=None)
+
+
+def test_cada_tarea_con_su_intervalo():
+    llamadas = []
+    tareas = programador([
+        ('lenta', lambda: llamadas.append('lenta'), None),
+        ('rapida', lambda: llamadas.append('rapida'), 10),
+        ('apagada', lambda: llamadas.append('apagada'), 0),
+    ])
+
+    assert tareas.espera == 10
+    assert tareas.ejecutar_pasada(ahora=100) == ['lenta', 'rapida']
+    assert tareas.ejecutar_pasada(ahora=105) == []
+    assert tareas.ejecutar_pasada(ahora=110) == ['rapida']
+    assert tareas.ejecutar_pasada(ahora=160) == ['lenta', 'rapida']
+    assert 'apagada' not in llamadas
+
+
+def test_el_error_de_una_tarea_no_detiene_las_siguientes():
+    llamadas = []
+
+    def fallar():
+        raise RuntimeError('sin conexión')
+
+    tareas = programador([('rota', fallar, None), ('sana', lambda: llamadas.append('sana'), None)])
+    assert tareas.ejecutar_pasada(ahora=0) == ['rota', 'sana']
+    assert llamadas == ['sana']
+
+
+def test_desactivado_sin_intervalos():
+    tareas = programador([('alertas', lambda: None, None)], intervalo=0)
+    assert tareas.espera == 0
+    tareas.iniciar()
+    assert tareas._hilo is None